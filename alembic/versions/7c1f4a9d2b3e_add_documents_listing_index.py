@@ -0,0 +1,34 @@
+"""add_documents_listing_index
+
+Revision ID: 7c1f4a9d2b3e
+Revises: e39bd533ff5c
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1f4a9d2b3e'
+down_revision: Union[str, None] = 'e39bd533ff5c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_documents_listing',
+        'documents',
+        ['user_id', 'created_at'],
+        unique=False,
+        postgresql_include=['id', 'title', 'description', 'doc_type', 'status', 'tag', 'original_filename', 'updated_at']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_documents_listing', table_name='documents')
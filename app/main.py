@@ -87,6 +87,20 @@ async def health_check():
     logger.info("Health check performed")
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Transformation concurrency and queue depth, for tuning TRANSFORM_CONCURRENCY
+    and the OpenAI limits without a redeploy
+    """
+    from app.services.document_service import get_transform_metrics
+    from app.services.job_queue import job_queue_service
+    
+    return {
+        **get_transform_metrics(),
+        "queue_lengths": job_queue_service.get_queue_lengths()
+    }
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, LargeBinary
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, LargeBinary, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import logging
@@ -12,6 +12,17 @@ class Document(Base):
     Document model for storing uploaded and generated documents
     """
     __tablename__ = "documents"
+    __table_args__ = (
+        # Covering index for per-user listings, so they never touch the large
+        # file_content/ai_analysis columns (INCLUDE is Postgres-only). It holds every
+        # column get_user_documents selects, so listings are index-only scans
+        Index(
+            "ix_documents_listing",
+            "user_id",
+            "created_at",
+            postgresql_include=["id", "title", "description", "doc_type", "status", "tag", "original_filename", "updated_at"]
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Query, Body, BackgroundTasks
 from fastapi.responses import FileResponse, RedirectResponse, JSONResponse
 from sqlalchemy.orm import Session
 import logging
@@ -9,17 +9,7 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional
 from app.services.storage_service import S3StorageService
 
-# Try to import the real job queue service, fall back to mock for testing
-try:
-    from app.services.job_queue_service import job_queue_service
-    # If Redis is not available, fall back to mock
-    if job_queue_service.redis_client is None:
-        from app.services.mock_job_queue_service import mock_job_queue_service as job_queue_service
-        logger.warning("Using mock job queue service (Redis not available)")
-except ImportError:
-    # If the module is not found, use the mock version
-    from app.services.mock_job_queue_service import mock_job_queue_service as job_queue_service
-    logger.warning("Using mock job queue service (module not found)")
+from app.services.job_queue import job_queue_service
 from app.utils.performance_logger import api_perf_logger
 
 from app.core.database import get_db
@@ -38,6 +28,9 @@ use_s3 = os.getenv('USE_S3_STORAGE', 'false').lower() == 'true'
 s3_storage = S3StorageService() if use_s3 else None
 logger.info(f"Document routes initialized with S3 storage: {use_s3}")
 
+# Descriptions are stored in the ix_documents_listing index, whose entries Postgres caps at ~2.7 KB
+DESCRIPTION_MAX_LENGTH = 1000
+
 router = APIRouter(
     prefix="/documents",
     tags=["documents"],
@@ -47,16 +40,18 @@ router = APIRouter(
 @router.post("/upload", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
 async def upload_document(
     request: Request,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     title: str = Form(...),
-    description: Optional[str] = Form(None),
+    description: Optional[str] = Form(None, max_length=DESCRIPTION_MAX_LENGTH),
     doc_type: str = Form(...),
     tag: Optional[str] = Form(None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Upload and process a document
+    Upload a document; text extraction and analysis continue in the background
+    (poll /documents/{id}/status)
     """
     # Start performance timer
     timer_id = api_perf_logger.start_timer("upload_document", {
@@ -93,7 +88,8 @@ async def upload_document(
             description=description,
             doc_type=doc_type,
             client_ip=client_host,
-            tag=tag
+            tag=tag,
+            background_tasks=background_tasks
         )
         
         # Stop performance timer
@@ -192,6 +188,22 @@ async def get_document(
         logger.error(f"Error retrieving document {document_id}: {e}")
         raise
 
+@router.get("/{document_id}/status", response_model=Dict[str, Any])
+async def get_document_status(
+    document_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the processing status of a document (poll after upload until it leaves "queued"/"processing")
+    """
+    document = document_service.get_document_by_id(db, document_id, current_user.id)
+    return {
+        "id": document.id,
+        "status": document.status,
+        "updated_at": document.updated_at.isoformat() if document.updated_at else None
+    }
+
 @router.get("/{document_id}/analysis", response_model=Dict[str, Any])
 async def get_document_analysis(
     document_id: int,
@@ -276,18 +288,17 @@ async def transform_document_with_templates(
     logger.info(f"Transform request received for document {document_id} with templates {template_input_id} and {template_output_id}")
     
     try:
-        # Verify all documents exist and user has access
-        logger.info(f"Verifying document {document_id}")
-        document = document_service.get_document_by_id(db, document_id, current_user.id)
-        logger.info(f"Document {document_id} verified: {document.title}")
-        
-        logger.info(f"Verifying template input {template_input_id}")
-        template_input = document_service.get_document_by_id(db, template_input_id, current_user.id)
-        logger.info(f"Template input {template_input_id} verified: {template_input.title}")
-        
-        logger.info(f"Verifying template output {template_output_id}")
-        template_output = document_service.get_document_by_id(db, template_output_id, current_user.id)
-        logger.info(f"Template output {template_output_id} verified: {template_output.title}")
+        # Verify all documents exist and user has access (single query)
+        logger.info(f"Verifying documents {document_id}, {template_input_id} and {template_output_id}")
+        documents = document_service.get_documents_by_ids(
+            db, [document_id, template_input_id, template_output_id], current_user.id
+        )
+        document = documents[document_id]
+        template_input = documents[template_input_id]
+        template_output = documents[template_output_id]
+        logger.info(
+            f"Documents verified: {document.title}, {template_input.title}, {template_output.title}"
+        )
         
         # Verify templates are actually tagged as templates
         logger.info(f"Checking template input tag: {template_input.tag}")
@@ -368,7 +379,7 @@ async def create_document(
     template_type: str = Form(...),
     input_data: str = Form(...),
     title: Optional[str] = Form(None),
-    description: Optional[str] = Form(None),
+    description: Optional[str] = Form(None, max_length=DESCRIPTION_MAX_LENGTH),
     content: Optional[str] = Form(None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -511,15 +522,14 @@ async def download_file(
                 
             # Validate token signature
             from app.services.auth_service import SECRET_KEY
-            import hashlib
             import hmac
             
             # Recreate the signature to verify
-            expected_signature = hmac.new(
-                SECRET_KEY.encode(), 
+            expected_signature = hmac.digest(
+                SECRET_KEY.encode(),
                 f"{filename}:{user_id}:{expires}".encode(),
-                hashlib.sha256
-            ).hexdigest()
+                "sha256"
+            ).hex()
             
             if not hmac.compare_digest(token, expected_signature):
                 logger.warning(f"Invalid download token for file: {filename}")
@@ -10,13 +10,19 @@ import os
 import sys
 import json
 import argparse
-import requests
+import functools
 from typing import Dict, Any, Optional, List, Tuple
 
 # API Configuration
 API_URL = "http://localhost:8000"
 TOKEN_FILE = ".auth_token.json"
 
+@functools.lru_cache(maxsize=1)
+def _http():
+    """HTTP session shared by all API calls, imported on first use so --help and argument errors start fast"""
+    import requests
+    return requests.Session()
+
 def save_token(token_data: Dict[str, str]) -> None:
     """Save the authentication token to a file"""
     with open(TOKEN_FILE, "w") as f:
@@ -43,7 +49,7 @@ def login(username: str, password: str) -> str:
         "password": password
     }
     
-    response = requests.post(url, data=data)
+    response = _http().post(url, data=data)
     
     if response.status_code != 200:
         print(f"Error: Authentication failed ({response.status_code})")
@@ -63,7 +69,7 @@ def register(email: str, username: str, password: str) -> Dict[str, Any]:
         "password": password
     }
     
-    response = requests.post(url, json=data)
+    response = _http().post(url, json=data)
     
     if response.status_code != 201:
         print(f"Error: Registration failed ({response.status_code})")
@@ -89,7 +95,7 @@ def upload_document(token: str, file_path: str, title: str, description: str, do
             "doc_type": doc_type
         }
         
-        response = requests.post(url, headers=headers, files=files, data=data)
+        response = _http().post(url, headers=headers, files=files, data=data)
     
     if response.status_code != 201:
         print(f"Error: Upload failed ({response.status_code})")
@@ -109,7 +115,7 @@ def list_documents(token: str, status: Optional[str] = None, doc_type: Optional[
     if doc_type:
         params["doc_type"] = doc_type
     
-    response = requests.get(url, headers=headers, params=params)
+    response = _http().get(url, headers=headers, params=params)
     
     if response.status_code != 200:
         print(f"Error: List failed ({response.status_code})")
@@ -123,7 +129,7 @@ def get_document(token: str, document_id: int) -> Dict[str, Any]:
     url = f"{API_URL}/documents/{document_id}"
     headers = {"Authorization": f"Bearer {token}"}
     
-    response = requests.get(url, headers=headers)
+    response = _http().get(url, headers=headers)
     
     if response.status_code != 200:
         print(f"Error: Get document failed ({response.status_code})")
@@ -137,7 +143,7 @@ def get_document_analysis(token: str, document_id: int) -> Dict[str, Any]:
     url = f"{API_URL}/documents/{document_id}/analysis"
     headers = {"Authorization": f"Bearer {token}"}
     
-    response = requests.get(url, headers=headers)
+    response = _http().get(url, headers=headers)
     
     if response.status_code != 200:
         print(f"Error: Get analysis failed ({response.status_code})")
@@ -151,7 +157,7 @@ def delete_document(token: str, document_id: int) -> None:
     url = f"{API_URL}/documents/{document_id}"
     headers = {"Authorization": f"Bearer {token}"}
     
-    response = requests.delete(url, headers=headers)
+    response = _http().delete(url, headers=headers)
     
     if response.status_code != 204:
         print(f"Error: Delete failed ({response.status_code})")
@@ -180,7 +186,7 @@ def generate_document(token: str, template_type: str, input_data: Dict[str, Any]
     if content:
         data["content"] = content
     
-    response = requests.post(url, headers=headers, data=data)
+    response = _http().post(url, headers=headers, data=data)
     
     if response.status_code != 200:
         print(f"Error: Generate document failed ({response.status_code})")
@@ -2,14 +2,24 @@ import os
 import logging
 import json
 import time
+import hashlib
+import hmac
+import socket
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, BinaryIO, List, Tuple
+from sqlalchemy import delete, Row
 from sqlalchemy.orm import Session
-from fastapi import UploadFile, HTTPException
+from fastapi import UploadFile, HTTPException, BackgroundTasks
+from app.core.database import SessionLocal
 from app.models.document import Document
-from app.utils.document_processor import DocumentProcessor, convert_numpy_to_python
+from app.utils.document_processor import DocumentProcessor, convert_numpy_to_python, stores_files_in_s3
 from app.services.activity_service import log_activity
-from app.services.openai_service import openai_service
+from app.services.openai_service import get_openai_service, OPENAI_RPM_LIMIT
+from app.services.auth_service import SECRET_KEY
 from app.utils.performance_logger import document_perf_logger
 
 # Create logs directory
@@ -24,6 +34,287 @@ document_processor = DocumentProcessor(upload_dir="uploads")
 # Maximum processing time in seconds - aligns with Heroku's 30s timeout
 MAX_PROCESSING_TIME = 25  # 25 seconds, allowing a 5 second buffer
 
+# Monotonic clock for processing-budget checks (immune to wall-clock jumps)
+_MONO = time.monotonic
+
+
+def _over(start: float, mult: float = 1.0, budget: float = MAX_PROCESSING_TIME) -> bool:
+    """Check whether processing started at `start` has used up `mult` times the time budget"""
+    return _MONO() - start > budget * mult
+
+
+def _enqueue_extraction(document: Document, file_path: str, client_ip: Optional[str]) -> bool:
+    """Hand content extraction of a document to the worker, if the job queue is reachable
+    and the worker can read the file: locally stored files exist only on this dyno's disk"""
+    if not stores_files_in_s3():
+        return False
+    try:
+        from app.services.job_queue_service import job_queue_service
+    except ImportError:
+        return False
+    return job_queue_service.enqueue_extraction_job(
+        document.user_id, document.id, file_path, client_ip
+    )
+
+
+# Background executor for removing files of deleted documents, so disk
+# unlink latency stays off the request thread
+file_cleanup_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="file_cleanup")
+
+
+def _remove_document_files(file_paths: List[str]) -> None:
+    """Remove the stored files of deleted documents (runs on the cleanup executor)
+
+    Args:
+        file_paths: Paths of the files to remove
+    """
+    for file_path in file_paths:
+        if not file_path:
+            continue
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error removing document file: {e}")
+
+
+# Transformation results are cached in Redis keyed by the content hashes of the
+# document and both templates, so identical requests skip the OpenAI call
+TRANSFORMATION_CACHE_TTL = int(os.getenv("TRANSFORMATION_CACHE_TTL", "86400"))  # 24 hours
+
+
+def _get_cache_client():
+    """Return the Redis client shared with the job queue, or None if unavailable"""
+    try:
+        from app.services.job_queue_service import job_queue_service
+    except ImportError:
+        return None
+    return job_queue_service.redis_client
+
+
+def _transformation_cache_key(
+    document_content: str,
+    template_input_content: str,
+    template_output_content: str,
+    document_type: Optional[str]
+) -> str:
+    """Build the cache key for a document/template combination
+
+    Args:
+        document_content: Content of the document to transform
+        template_input_content: Content of the input template
+        template_output_content: Content of the output template
+        document_type: Document type, which selects the system prompt
+
+    Returns:
+        str: Redis key for the cached transformation result
+    """
+    doc_hash = hashlib.sha256(document_content.encode("utf-8")).hexdigest()
+    input_hash = hashlib.sha256(template_input_content.encode("utf-8")).hexdigest()
+    output_hash = hashlib.sha256(template_output_content.encode("utf-8")).hexdigest()
+    return f"xform:{doc_hash}:{input_hash}:{output_hash}:{document_type or ''}"
+
+
+def _get_cached_transformation(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Look up a cached transformation result, treating cache errors as a miss"""
+    client = _get_cache_client()
+    if not client:
+        return None
+    try:
+        cached = client.get(cache_key)
+        return json.loads(cached) if cached else None
+    except Exception as e:
+        logger.warning(f"Transformation cache lookup failed: {e}")
+        return None
+
+
+def _cache_transformation(cache_key: str, transformation_result: Any) -> None:
+    """Store a successful transformation result in the cache"""
+    if not isinstance(transformation_result, dict) or transformation_result.get("parse_error"):
+        return
+    client = _get_cache_client()
+    if not client:
+        return
+    try:
+        client.setex(cache_key, TRANSFORMATION_CACHE_TTL, json.dumps(transformation_result))
+    except Exception as e:
+        logger.warning(f"Failed to cache transformation result: {e}")
+
+
+# Per-process cap on in-flight OpenAI transformations; requests per minute are paced per
+# HTTP request (chunks and retries included) by the OpenAI service's Redis-shared token bucket
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "4"))
+
+_openai_semaphore = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+_openai_in_flight = 0
+_openai_in_flight_lock = threading.Lock()
+
+
+@contextmanager
+def _openai_slot(details: Optional[Dict[str, Any]] = None):
+    """Hold one OpenAI dispatch slot (concurrency limited) for the duration of the block
+
+    Args:
+        details: Additional details for the performance log
+    """
+    global _openai_in_flight
+    timer_id = document_perf_logger.start_timer("openai_slot_wait", details)
+    with _openai_semaphore:
+        with _openai_in_flight_lock:
+            _openai_in_flight += 1
+            in_flight = _openai_in_flight
+        _publish_slot_counts()
+        document_perf_logger.stop_timer(timer_id, {
+            "in_flight": in_flight,
+            "max_concurrency": OPENAI_MAX_CONCURRENCY
+        })
+        try:
+            yield
+        finally:
+            with _openai_in_flight_lock:
+                _openai_in_flight -= 1
+            _publish_slot_counts()
+
+
+# Download links are signed with the JWT secret; encoded once at import
+_SECRET_BYTES = SECRET_KEY.encode() if SECRET_KEY else None
+
+
+@functools.lru_cache(maxsize=4096)
+def _sign_download(filename: str, user_id: int, expires_bucket: int) -> str:
+    """Sign a download link that expires at `expires_bucket * 60` (epoch seconds)"""
+    if _SECRET_BYTES is None:
+        raise RuntimeError("JWT_SECRET_KEY is not set; cannot sign download links")
+    return hmac.digest(_SECRET_BYTES, f"{filename}:{user_id}:{expires_bucket * 60}".encode(), "sha256").hex()
+
+
+def _signed_download_path(filename: str, user_id: int, valid_for: timedelta) -> str:
+    """Build a signed download URL path for a transformed file
+
+    The expiry is rounded up to the next whole minute, so repeated links for
+    the same file within a minute reuse the cached signature.
+
+    Args:
+        filename: Name of the file to download
+        user_id: ID of the user allowed to download it
+        valid_for: Minimum time the link stays valid
+
+    Returns:
+        str: Download path with token, expires and user_id query parameters
+    """
+    expires_bucket = -(-int((datetime.now() + valid_for).timestamp()) // 60)
+    signature = _sign_download(filename, user_id, expires_bucket)
+    return f"/documents/downloads/{filename}?token={signature}&expires={expires_bucket * 60}&user_id={user_id}"
+
+
+# Cap on transformations running their OpenAI call at once in this process
+TRANSFORM_CONCURRENCY = int(os.getenv("TRANSFORM_CONCURRENCY", "8"))
+_transform_semaphore = threading.BoundedSemaphore(TRANSFORM_CONCURRENCY)
+_transform_counts = {"in_flight": 0, "waiting": 0}
+_transform_counts_lock = threading.Lock()
+
+# Transformations run on the worker dynos, so every process publishes its slot counts to
+# this Redis hash for /metrics on the web dynos; entries not updated for this long are dropped
+TRANSFORM_METRICS_KEY = "transform_metrics"
+TRANSFORM_METRICS_MAX_AGE = 3600  # seconds
+_PROCESS_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _slot_counts() -> Dict[str, int]:
+    """This process' transform and OpenAI slot counts"""
+    return {
+        "transforms_in_flight": _transform_counts["in_flight"],
+        "transforms_waiting": _transform_counts["waiting"],
+        "openai_in_flight": _openai_in_flight
+    }
+
+
+def _publish_slot_counts() -> None:
+    """Store this process' slot counts in the shared metrics hash"""
+    client = _get_cache_client()
+    if not client:
+        return
+    try:
+        client.hset(TRANSFORM_METRICS_KEY, _PROCESS_NAME, json.dumps({**_slot_counts(), "updated": time.time()}))
+    except Exception as e:
+        logger.warning(f"Failed to publish transform metrics: {e}")
+
+
+@contextmanager
+def _transform_slot(details: Optional[Dict[str, Any]] = None):
+    """Hold one transformation slot for the duration of the block
+
+    Args:
+        details: Additional details for the performance log
+    """
+    timer_id = document_perf_logger.start_timer("transform_slot_wait", details)
+    with _transform_counts_lock:
+        _transform_counts["waiting"] += 1
+    _publish_slot_counts()
+    try:
+        _transform_semaphore.acquire()
+    finally:
+        with _transform_counts_lock:
+            _transform_counts["waiting"] -= 1
+    try:
+        with _transform_counts_lock:
+            _transform_counts["in_flight"] += 1
+            in_flight = _transform_counts["in_flight"]
+        _publish_slot_counts()
+        document_perf_logger.stop_timer(timer_id, {
+            "in_flight": in_flight,
+            "max_concurrency": TRANSFORM_CONCURRENCY
+        })
+        try:
+            yield
+        finally:
+            with _transform_counts_lock:
+                _transform_counts["in_flight"] -= 1
+            _publish_slot_counts()
+    finally:
+        _transform_semaphore.release()
+
+
+def get_transform_metrics() -> Dict[str, Any]:
+    """Current transformation concurrency figures, summed over all processes that publish them
+
+    Returns:
+        Dict[str, Any]: Transform and OpenAI dispatch limits and utilization; this process'
+            own counts only if Redis is unavailable
+    """
+    counts = _slot_counts()
+    processes = 1
+    client = _get_cache_client()
+    if client:
+        try:
+            entries = client.hgetall(TRANSFORM_METRICS_KEY)
+            now = time.time()
+            counts = dict.fromkeys(counts, 0)
+            stale = []
+            for process, value in entries.items():
+                entry = json.loads(value)
+                if now - entry["updated"] > TRANSFORM_METRICS_MAX_AGE:
+                    stale.append(process)
+                    continue
+                for name in counts:
+                    counts[name] += entry.get(name, 0)
+            processes = len(entries) - len(stale)
+            if stale:
+                client.hdel(TRANSFORM_METRICS_KEY, *stale)
+        except Exception as e:
+            logger.warning(f"Failed to read transform metrics: {e}")
+            counts = _slot_counts()
+            processes = 1
+    return {
+        "transform_concurrency_limit": TRANSFORM_CONCURRENCY,
+        "openai_max_concurrency": OPENAI_MAX_CONCURRENCY,
+        "openai_rpm_limit": OPENAI_RPM_LIMIT,
+        "reporting_processes": processes,
+        **counts
+    }
+
+
 class DocumentService:
     """Service for document processing and management"""
     
@@ -83,9 +374,10 @@ class DocumentService:
         description: Optional[str],
         doc_type: str,
         client_ip: Optional[str] = None,
-        tag: Optional[str] = None
+        tag: Optional[str] = None,
+        background_tasks: Optional[BackgroundTasks] = None
     ) -> Document:
-        """Process a document (save, extract text, analyze)
+        """Process a document (save, then extract text and analyze off the request path)
 
         Args:
             db: Database session
@@ -95,6 +387,8 @@ class DocumentService:
             description: Document description
             doc_type: Type of document
             client_ip: Client IP address for activity logging
+            tag: Optional tag for the document
+            background_tasks: Request background tasks, used for extraction when the job queue is unavailable
 
         Returns:
             Document: The created document record
@@ -152,9 +446,24 @@ class DocumentService:
                 }
             )
             
-            # Step 4: Start processing synchronously
-            # Modified to track processing time and handle timeout gracefully
-            DocumentService._process_document_content(db, document, file_path, client_ip)
+            # Step 4: Queue extraction for the worker so the request returns
+            # immediately; if the queue is unavailable or the file is only on this
+            # dyno's disk, run it after the response is sent (or inline when there
+            # is no request to attach it to)
+            if _enqueue_extraction(document, file_path, client_ip):
+                document.status = "queued"
+                db.commit()
+            elif background_tasks is not None:
+                logger.warning(f"Extraction not queued for the worker, processing document {document.id} in the background")
+                document.status = "queued"
+                db.commit()
+                background_tasks.add_task(
+                    DocumentService._process_document_content, document.id, file_path, client_ip
+                )
+            else:
+                logger.warning(f"Extraction not queued for the worker, processing document {document.id} inline")
+                DocumentService._process_document_content(document.id, file_path, client_ip)
+                db.refresh(document)
             
             logger.info(f"Document processing started: {document.id}")
             
@@ -174,10 +483,41 @@ class DocumentService:
     
     @staticmethod
     def _process_document_content(
+        document_id: int,
+        file_path: str,
+        client_ip: Optional[str] = None,
+        time_budget: float = MAX_PROCESSING_TIME
+    ) -> None:
+        """
+        Process the content of a stored document in its own database session
+        
+        Runs outside the upload request (worker or background task), so the
+        document is re-fetched in a fresh session rather than sharing the
+        request's session across threads.
+        
+        Args:
+            document_id: ID of the document record
+            file_path: Path to the document file
+            client_ip: Client IP address for activity logging
+            time_budget: Seconds allowed before the document is left partially processed
+        """
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if not document:
+                logger.error(f"Cannot process content: document {document_id} not found")
+                return
+            DocumentService._extract_document_content(db, document, file_path, client_ip, time_budget)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _extract_document_content(
         db: Session, 
         document: Document, 
         file_path: str,
-        client_ip: Optional[str] = None
+        client_ip: Optional[str] = None,
+        time_budget: float = MAX_PROCESSING_TIME
     ) -> None:
         """
         Process the document content (extract text, metadata) with timeout handling
@@ -187,6 +527,7 @@ class DocumentService:
             document: Document record
             file_path: Path to the document file
             client_ip: Client IP address for activity logging
+            time_budget: Seconds allowed before the document is left partially processed
         """
         # Start performance timer
         timer_id = document_perf_logger.start_timer("process_document_content", {
@@ -200,7 +541,7 @@ class DocumentService:
             db.commit()
             
             # Record start time to enforce timeout
-            start_time = time.time()
+            start_time = _MONO()
             
             # Extract text content
             text_extraction_timer = document_perf_logger.start_timer("extract_text", {
@@ -216,44 +557,11 @@ class DocumentService:
             document_perf_logger.stop_timer(text_extraction_timer)
             
             # Check if we're approaching timeout
-            elapsed_time = time.time() - start_time
-            if elapsed_time > MAX_PROCESSING_TIME:
-                document_perf_logger.log_threshold_exceeded("process_document_content", 
-                                                         MAX_PROCESSING_TIME,
-                                                         {"document_id": document.id,
-                                                          "elapsed_time": elapsed_time})
-                # If we're approaching timeout, set status to partially processed
-                # and return to avoid Heroku timeout
-                document.status = "partially_processed"
-                document.ai_analysis = json.dumps({
-                    "warning": "Processing exceeded time limit",
-                    "partial_processing": True,
-                    "processing_stage": "text_extraction_completed",
-                    "processing_time_seconds": round(elapsed_time, 2)
-                })
-                db.commit()
-                
-                # Log activity for partial processing
-                log_activity(
-                    db=db,
-                    action="document_partially_processed",
-                    user_id=document.user_id,
-                    description=f"Document partially processed: {document.title}",
-                    ip_address=client_ip,
-                    details={
-                        "document_id": document.id,
-                        "processing_time": round(elapsed_time, 2),
-                        "reason": "Processing time limit exceeded"
-                    }
+            if _over(start_time, budget=time_budget):
+                DocumentService._emit_partial(
+                    db, document, "text_extraction_completed", _MONO() - start_time,
+                    timer_id, client_ip, budget=time_budget
                 )
-                
-                document_perf_logger.stop_timer(timer_id, {
-                    "document_id": document.id,
-                    "status": "partially_processed",
-                    "reason": "timeout"
-                })
-                
-                logger.warning(f"Document processing timeout: {document.id} - stopped after {elapsed_time:.2f}s")
                 return
             
             # Extract metadata (continue only if we have time)
@@ -268,53 +576,12 @@ class DocumentService:
             document_perf_logger.stop_timer(metadata_timer)
             
             # Check timeout again
-            elapsed_time = time.time() - start_time
-            if elapsed_time > MAX_PROCESSING_TIME:
-                document_perf_logger.log_threshold_exceeded("process_document_content", 
-                                                         MAX_PROCESSING_TIME,
-                                                         {"document_id": document.id,
-                                                          "elapsed_time": elapsed_time})
-                # Set status to partially processed
-                document.status = "partially_processed"
-                
-                # Combine metadata and structure
-                combined_metadata = {
-                    "metadata": metadata,
-                    "structure_info": document_structure,
-                    "warning": "Processing exceeded time limit",
-                    "partial_processing": True,
-                    "processing_stage": "metadata_extraction_completed",
-                    "processing_time_seconds": round(elapsed_time, 2)
-                }
-                
-                # Convert any NumPy types to Python native types for JSON serialization
-                serializable_analysis = convert_numpy_to_python(combined_metadata)
-                
-                # Update document with analysis results
-                document.ai_analysis = json.dumps(serializable_analysis)
-                db.commit()
-                
-                # Log activity for partial processing
-                log_activity(
-                    db=db,
-                    action="document_partially_processed",
-                    user_id=document.user_id,
-                    description=f"Document partially processed: {document.title}",
-                    ip_address=client_ip,
-                    details={
-                        "document_id": document.id,
-                        "processing_time": round(elapsed_time, 2),
-                        "reason": "Processing time limit exceeded"
-                    }
+            if _over(start_time, budget=time_budget):
+                DocumentService._emit_partial(
+                    db, document, "metadata_extraction_completed", _MONO() - start_time,
+                    timer_id, client_ip, budget=time_budget,
+                    extra={"metadata": metadata, "structure_info": document_structure}
                 )
-                
-                document_perf_logger.stop_timer(timer_id, {
-                    "document_id": document.id,
-                    "status": "partially_processed",
-                    "reason": "timeout"
-                })
-                
-                logger.warning(f"Document processing timeout: {document.id} - stopped after {elapsed_time:.2f}s")
                 return
             
             # Combine metadata and structure
@@ -326,7 +593,7 @@ class DocumentService:
             # Create full analysis results
             full_analysis = {
                 "metadata": combined_metadata,
-                "processing_time_seconds": round(time.time() - start_time, 2)
+                "processing_time_seconds": round(_MONO() - start_time, 2)
             }
             
             # Convert any NumPy types to Python native types for JSON serialization
@@ -345,7 +612,7 @@ class DocumentService:
                 ip_address=client_ip,
                 details={
                     "document_id": document.id,
-                    "processing_time": round(time.time() - start_time, 2)
+                    "processing_time": round(_MONO() - start_time, 2)
                 }
             )
             
@@ -354,7 +621,7 @@ class DocumentService:
             document_perf_logger.stop_timer(timer_id, {
                 "document_id": document.id,
                 "status": "processed",
-                "processing_time": round(time.time() - start_time, 2)
+                "processing_time": round(_MONO() - start_time, 2)
             })
             
             logger.info(f"Document processing completed: {document.id} with status {document.status}")
@@ -382,6 +649,69 @@ class DocumentService:
             document_perf_logger.log_operation_failed("process_document_content", e, 
                                                    details={"document_id": document.id})
     
+    @staticmethod
+    def _emit_partial(
+        db: Session,
+        document: Document,
+        stage: str,
+        elapsed: float,
+        timer_id: str,
+        client_ip: Optional[str] = None,
+        budget: float = MAX_PROCESSING_TIME,
+        extra: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Mark a document as partially processed after the time budget ran out
+        
+        Args:
+            db: Database session
+            document: Document record
+            stage: Last processing stage that completed
+            elapsed: Seconds spent processing so far
+            timer_id: Performance timer of the processing run
+            client_ip: Client IP address for activity logging
+            budget: Time budget in seconds that was exceeded
+            extra: Partial results to keep in the document analysis
+        """
+        document_perf_logger.log_threshold_exceeded("process_document_content", 
+                                                 budget,
+                                                 {"document_id": document.id,
+                                                  "elapsed_time": elapsed})
+        # Set status to partially processed and keep whatever was extracted
+        document.status = "partially_processed"
+        partial_analysis = {
+            **(extra or {}),
+            "warning": "Processing exceeded time limit",
+            "partial_processing": True,
+            "processing_stage": stage,
+            "processing_time_seconds": round(elapsed, 2)
+        }
+        
+        # Convert any NumPy types to Python native types for JSON serialization
+        document.ai_analysis = json.dumps(convert_numpy_to_python(partial_analysis))
+        db.commit()
+        
+        # Log activity for partial processing
+        log_activity(
+            db=db,
+            action="document_partially_processed",
+            user_id=document.user_id,
+            description=f"Document partially processed: {document.title}",
+            ip_address=client_ip,
+            details={
+                "document_id": document.id,
+                "processing_time": round(elapsed, 2),
+                "reason": "Processing time limit exceeded"
+            }
+        )
+        
+        document_perf_logger.stop_timer(timer_id, {
+            "document_id": document.id,
+            "status": "partially_processed",
+            "reason": "timeout"
+        })
+        
+        logger.warning(f"Document processing timeout: {document.id} - stopped after {elapsed:.2f}s")
+    
     @staticmethod
     def generate_document(
         db: Session,
@@ -490,8 +820,11 @@ Document created automatically by the system.
             raise HTTPException(status_code=500, detail=f"Error generating document: {str(e)}")
     
     @staticmethod
-    def get_user_documents(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Document]:
-        """Get documents for a specific user
+    def get_user_documents(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Row]:
+        """Get the listing columns of a user's documents
+
+        Only the columns needed for a listing are loaded, so the (potentially
+        multi-megabyte) file_content and ai_analysis columns are never read.
 
         Args:
             db: Database session
@@ -500,9 +833,20 @@ Document created automatically by the system.
             limit: Maximum number of records to return
 
         Returns:
-            List[Document]: List of document records
+            List[Row]: Rows with the DocumentResponse fields of each document
         """
-        return db.query(Document).filter(Document.user_id == user_id).order_by(
+        return db.query(
+            Document.id,
+            Document.user_id,
+            Document.title,
+            Document.description,
+            Document.doc_type,
+            Document.status,
+            Document.tag,
+            Document.original_filename,
+            Document.created_at,
+            Document.updated_at
+        ).filter(Document.user_id == user_id).order_by(
             Document.created_at.desc()
         ).offset(skip).limit(limit).all()
     
@@ -533,6 +877,38 @@ Document created automatically by the system.
         
         return document
     
+    @staticmethod
+    def get_documents_by_ids(db: Session, document_ids: List[int], user_id: int = None) -> Dict[int, Document]:
+        """Get several documents by ID in a single query
+
+        Args:
+            db: Database session
+            document_ids: IDs of the documents to get
+            user_id: Optional user ID to verify ownership
+
+        Returns:
+            Dict[int, Document]: The document records keyed by ID
+
+        Raises:
+            HTTPException: If any document is not found or user is not authorized
+        """
+        documents = {
+            document.id: document
+            for document in db.query(Document).filter(Document.id.in_(set(document_ids))).all()
+        }
+        
+        for document_id in document_ids:
+            document = documents.get(document_id)
+            if not document:
+                logger.warning(f"Document not found: {document_id}")
+                raise HTTPException(status_code=404, detail="Document not found")
+            
+            if user_id is not None and document.user_id != user_id:
+                logger.warning(f"User {user_id} attempted to access document {document_id} owned by user {document.user_id}")
+                raise HTTPException(status_code=403, detail="Not authorized to access this document")
+        
+        return documents
+    
     @staticmethod
     def delete_document(db: Session, document_id: int, user_id: int, client_ip: Optional[str] = None) -> None:
         """Delete a document
@@ -546,33 +922,75 @@ Document created automatically by the system.
         Raises:
             HTTPException: If document is not found or user is not authorized
         """
-        document = DocumentService.get_document_by_id(db, document_id, user_id)
-        
-        # Remove the file if it exists
-        if document.file_path and os.path.exists(document.file_path):
-            try:
-                os.remove(document.file_path)
-            except Exception as e:
-                logger.error(f"Error removing document file: {e}")
+        # Verify the document exists and belongs to the user
+        DocumentService.get_document_by_id(db, document_id, user_id)
         
-        # Log activity before deletion
-        log_activity(
-            db=db,
-            action="document_deleted",
-            user_id=user_id,
-            description=f"Document deleted: {document.title}",
-            ip_address=client_ip,
-            details={
-                "document_id": document_id,
-                "document_title": document.title
-            }
-        )
+        DocumentService.delete_documents(db, [document_id], user_id, client_ip)
+
+    @staticmethod
+    def delete_documents(
+        db: Session,
+        document_ids: List[int],
+        user_id: int,
+        client_ip: Optional[str] = None
+    ) -> List[int]:
+        """Delete several documents with a single DELETE statement
+
+        Only documents owned by the user are deleted. Their files are removed
+        in the background once the rows are gone.
+
+        Args:
+            db: Database session
+            document_ids: IDs of the documents to delete
+            user_id: ID of the user deleting the documents
+            client_ip: Client IP address for activity logging
+
+        Returns:
+            List[int]: IDs of the documents that were deleted
+        """
+        if not document_ids:
+            return []
         
-        # Delete the document
-        db.delete(document)
+        # Delete all matching rows in one round-trip and collect what was removed
+        deleted_rows = db.execute(
+            delete(Document)
+            .where(Document.id.in_(document_ids), Document.user_id == user_id)
+            .returning(Document.id, Document.title, Document.file_path)
+        ).all()
         db.commit()
         
-        logger.info(f"Document deleted: {document_id}")
+        deleted_ids = [row.id for row in deleted_rows]
+        
+        # Log activity
+        if len(deleted_rows) == 1:
+            log_activity(
+                db=db,
+                action="document_deleted",
+                user_id=user_id,
+                description=f"Document deleted: {deleted_rows[0].title}",
+                ip_address=client_ip,
+                details={
+                    "document_id": deleted_rows[0].id,
+                    "document_title": deleted_rows[0].title
+                }
+            )
+        elif deleted_rows:
+            log_activity(
+                db=db,
+                action="documents_deleted",
+                user_id=user_id,
+                description=f"{len(deleted_rows)} documents deleted",
+                ip_address=client_ip,
+                details={"document_ids": deleted_ids}
+            )
+        
+        # Remove the files off the request thread
+        file_paths = [row.file_path for row in deleted_rows if row.file_path]
+        if file_paths:
+            file_cleanup_executor.submit(_remove_document_files, file_paths)
+        
+        logger.info(f"Documents deleted: {deleted_ids}")
+        return deleted_ids
 
     @staticmethod
     def transform_document_with_templates(
@@ -605,7 +1023,10 @@ Document created automatically by the system.
             "template_output_id": template_output.id
         })
         
-        start_time = time.time()
+        start_time = _MONO()
+        transformed_file_path = None
+        parse_error = None
+        timeout_reached = False
         
         try:
             # Get document content
@@ -629,10 +1050,10 @@ Document created automatically by the system.
             
             # First check processing time to ensure we have enough time
             # If we're already close to the timeout, return a special response
-            elapsed_time = time.time() - start_time
+            elapsed_time = _MONO() - start_time
             # For repo documents (depositions), we want to allow more processing time
             # For other document types, check if we've used 20% of our time just preparing
-            if document.doc_type != "repo" and elapsed_time > MAX_PROCESSING_TIME * 0.2:
+            if document.doc_type != "repo" and _over(start_time, 0.2):
                 document_perf_logger.log_threshold_exceeded(
                     "transform_document_preparation", 
                     MAX_PROCESSING_TIME * 0.2,
@@ -668,23 +1089,41 @@ Document created automatically by the system.
                 # Start a watchdog timer to prevent exceeding Heroku's 30s timeout
                 # Note: This doesn't actually stop the API call, but helps us detect if we're approaching the limit
                 timeout_reached = False
-                api_start_time = time.time()
+                api_start_time = _MONO()
                 
-                # This is a synchronous API call - we need to carefully monitor time
-                transformation_result = openai_service.transform_document(
-                    document_content=document_content,
-                    template_input_content=template_input_content,
-                    template_output_content=template_output_content,
-                    document_format=document_ext,
-                    template_input_format=template_input_ext,
-                    template_output_format=template_output_ext,
-                    document_title=document.title,
-                    template_input_title=template_input.title,
-                    template_output_title=template_output.title,
-                    document_type=document.doc_type
+                # Reuse a previous result for identical document/template content
+                cache_key = _transformation_cache_key(
+                    document_content,
+                    template_input_content,
+                    template_output_content,
+                    document.doc_type
+                )
+                transformation_result = _get_cached_transformation(cache_key)
+                document_perf_logger.record_cache_lookup(
+                    "transformation_cache",
+                    transformation_result is not None,
+                    {"document_id": document.id}
                 )
                 
-                api_processing_time = time.time() - api_start_time
+                if transformation_result is None:
+                    # This is a synchronous API call - we need to carefully monitor time
+                    with _openai_slot({"document_id": document.id}):
+                        transformation_result = get_openai_service().transform_document(
+                            document_content=document_content,
+                            template_input_content=template_input_content,
+                            template_output_content=template_output_content,
+                            document_format=document_ext,
+                            template_input_format=template_input_ext,
+                            template_output_format=template_output_ext,
+                            document_title=document.title,
+                            template_input_title=template_input.title,
+                            template_output_title=template_output.title,
+                            document_type=document.doc_type,
+                            user_id=user_id
+                        )
+                    _cache_transformation(cache_key, transformation_result)
+                
+                api_processing_time = _MONO() - api_start_time
                 document_perf_logger.stop_timer(openai_timer_id, {
                     "api_processing_time": api_processing_time
                 })
@@ -692,10 +1131,9 @@ Document created automatically by the system.
                 logger.info(f"OpenAI transformation completed in {api_processing_time:.2f} seconds")
                 
                 # Check if we've exceeded our processing time budget during API call
-                elapsed_time = time.time() - start_time
+                elapsed_time = _MONO() - start_time
                 # For repo documents (depositions), allow more time before considering timeout
-                if (document.doc_type == "repo" and elapsed_time > MAX_PROCESSING_TIME * 2) or \
-                   (document.doc_type != "repo" and elapsed_time > MAX_PROCESSING_TIME):
+                if _over(start_time, 2.0 if document.doc_type == "repo" else 1.0):
                     document_perf_logger.log_threshold_exceeded("transform_document_with_templates", 
                                                           MAX_PROCESSING_TIME,
                                                           {"document_id": document.id,
@@ -777,35 +1215,22 @@ Document created automatically by the system.
             }
             
             # Add file path if the file was saved successfully
-            if 'transformed_file_path' in locals() and transformed_file_path:
-                # Get relative path for display (removes the full server path)
-                rel_path = os.path.relpath(transformed_file_path, start=os.getcwd())
-                result["transformed_file_path"] = transformed_file_path
-                result["transformed_file_name"] = os.path.basename(transformed_file_path)
-                
-                # Generate a signed URL for secure download (valid for 1 hour)
-                import hashlib
-                import hmac
-                from app.services.auth_service import SECRET_KEY
-                
+            if transformed_file_path:
                 filename = os.path.basename(transformed_file_path)
-                expires = int((datetime.now() + timedelta(hours=1)).timestamp())
-                signature = hmac.new(
-                    SECRET_KEY.encode(), 
-                    f"{filename}:{user_id}:{expires}".encode(),
-                    hashlib.sha256
-                ).hexdigest()
+                result["transformed_file_path"] = transformed_file_path
+                result["transformed_file_name"] = filename
                 
-                # Create a signed URL with auth params in the query string
+                # Create a signed URL for secure download (valid for 1 hour) with auth
+                # params in the query string
                 # This works for both local and S3 storage since our download route handles both
-                result["download_path"] = f"/documents/downloads/{filename}?token={signature}&expires={expires}&user_id={user_id}"
+                result["download_path"] = _signed_download_path(filename, user_id, timedelta(hours=1))
             
             # Add any parse errors if they occurred
-            if 'parse_error' in locals() and parse_error:
+            if parse_error:
                 result["parse_error"] = parse_error
             
             # Add timeout warning if needed
-            if 'timeout_reached' in locals() and timeout_reached:
+            if timeout_reached:
                 result["timeout_warning"] = "Transformation exceeded the processing time limit. Results may be incomplete."
             
             # Log the transformation action
@@ -821,14 +1246,14 @@ Document created automatically by the system.
                     "document_format": document_ext,
                     "template_input_format": template_input_ext,
                     "template_output_format": template_output_ext,
-                    "transformation_time_seconds": time.time() - start_time if 'start_time' in locals() else None
+                    "transformation_time_seconds": _MONO() - start_time
                 }
             )
             
-            final_time = time.time() - start_time
+            final_time = _MONO() - start_time
             document_perf_logger.stop_timer(timer_id, {
                 "document_id": document.id,
-                "status": "success" if not ('timeout_reached' in locals() and timeout_reached) else "timeout_warning",
+                "status": "timeout_warning" if timeout_reached else "success",
                 "processing_time": final_time
             })
             
@@ -836,7 +1261,7 @@ Document created automatically by the system.
             return result
             
         except Exception as e:
-            final_time = time.time() - start_time if 'start_time' in locals() else 0
+            final_time = _MONO() - start_time
             logger.error(f"Error transforming document: {e}")
             document_perf_logger.log_operation_failed("transform_document_with_templates", e, 
                                                    elapsed_seconds=final_time, 
@@ -0,0 +1,22 @@
+"""
+Selects the job queue implementation shared by the API routes.
+
+The real Redis-backed service is used when it can be imported and has a
+client; otherwise the in-memory mock is used (local development and tests).
+"""
+
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+try:
+    from app.services.job_queue_service import job_queue_service
+    # If Redis is not available, fall back to mock
+    if job_queue_service.redis_client is None:
+        from app.services.mock_job_queue_service import mock_job_queue_service as job_queue_service
+        logger.warning("Using mock job queue service (Redis not available)")
+except ImportError:
+    # If the module is not found, use the mock version
+    from app.services.mock_job_queue_service import mock_job_queue_service as job_queue_service
+    logger.warning("Using mock job queue service (module not found)")
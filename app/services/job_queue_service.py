@@ -7,8 +7,19 @@ import json
 import time
 import uuid
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple, Union
 import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -17,11 +28,237 @@ logger = logging.getLogger(__name__)
 REDIS_URL = os.getenv('REDIS_URL') or os.getenv('REDIS') or 'redis://localhost:6379/0'
 logger.info(f"Job queue service using Redis URL: {REDIS_URL.split('@')[0]}[...]")
 
+# Expiry of a job record that is never picked up (the worker resets it on status updates)
+JOB_TTL_SECONDS = 60 * 60 * 24  # 1 day
+
+# Connection pool size per process
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '32'))
+
+
+def create_redis_client(redis_url: str) -> redis.Redis:
+    """
+    Create a Redis client backed by a health-checked connection pool
+    
+    Connections are kept alive and reused, and commands that hit a connection
+    or timeout error are retried with exponential backoff on a fresh connection.
+    
+    Args:
+        redis_url: Redis connection URL
+        
+    Returns:
+        The Redis client
+    """
+    pool_kwargs = {
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "socket_keepalive": True,
+        "health_check_interval": 30,
+        "decode_responses": False,
+        "retry": Retry(ExponentialBackoff(cap=1.0, base=0.05), 3),
+        "retry_on_error": [redis.exceptions.ConnectionError, redis.exceptions.TimeoutError],
+    }
+    # For Heroku Redis URLs (rediss://), skip SSL certificate verification
+    if redis_url.startswith('rediss://'):
+        logger.info(f"Using secure Redis connection with SSL verification disabled")
+        pool_kwargs["ssl_cert_reqs"] = None
+    
+    pool = redis.ConnectionPool.from_url(redis_url, **pool_kwargs)
+    return redis.Redis(connection_pool=pool)
+
+
+def _utc_now() -> Tuple[int, str]:
+    """Current time as (epoch milliseconds, ISO 8601 UTC string) from a single clock read"""
+    now = datetime.now(timezone.utc)
+    return int(now.timestamp() * 1000), now.isoformat(timespec="seconds")
+
+
+# Version prefix of MessagePack-encoded job payloads; payloads without it are legacy JSON
+MSGPACK_PAYLOAD_PREFIX = b"\x01"
+
+
+def pack_job(job_data: Dict[str, Any]) -> Union[bytes, str]:
+    """
+    Serialize job data for storage in Redis
+    
+    Args:
+        job_data: The job data
+        
+    Returns:
+        Version-prefixed MessagePack bytes, or a JSON string if msgpack is not installed
+    """
+    if MSGPACK_AVAILABLE:
+        return MSGPACK_PAYLOAD_PREFIX + msgpack.packb(job_data, use_bin_type=True)
+    return json.dumps(job_data)
+
+
+def unpack_job(payload: Union[bytes, str]) -> Dict[str, Any]:
+    """
+    Deserialize job data read from Redis, accepting both MessagePack and legacy JSON payloads
+    
+    Args:
+        payload: The stored payload
+        
+    Returns:
+        The job data
+        
+    Raises:
+        ValueError: If the payload cannot be decoded
+    """
+    if isinstance(payload, bytes) and payload[:1] == MSGPACK_PAYLOAD_PREFIX:
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("MessagePack job payload found but msgpack is not installed")
+        return msgpack.unpackb(payload[1:], raw=False)
+    return json.loads(payload)
+
+
+# Atomically store a job record, queue it and index it under its user in one round-trip
+# KEYS: job key, queue, user index; ARGV: payload, job_id, score (epoch ms), ttl seconds
+ENQUEUE_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[4])
+redis.call('LPUSH', KEYS[2], ARGV[1])
+redis.call('ZADD', KEYS[3], ARGV[3], ARGV[2])
+return 1
+"""
+
+# SHA1 of each Lua script loaded in this process, keyed by script source, so every
+# service instance reuses the server-side script without another SCRIPT LOAD
+_SCRIPT_SHAS: Dict[str, str] = {}
+
+
+def _evalsha(client: redis.Redis, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+    """
+    Run a Lua script by SHA, loading it on first use in this process or after a server flush
+    
+    Args:
+        client: Redis client
+        script: Lua script source
+        numkeys: Number of key arguments
+        keys_and_args: Keys followed by arguments
+        
+    Returns:
+        The script's return value
+    """
+    sha = _SCRIPT_SHAS.get(script)
+    if sha is None:
+        sha = _SCRIPT_SHAS[script] = client.script_load(script)
+    try:
+        return client.evalsha(sha, numkeys, *keys_and_args)
+    except redis.exceptions.NoScriptError:
+        # Script cache was flushed (e.g. Redis restart) - load it again
+        sha = _SCRIPT_SHAS[script] = client.script_load(script)
+        return client.evalsha(sha, numkeys, *keys_and_args)
+
+# Maximum number of commands sent in one pipeline when enqueueing in bulk
+PIPELINE_MAX_COMMANDS = 10000
+
+# Marker set once jobs from before the user_jobs:{user_id} index have been indexed
+USER_INDEX_BACKFILL_MARKER = "user_jobs:backfilled"
+# Held while a backfill runs; expires so a process that dies mid-backfill doesn't block the retry
+USER_INDEX_BACKFILL_LOCK = "user_jobs:backfilling"
+USER_INDEX_BACKFILL_LOCK_TTL = 600  # seconds
+
+# Queue of uploaded documents waiting for text/metadata extraction by the worker
+EXTRACTION_QUEUE = "extraction_jobs"
+
+# In-process cache of job records for status polling, kept coherent by Redis
+# server-assisted client-side caching (CLIENT TRACKING invalidation messages)
+JOB_STATUS_CACHE_ENABLED = os.getenv('JOB_STATUS_CACHE', 'true').lower() == 'true'
+JOB_STATUS_CACHE_SIZE = 10000
+JOB_STATUS_CACHE_TTL = 5  # seconds - safety net in case an invalidation is missed
+# Seconds the invalidation listener waits idle before pinging both tracking connections,
+# well under the server's idle client timeout so tracking is never silently dropped
+JOB_STATUS_TRACKING_PING_INTERVAL = 60
+# Backoff between attempts to turn tracking back on after it failed or stopped
+JOB_STATUS_TRACKING_RETRY_MIN = 5  # seconds
+JOB_STATUS_TRACKING_RETRY_MAX = 300  # seconds
+JOB_KEY_PREFIX = "transform_job:"
+
+# Job IDs recently found missing, so polls racing the enqueue don't each cost a round trip
+MISSING_JOB_CACHE_SIZE = 2048
+MISSING_JOB_CACHE_TTL = 0.2  # seconds
+
+# Keys are built as bytes, which redis-py sends without a further str -> bytes encode
+_JOB_KEY_PREFIX = JOB_KEY_PREFIX.encode()
+_USER_KEY_PREFIX = b"user_jobs:"
+
+
+def _job_key(job_id: Union[str, bytes]) -> bytes:
+    """Redis key of a job record; accepts IDs as returned by Redis (bytes) or as strings"""
+    if isinstance(job_id, bytes):
+        return _JOB_KEY_PREFIX + job_id
+    return _JOB_KEY_PREFIX + job_id.encode()
+
+
+def _user_key(user_id: int) -> bytes:
+    """Redis key of a user's job index"""
+    return _USER_KEY_PREFIX + b"%d" % user_id
+
+
+class _TTLCache:
+    """Small thread-safe cache whose entries expire after `ttl` seconds, evicting the oldest beyond `maxsize`
+
+    Every pop() or clear() counts as an invalidation. A reader takes version(key) before
+    fetching a value and passes it to set(), which drops the value if the key was
+    invalidated in the meantime, so a slow read cannot cache data that is already stale.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # Invalidation counts per key; clear() and overflow bump the epoch instead
+        self._invalidations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+    
+    def version(self, key: str) -> Tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._invalidations.get(key, 0)
+    
+    def set(self, key: str, value: Any, version: Optional[Tuple[int, int]] = None) -> None:
+        with self._lock:
+            if version is not None and version != (self._epoch, self._invalidations.get(key, 0)):
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            if len(self._invalidations) >= self.maxsize:
+                self._invalidations.clear()
+                self._epoch += 1
+            self._invalidations[key] = self._invalidations.get(key, 0) + 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._invalidations.clear()
+            self._epoch += 1
+
 class JobQueueService:
     """Service for managing asynchronous job queues"""
     
     def __init__(self):
         """Initialize the job queue service"""
+        self._status_cache = _TTLCache(JOB_STATUS_CACHE_SIZE, JOB_STATUS_CACHE_TTL)
+        self._status_tracking = False
+        self._tracking_lock = threading.Lock()
+        self._tracking_retry_at = 0.0
+        self._tracking_backoff = JOB_STATUS_TRACKING_RETRY_MIN
+        self._missing_jobs = _TTLCache(MISSING_JOB_CACHE_SIZE, MISSING_JOB_CACHE_TTL)
         self._initialize_redis()
     
     def _initialize_redis(self):
@@ -29,21 +266,135 @@ class JobQueueService:
         try:
             # Try to get updated Redis URL (in case it changed during provisioning)
             updated_redis_url = os.getenv('REDIS_URL') or os.getenv('REDIS') or REDIS_URL
+            self.redis_client = create_redis_client(updated_redis_url)
             
-            # For Heroku Redis URLs (rediss://), skip SSL certificate verification
-            if updated_redis_url.startswith('rediss://'):
-                logger.info(f"Using secure Redis connection with SSL verification disabled")
-                self.redis_client = redis.from_url(
-                    updated_redis_url, 
-                    ssl_cert_reqs=None  # Skip certificate verification for Heroku Redis
-                )
-            else:
-                self.redis_client = redis.from_url(updated_redis_url)
-                
             logger.info(f"Job queue service initialized with Redis")
         except Exception as e:
             logger.error(f"Error initializing Redis client: {e}")
             self.redis_client = None
+            return
+        
+        if JOB_STATUS_CACHE_ENABLED and not self._status_tracking:
+            self._start_status_tracking()
+    
+    def _start_status_tracking(self) -> None:
+        """
+        Enable invalidation-based caching of job records for get_job_status
+        
+        A dedicated connection subscribes to Redis' invalidation channel and a
+        second one turns on broadcast tracking for job keys, redirected to the
+        first. A background thread evicts cached jobs as invalidations arrive
+        and pings both connections while idle, since Redis turns tracking off
+        when the control connection is dropped. If anything fails,
+        get_job_status reads from Redis directly and retries this with backoff.
+        """
+        pool = self.redis_client.connection_pool
+        subscriber = control = None
+        try:
+            # Both connections stay checked out while tracking is on
+            subscriber = pool.get_connection("CLIENT")
+            subscriber.send_command("CLIENT", "ID")
+            subscriber_id = subscriber.read_response()
+            subscriber.send_command("SUBSCRIBE", "__redis__:invalidate")
+            subscriber.read_response()
+            
+            control = pool.get_connection("CLIENT")
+            control.send_command(
+                "CLIENT", "TRACKING", "ON", "REDIRECT", subscriber_id, "BCAST", "PREFIX", JOB_KEY_PREFIX
+            )
+            control.read_response()
+        except Exception as e:
+            logger.warning(f"Job status caching disabled, could not enable client tracking: {e}")
+            self._release_tracking_connections(pool, subscriber, control)
+            self._schedule_tracking_retry()
+            return
+        
+        self._tracking_connections = (subscriber, control)
+        self._status_tracking = True
+        threading.Thread(
+            target=self._listen_for_invalidations,
+            args=(pool, subscriber, control),
+            name="job_status_invalidation",
+            daemon=True
+        ).start()
+        logger.info("Job status caching enabled with Redis client tracking")
+    
+    def _restart_status_tracking(self) -> None:
+        """Turn status tracking back on if it is off and the retry backoff has passed"""
+        if time.monotonic() < self._tracking_retry_at or not self._tracking_lock.acquire(blocking=False):
+            return
+        try:
+            if not self._status_tracking and time.monotonic() >= self._tracking_retry_at:
+                self._start_status_tracking()
+        finally:
+            self._tracking_lock.release()
+    
+    def _schedule_tracking_retry(self) -> None:
+        """Delay the next tracking attempt, doubling the delay up to JOB_STATUS_TRACKING_RETRY_MAX"""
+        self._tracking_retry_at = time.monotonic() + self._tracking_backoff
+        self._tracking_backoff = min(self._tracking_backoff * 2, JOB_STATUS_TRACKING_RETRY_MAX)
+    
+    @staticmethod
+    def _release_tracking_connections(pool, *connections) -> None:
+        """Close tracking connections and hand their slots back to the pool"""
+        for connection in connections:
+            if connection is None:
+                continue
+            try:
+                connection.disconnect()
+                pool.release(connection)
+            except Exception as e:
+                logger.debug(f"Error releasing job status tracking connection: {e}")
+    
+    def _listen_for_invalidations(self, pool, subscriber, control) -> None:
+        """
+        Evict cached job records as Redis reports their keys changed (runs on a background thread)
+        
+        Args:
+            pool: Connection pool both connections were checked out from
+            subscriber: Connection subscribed to the invalidation channel
+            control: Connection that turned tracking on
+        """
+        prefix = _JOB_KEY_PREFIX
+        started = time.monotonic()
+        pong_pending = False
+        try:
+            while True:
+                if not subscriber.can_read(timeout=JOB_STATUS_TRACKING_PING_INTERVAL):
+                    if pong_pending:
+                        raise redis.exceptions.ConnectionError("No reply to PING on the invalidation connection")
+                    # Keeps both connections from idling out and proves the subscriber still
+                    # receives; its reply arrives as a pubsub "pong" message on the next read.
+                    # The pool's health check is skipped, it can't read pubsub replies
+                    subscriber.send_command("PING", check_health=False)
+                    pong_pending = True
+                    control.send_command("PING", check_health=False)
+                    control.read_response()
+                    continue
+                message = subscriber.read_response()
+                if isinstance(message, list) and message[0] == b"pong":
+                    pong_pending = False
+                    continue
+                if not isinstance(message, list) or message[0] != b"message":
+                    continue
+                keys = message[2]
+                if keys is None:
+                    # Database was flushed
+                    self._status_cache.clear()
+                    continue
+                for key in keys:
+                    if key.startswith(prefix):
+                        self._status_cache.pop(key[len(prefix):].decode())
+        except Exception as e:
+            logger.warning(f"Job status invalidation listener stopped, disabling caching: {e}")
+        finally:
+            if time.monotonic() - started > JOB_STATUS_TRACKING_RETRY_MAX:
+                # Tracking was healthy for a while, so retry promptly
+                self._tracking_backoff = JOB_STATUS_TRACKING_RETRY_MIN
+            self._schedule_tracking_retry()
+            self._status_tracking = False
+            self._status_cache.clear()
+            self._release_tracking_connections(pool, subscriber, control)
     
     def enqueue_transformation_job(
         self, 
@@ -64,6 +415,8 @@ class JobQueueService:
         Returns:
             Dict with job information including job_id
         """
+        now_ms, now_str = _utc_now()
+        
         # Try to reconnect if Redis client is not available
         if not self.redis_client:
             logger.warning("Redis client not available, attempting to reconnect")
@@ -88,8 +441,10 @@ class JobQueueService:
                     "template_input_id": template_input_id,
                     "template_output_id": template_output_id,
                     "status": "queued",
-                    "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "created_at": now_str,
+                    "updated_at": now_str,
+                    "created_at_ms": now_ms,
+                    "updated_at_ms": now_ms,
                     "message": "Job created but Redis is unavailable - processing may be delayed"
                 }
                 logger.warning(f"Created job {job_id} but Redis is unavailable")
@@ -107,22 +462,25 @@ class JobQueueService:
                 "template_input_id": template_input_id,
                 "template_output_id": template_output_id,
                 "status": "queued",
-                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+                "created_at": now_str,
+                "updated_at": now_str,
+                "created_at_ms": now_ms,
+                "updated_at_ms": now_ms
             }
             
-            # Store job data in Redis
-            job_key = f"transform_job:{job_id}"
-            self.redis_client.set(job_key, json.dumps(job_data))
-            
-            # Add job to the queue
-            self.redis_client.lpush("transform_jobs", json.dumps(job_data))
+            # Store the job data, queue it and index it under its user (so listing
+            # doesn't scan the keyspace) atomically in a single round-trip
+            _evalsha(
+                self.redis_client, ENQUEUE_SCRIPT, 3,
+                _job_key(job_id), "transform_jobs", _user_key(user_id),
+                pack_job(job_data), job_id, now_ms, JOB_TTL_SECONDS
+            )
+            self._missing_jobs.pop(job_id)
             
             logger.info(f"Enqueued transformation job {job_id} for document {document_id}")
             return job_data
         except redis.exceptions.ConnectionError as e:
             logger.error(f"Redis connection error while enqueueing job: {e}")
-            self.redis_client = None  # Reset client so next call will attempt to reconnect
             # Return job data without persistence
             job_id = str(uuid.uuid4())
             job_data = {
@@ -132,8 +490,10 @@ class JobQueueService:
                 "template_input_id": template_input_id,
                 "template_output_id": template_output_id,
                 "status": "queued",
-                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "created_at": now_str,
+                "updated_at": now_str,
+                "created_at_ms": now_ms,
+                "updated_at_ms": now_ms,
                 "message": "Job created but Redis is unavailable - processing may be delayed"
             }
             return job_data
@@ -141,6 +501,130 @@ class JobQueueService:
             logger.error(f"Error enqueueing job: {e}")
             raise
     
+    def enqueue_transformation_jobs(
+        self,
+        jobs: List[Tuple[int, int, int, int]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Enqueue several document transformation jobs with pipelined round-trips
+        
+        Args:
+            jobs: (user_id, document_id, template_input_id, template_output_id) per job
+            
+        Returns:
+            List of job information dicts, in the order of `jobs`
+        """
+        if not self.redis_client:
+            logger.warning("Redis client not available, attempting to reconnect")
+            self._initialize_redis()
+        
+        # Without Redis, fall back to the single-job path (mock service or placeholders)
+        if not self.redis_client:
+            return [self.enqueue_transformation_job(*job) for job in jobs]
+        
+        now_ms, now_str = _utc_now()
+        job_datas = [
+            {
+                "job_id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "document_id": document_id,
+                "template_input_id": template_input_id,
+                "template_output_id": template_output_id,
+                "status": "queued",
+                "created_at": now_str,
+                "updated_at": now_str,
+                "created_at_ms": now_ms,
+                "updated_at_ms": now_ms
+            }
+            for user_id, document_id, template_input_id, template_output_id in jobs
+        ]
+        
+        # Each job takes 4 commands; send them in pipelines of bounded size
+        jobs_per_pipeline = PIPELINE_MAX_COMMANDS // 4
+        try:
+            for chunk_start in range(0, len(job_datas), jobs_per_pipeline):
+                pipe = self.redis_client.pipeline(transaction=False)
+                for job_data in job_datas[chunk_start:chunk_start + jobs_per_pipeline]:
+                    job_key = _job_key(job_data["job_id"])
+                    payload = pack_job(job_data)
+                    pipe.set(job_key, payload)
+                    pipe.lpush("transform_jobs", payload)
+                    pipe.zadd(_user_key(job_data["user_id"]), {job_data["job_id"]: now_ms})
+                    pipe.expire(job_key, JOB_TTL_SECONDS)
+                pipe.execute()
+            for job_data in job_datas:
+                self._missing_jobs.pop(job_data["job_id"])
+        except redis.exceptions.ConnectionError as e:
+            logger.error(f"Redis connection error while enqueueing jobs: {e}")
+            for job_data in job_datas:
+                job_data["message"] = "Job created but Redis is unavailable - processing may be delayed"
+            return job_datas
+        
+        logger.info(f"Enqueued {len(job_datas)} transformation jobs")
+        return job_datas
+    
+    def enqueue_extraction_job(
+        self,
+        user_id: int,
+        document_id: int,
+        file_path: str,
+        client_ip: Optional[str] = None
+    ) -> bool:
+        """
+        Enqueue text/metadata extraction of an uploaded document for the worker
+        
+        Progress is tracked through the document's status column rather than a
+        job record, so only the queue entry is written.
+        
+        Args:
+            user_id: ID of the user who uploaded the document
+            document_id: ID of the document to process
+            file_path: Path to the stored document file
+            client_ip: Client IP address for activity logging
+            
+        Returns:
+            bool: True if the job was queued, False if Redis is unavailable
+        """
+        if not self.redis_client:
+            self._initialize_redis()
+        if not self.redis_client:
+            return False
+        
+        job_data = {
+            "user_id": user_id,
+            "document_id": document_id,
+            "file_path": file_path,
+            "client_ip": client_ip,
+            "created_at_ms": int(time.time() * 1000)
+        }
+        
+        try:
+            self.redis_client.lpush(EXTRACTION_QUEUE, pack_job(job_data))
+            logger.info(f"Enqueued extraction job for document {document_id}")
+            return True
+        except redis.exceptions.ConnectionError as e:
+            logger.error(f"Redis connection error while enqueueing extraction job: {e}")
+            return False
+    
+    def get_queue_lengths(self) -> Dict[str, Optional[int]]:
+        """
+        Get the number of jobs waiting in each queue
+        
+        Returns:
+            Dict of queue name to length, with None values if Redis is unavailable
+        """
+        if not self.redis_client:
+            return {"transform_jobs": None, EXTRACTION_QUEUE: None}
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.llen("transform_jobs")
+            pipe.llen(EXTRACTION_QUEUE)
+            transform_length, extraction_length = pipe.execute()
+            return {"transform_jobs": transform_length, EXTRACTION_QUEUE: extraction_length}
+        except redis.exceptions.ConnectionError as e:
+            logger.error(f"Redis connection error while getting queue lengths: {e}")
+            return {"transform_jobs": None, EXTRACTION_QUEUE: None}
+    
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the status of a job
@@ -169,35 +653,108 @@ class JobQueueService:
                     "job_id": job_id,
                     "status": "unknown",
                     "message": "Redis is currently unavailable - job status cannot be determined",
-                    "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+                    "updated_at": _utc_now()[1]
                 }
         
+        # Serve repeated polls from the invalidation-tracked local cache
+        if JOB_STATUS_CACHE_ENABLED and not self._status_tracking:
+            self._restart_status_tracking()
+        if self._status_tracking:
+            cached = self._status_cache.get(job_id)
+            if cached is not None:
+                return dict(cached)
+        if self._missing_jobs.get(job_id):
+            return None
+        
+        # Taken before the read, so an invalidation arriving during it keeps the result out of the cache
+        cache_version = self._status_cache.version(job_id)
         try:
-            job_key = f"transform_job:{job_id}"
+            job_key = _job_key(job_id)
             job_data_str = self.redis_client.get(job_key)
             
             if not job_data_str:
+                self._missing_jobs.set(job_id, True)
                 return None
             
             try:
-                return json.loads(job_data_str)
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON data for job {job_id}")
+                job_data = unpack_job(job_data_str)
+            except ValueError:
+                logger.error(f"Invalid data for job {job_id}")
                 return None
+            
+            if self._status_tracking:
+                self._status_cache.set(job_id, job_data, cache_version)
+            return dict(job_data)
         except redis.exceptions.ConnectionError as e:
             logger.error(f"Redis connection error while getting job status: {e}")
-            self.redis_client = None  # Reset client so next call will attempt to reconnect
             # Return a placeholder response
             return {
                 "job_id": job_id,
                 "status": "unknown",
                 "message": "Redis is currently unavailable - job status cannot be determined",
-                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+                "updated_at": _utc_now()[1]
             }
         except Exception as e:
             logger.error(f"Error getting job status: {e}")
             return None
     
+    def backfill_user_job_index(self) -> int:
+        """
+        Add jobs enqueued before the per-user job index existed to that index
+        
+        Runs until it completes once per Redis instance: a lock key keeps
+        processes from running it concurrently, and the marker key is written
+        only after the scan finishes, so an interrupted backfill is redone.
+        Job keys are scanned a page at a time and each page is read with a
+        single MGET.
+        
+        Returns:
+            Number of jobs added to user indexes
+        """
+        if not self.redis_client:
+            return 0
+        
+        if self.redis_client.exists(USER_INDEX_BACKFILL_MARKER):
+            return 0
+        if not self.redis_client.set(USER_INDEX_BACKFILL_LOCK, 1, nx=True, ex=USER_INDEX_BACKFILL_LOCK_TTL):
+            return 0
+        
+        try:
+            indexed = self._backfill_user_job_index()
+            self.redis_client.set(USER_INDEX_BACKFILL_MARKER, 1)
+        finally:
+            self.redis_client.delete(USER_INDEX_BACKFILL_LOCK)
+        
+        logger.info(f"Backfilled user job index with {indexed} jobs")
+        return indexed
+    
+    def _backfill_user_job_index(self) -> int:
+        """Scan all job keys and add each job to its user's index, returning the number added"""
+        indexed = 0
+        cursor = 0
+        while True:
+            cursor, keys = self.redis_client.scan(cursor, match=_JOB_KEY_PREFIX + b"*", count=100)
+            
+            if keys:
+                values = self.redis_client.mget(keys)
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, payload in zip(keys, values):
+                    if not payload:
+                        continue
+                    try:
+                        job_data = unpack_job(payload)
+                        created_at_ms = job_data.get("created_at_ms") or int(
+                            datetime.fromisoformat(job_data["created_at"]).timestamp() * 1000
+                        )
+                        pipe.zadd(_user_key(job_data["user_id"]), {job_data["job_id"]: created_at_ms}, nx=True)
+                        indexed += 1
+                    except (ValueError, KeyError) as e:
+                        logger.error(f"Error indexing job data for key {key}: {e}")
+                pipe.execute()
+            
+            if cursor == 0:
+                return indexed
+    
     def get_user_jobs(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Get a list of jobs for a user
@@ -209,6 +766,9 @@ class JobQueueService:
         Returns:
             List of job information
         """
+        if limit <= 0:
+            return []
+        
         # Try to reconnect if Redis client is not available
         if not self.redis_client:
             logger.warning("Redis client not available when getting user jobs, attempting to reconnect")
@@ -227,42 +787,111 @@ class JobQueueService:
                 return []
         
         try:
-            # Scan for job keys matching the pattern
+            # Most recently updated job IDs from the user's index, then one MGET for their data
+            user_key = _user_key(user_id)
+            job_ids = self.redis_client.zrevrange(user_key, 0, limit - 1)
+            if not job_ids:
+                return []
+            
+            values = self.redis_client.mget([_job_key(job_id) for job_id in job_ids])
+            
             jobs = []
-            cursor = 0
-            while True:
-                cursor, keys = self.redis_client.scan(cursor, match="transform_job:*", count=100)
-                
-                for key in keys:
-                    try:
-                        job_data_str = self.redis_client.get(key)
-                        if job_data_str:
-                            job_data = json.loads(job_data_str)
-                            
-                            # Check if this job belongs to the user
-                            if job_data.get("user_id") == user_id:
-                                jobs.append(job_data)
-                                
-                                # Sort by updated_at in descending order and limit
-                                if len(jobs) >= limit * 2:  # Get more than needed for sorting
-                                    break
-                    except Exception as e:
-                        logger.error(f"Error processing job data for key {key}: {e}")
-                
-                if cursor == 0 or len(jobs) >= limit * 2:
-                    break
+            expired_ids = []
+            for job_id, job_data_str in zip(job_ids, values):
+                if not job_data_str:
+                    # Job data expired - drop it from the index
+                    expired_ids.append(job_id)
+                    continue
+                try:
+                    jobs.append(unpack_job(job_data_str))
+                except ValueError:
+                    logger.error(f"Invalid data for job {job_id.decode()}")
+            
+            if expired_ids:
+                self.redis_client.zrem(user_key, *expired_ids)
             
-            # Sort by updated_at in descending order and limit
-            jobs.sort(key=lambda x: x.get("updated_at", ""), reverse=True)
-            return jobs[:limit]
+            # The index is scored by last update, so jobs are already newest first
+            return jobs
         except redis.exceptions.ConnectionError as e:
             logger.error(f"Redis connection error while getting user jobs: {e}")
-            self.redis_client = None  # Reset client so next call will attempt to reconnect
             # Return an empty list when Redis is unavailable
             return []
         except Exception as e:
             logger.error(f"Error getting user jobs: {e}")
             return []
+    
+    def bulk_get_user_jobs(self, user_ids: List[int], limit: int = 10) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Get the most recent jobs for several users in two pipelined round trips
+        
+        Args:
+            user_ids: The IDs of the users
+            limit: Maximum number of jobs to return per user
+            
+        Returns:
+            Dictionary mapping each user ID to its list of job information
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
+        if limit <= 0:
+            return {user_id: [] for user_id in user_ids}
+        
+        if not self.redis_client:
+            logger.warning("Redis client not available when getting jobs for several users, attempting to reconnect")
+            self._initialize_redis()
+        
+        if not self.redis_client:
+            logger.warning("Redis still unavailable, trying mock job queue service for bulk user jobs")
+            try:
+                from app.services.mock_job_queue_service import mock_job_queue_service
+                return mock_job_queue_service.bulk_get_user_jobs(user_ids, limit)
+            except ImportError:
+                logger.error("Could not import mock job queue service for bulk user jobs")
+                return {user_id: [] for user_id in user_ids}
+        
+        try:
+            # Round trip 1: every user's most recent job IDs
+            pipe = self.redis_client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.zrevrange(_user_key(user_id), 0, limit - 1)
+            id_lists = pipe.execute()
+            
+            # Round trip 2: one MGET per user that has any jobs
+            pipe = self.redis_client.pipeline(transaction=False)
+            fetched = []
+            for user_id, job_ids in zip(user_ids, id_lists):
+                if job_ids:
+                    pipe.mget([_job_key(job_id) for job_id in job_ids])
+                    fetched.append((user_id, job_ids))
+            values_per_user = pipe.execute() if fetched else []
+            
+            result: Dict[int, List[Dict[str, Any]]] = {user_id: [] for user_id in user_ids}
+            expired: Dict[int, List[bytes]] = {}
+            for (user_id, job_ids), values in zip(fetched, values_per_user):
+                jobs = result[user_id]
+                for job_id, job_data_str in zip(job_ids, values):
+                    if not job_data_str:
+                        expired.setdefault(user_id, []).append(job_id)
+                        continue
+                    try:
+                        jobs.append(unpack_job(job_data_str))
+                    except ValueError:
+                        logger.error(f"Invalid data for job {job_id.decode()}")
+            
+            if expired:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for user_id, job_ids in expired.items():
+                    pipe.zrem(_user_key(user_id), *job_ids)
+                pipe.execute()
+            
+            return result
+        except redis.exceptions.ConnectionError as e:
+            logger.error(f"Redis connection error while getting jobs for several users: {e}")
+            return {user_id: [] for user_id in user_ids}
+        except Exception as e:
+            logger.error(f"Error getting jobs for several users: {e}")
+            return {user_id: [] for user_id in user_ids}
 
 # Create a singleton instance
 job_queue_service = JobQueueService()
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Exact-match cache for deterministic OpenAI chat completions.
+
+At temperature 0 the same request (model, messages, temperature, response format)
+gives the same answer, so the parsed response can be stored and replayed instead
+of calling the API again (retries, chunk reprocessing, duplicate documents, test loops).
+Responses live in a pluggable backend: process memory, JSON files on disk, or Redis.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: int) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl_seconds)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class FileBackend:
+    """One JSON file per key in a directory, so responses survive restarts"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, f"{key}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read cached response {key}: {e}")
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: int) -> None:
+        path = os.path.join(self.directory, f"{key}.json")
+        try:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"expires_at": time.time() + ttl_seconds, "value": value}, f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not persist cached response {key}: {e}")
+
+
+class RedisBackend:
+    """Responses shared by every process through Redis, expiring with SET EX"""
+
+    KEY_PREFIX = "llm_cache:"
+
+    def __init__(self, get_client: Callable[[], Any]):
+        """
+        Args:
+            get_client: Returns the Redis client to use, or None while Redis is unavailable
+        """
+        self.get_client = get_client
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        client = self.get_client()
+        if client is None:
+            return None
+        try:
+            payload = client.get(self.KEY_PREFIX + key)
+            return json.loads(payload) if payload else None
+        except Exception as e:
+            logger.warning(f"Could not read cached response {key} from Redis: {e}")
+            return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: int) -> None:
+        client = self.get_client()
+        if client is None:
+            return
+        try:
+            client.set(self.KEY_PREFIX + key, json.dumps(value), ex=ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Could not store cached response {key} in Redis: {e}")
+
+
+class LLMCache:
+    """Cache of parsed chat completion responses keyed by a hash of the full request"""
+
+    def __init__(self, backend: Any, ttl_seconds: int = 3600, enabled: bool = True):
+        """Initialize the cache
+
+        Args:
+            backend: Storage with get(key) and set(key, value, ttl_seconds)
+            ttl_seconds: How long a response stays valid
+            enabled: When False, get() always misses and set() does nothing
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(model: str, messages: Any, temperature: float, response_format: Optional[Dict[str, Any]] = None) -> str:
+        """Build the cache key for a chat completion request"""
+        request = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": response_format
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response for key, or None"""
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return dict(value) if value is not None else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response under key"""
+        if self.enabled:
+            self.backend.set(key, dict(value), self.ttl_seconds)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
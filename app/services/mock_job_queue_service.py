@@ -3,10 +3,11 @@ Mock service for job queue in testing environments.
 Provides the same interface as the real job queue service but works without Redis.
 """
 
-import time
 import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -17,6 +18,7 @@ class MockJobQueueService:
     def __init__(self):
         """Initialize the mock job queue service"""
         self.jobs = {}  # In-memory storage instead of Redis
+        self.user_index: Dict[int, List[str]] = defaultdict(list)  # Job IDs per user, newest first, mirroring the Redis user_jobs index
         logger.info("Mock job queue service initialized for testing")
     
     def enqueue_transformation_job(
@@ -31,6 +33,9 @@ class MockJobQueueService:
         """
         # Generate a unique job ID
         job_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        now_ms = int(now.timestamp() * 1000)
+        now_str = now.isoformat(timespec="seconds")
         
         # Create job data
         job_data = {
@@ -40,12 +45,15 @@ class MockJobQueueService:
             "template_input_id": template_input_id,
             "template_output_id": template_output_id,
             "status": "queued",
-            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+            "created_at": now_str,
+            "updated_at": now_str,
+            "created_at_ms": now_ms,
+            "updated_at_ms": now_ms
         }
         
         # Store job data in memory
         self.jobs[job_id] = job_data
+        self.user_index[user_id].insert(0, job_id)
         
         logger.info(f"[MOCK] Enqueued transformation job {job_id} for document {document_id}")
         
@@ -54,6 +62,15 @@ class MockJobQueueService:
         
         return job_data
     
+    def enqueue_transformation_jobs(
+        self,
+        jobs: List[Tuple[int, int, int, int]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Enqueue several document transformation jobs (mock version)
+        """
+        return [self.enqueue_transformation_job(*job) for job in jobs]
+    
     def _process_job_synchronously(self, job_data: Dict[str, Any]) -> None:
         """
         Process the job synchronously for testing purposes
@@ -62,8 +79,11 @@ class MockJobQueueService:
         job_id = job_data["job_id"]
         document_id = job_data["document_id"]
         
+        now = datetime.now(timezone.utc)
+        now_str = now.isoformat(timespec="seconds")
         job_data["status"] = "completed"
-        job_data["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        job_data["updated_at"] = now_str
+        job_data["updated_at_ms"] = int(now.timestamp() * 1000)
         job_data["result"] = {
             "status": "success",
             "document_id": document_id,
@@ -74,7 +94,7 @@ class MockJobQueueService:
             "template_output_title": "Test Output Template",
             "transformed_content": "Mock transformed content for testing",
             "download_path": f"/documents/downloads/transformed_{document_id}.csv",
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "timestamp": now_str,
             "formats": {
                 "document": ".pdf",
                 "template_input": ".pdf",
@@ -87,6 +107,12 @@ class MockJobQueueService:
         
         logger.info(f"[MOCK] Job {job_id} processed synchronously for testing")
     
+    def get_queue_lengths(self) -> Dict[str, Optional[int]]:
+        """
+        Get the number of jobs waiting in each queue (mock version - jobs run immediately)
+        """
+        return {"transform_jobs": 0, "extraction_jobs": 0}
+    
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the status of a job (mock version)
@@ -97,9 +123,16 @@ class MockJobQueueService:
         """
         Get a list of jobs for a user (mock version)
         """
-        user_jobs = [job for job in self.jobs.values() if job.get("user_id") == user_id]
-        user_jobs.sort(key=lambda x: x.get("updated_at", ""), reverse=True)
-        return user_jobs[:limit]
+        if limit <= 0:
+            return []
+        # Mock jobs complete as they are enqueued, so insertion order is already update order
+        return [self.jobs[job_id] for job_id in self.user_index.get(user_id, [])[:limit]]
+    
+    def bulk_get_user_jobs(self, user_ids: List[int], limit: int = 10) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Get the most recent jobs for several users (mock version)
+        """
+        return {user_id: self.get_user_jobs(user_id, limit) for user_id in user_ids}
 
 # Create a mock singleton instance for testing
 mock_job_queue_service = MockJobQueueService()
\ No newline at end of file
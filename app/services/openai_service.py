@@ -6,16 +6,70 @@ with template-based document transformation.
 """
 
 import os
+import asyncio
+import functools
+import gzip
+import importlib.util
 import logging
+import math
+import re
+import io
 import json
+import random
+import statistics
+import threading
 import requests
-from typing import Dict, Any, Optional, List
+from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Coroutine, Sequence, Tuple
 import time
 from dotenv import load_dotenv
 
+from app.services.llm_cache import FileBackend, LLMCache, MemoryBackend, RedisBackend
+from app.services.semantic_cache import BatchingEmbedder, CachedEmbedder, LocalEmbedder, SemanticCache
+from app.services.template_cache import TemplateCache
+from app.utils.performance_logger import openai_perf_logger
+
 # Set up logging first so we can use it
 logger = logging.getLogger(__name__)
 
+# The async OpenAI SDK lets chunked documents fan out concurrently; without it chunks run one by one
+try:
+    from openai import AsyncOpenAI, OpenAI, APIStatusError, APIConnectionError
+    OPENAI_SDK_AVAILABLE = True
+except ImportError:
+    OPENAI_SDK_AVAILABLE = False
+    logger.warning("openai package not available, document chunks will be processed sequentially")
+
+# Token-accurate prompt budgeting; without tiktoken lengths are estimated from character counts
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    logger.warning("tiktoken not available, prompt sizes will be estimated from character counts")
+
+# orjson (de)serializes API payloads several times faster than the json module; its errors subclass json's
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+    ORJSON_AVAILABLE = True
+except ImportError:
+    _json_loads = json.loads
+    ORJSON_AVAILABLE = False
+    
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=64)
+def _system_message_json(system_prompt: str) -> bytes:
+    """Serialized system message; system prompts repeat across many requests, so each is encoded once"""
+    return _json_dumps({"role": "system", "content": system_prompt})
+
 # Conditionally load environment variables only if OPENAI_API_KEY is not set
 if not os.getenv("OPENAI_API_KEY"):
     try:
@@ -24,14 +78,407 @@ if not os.getenv("OPENAI_API_KEY"):
     except Exception as e:
         logger.warning(f"Could not load .env file, using environment variables only: {e}")
 
+# Service configuration, read once at import rather than on every instantiation
+OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o")  # Default to GPT-4o which has larger context
+OPENAI_TEMPERATURE = float(os.environ.get("OPENAI_TEMPERATURE", "0.3"))
+OPENAI_USE_BATCH_API = os.environ.get("OPENAI_USE_BATCH_API", "false").lower() == "true"
+
+
+# Document type specific instructions, built once at import; read-only because the
+# prompts built from them are memoized
+_TYPE_INSTRUCTIONS = MappingProxyType({
+    "legal": (
+        "As you're working with a legal document, pay special attention to:\n"
+        "- Legal terminology and phrasing\n"
+        "- Citation formats and references to statutes, cases, or regulations\n"
+        "- Formal document structure including sections, clauses and numbered paragraphs\n"
+        "- Dates, parties, and defined terms which should be preserved exactly\n"
+        "- Any disclaimers or warnings that should be maintained\n\n"
+    ),
+    "real_estate": (
+        "As you're working with a real estate document, pay special attention to:\n"
+        "- Property descriptions and addresses\n"
+        "- Financial figures, prices, and payment terms\n"
+        "- Dates of transactions, inspections, and closings\n"
+        "- Party names and their roles (buyer, seller, agent, etc.)\n"
+        "- Any contingencies or conditions mentioned\n\n"
+    ),
+    "contract": (
+        "As you're working with a contract, pay special attention to:\n"
+        "- Parties to the agreement and their obligations\n"
+        "- Terms and conditions, especially regarding payment and deliverables\n"
+        "- Timeframes, deadlines, and effective dates\n"
+        "- Warranties, representations, and indemnities\n"
+        "- Termination clauses and dispute resolution procedures\n\n"
+    ),
+    "lease": (
+        "As you're working with a lease agreement, pay special attention to:\n"
+        "- Tenant and landlord information\n"
+        "- Property details and condition statements\n"
+        "- Lease terms, rent amounts, and payment schedules\n"
+        "- Security deposits and fees\n"
+        "- Maintenance responsibilities and terms for entry\n\n"
+    ),
+    "repo": (
+        '''
+                    You are turning a deposition transcript (PDF text or plaintext) into a UTF-8 CSV with exactly four columns in this order: (blank), From (Pg/Line), To (Pg/Line), Summary
+
+                    ────────────────────────────────────────────────────────
+                    │                │ From (Pg/Line) │ To (Pg/Line) │ Summary │  ← header row
+                    ────────────────────────────────────────────────────────
+
+                    STEP 1 – Fixed Metadata Rows
+
+                    • Row 2, Column 1 = <Witness Name>      (all other columns must be blank)
+                    • Row 3, Column 1 = <Depo Date>         (e.g., 28-Aug-23)
+                    • Row 4, Column 1 = <Depo Type>         (e.g., “Video Depo”)
+                      ↳ Extract these three values from the transcript header. Leave blank if missing.
+
+                    *Example*  
+                    Header shows: “REMOTE VIDEO CONFERENCE DEPOSITION OF KRISTINA WARD ENGEL – Monday, August 28, 2023”  
+                    → Row 2 = Kristina Ward Engel  
+                    → Row 3 = 28-Aug-23  
+                    → Row 4 = Video Depo  
+
+                    STEP 2 – Fact Blocks
+
+                    Starting from Row 5, each row captures a coherent fact block (a continuous section discussing a single idea).
+
+                    • Column 1: Leave blank  
+                    • Column 2: First Pg/Line (e.g., 6/9)  
+                    • Column 3: Last Pg/Line (e.g., 7/2)  
+                    • Column 4: Summary  
+                      - Must be in plain English  
+                      - Present tense only
+                      - **The entire summary must go in this one cell (Column 4 only)**  
+                      - **Do NOT split summary across multiple rows or columns**  
+                      - **Do NOT include line breaks**  
+                      - **Do NOT include ANY commas — not even in addresses, lists, or numbers**  
+                        → Replace commas with semicolons or rephrase the sentence
+
+                    ✅ Correct:
+                    ,11/22,12/5,The board has always required buyer approval; she saw roughly four applications while she was a director
+
+                    ✅ Also Correct (no commas in address):
+                    ,6/9,7/2,She lives in Unit 302 of the Inlet Building and also resides part of the year in Lake Forest Illinois
+
+                    ❌ Incorrect (uses commas or spans multiple lines):
+                    ,11/22,12/5,The board has always required buyer approval;  
+                    ,she saw roughly four applications while she was a director
+
+                    ❌ Incorrect (commas in address):
+                    ,6/9,7/2,She lives in Unit 302, Inlet Building, and also resides in Lake Forest, IL
+
+                    STEP 3 – Ordering & Formatting Rules
+
+                    • Preserve original appearance order  
+                    • Do NOT add or delete columns  
+                    • Do NOT use quotes or extra commas  
+                    • Do NOT include explanations or formatting notes in output  
+
+                    STEP 4 – Important for Large Documents
+
+                    • Process the ENTIRE transcript without skipping content  
+                    • Do NOT add any truncation markers or headers  
+                    • The output must be a clean, complete CSV file — no extra notes
+
+                '''
+    ),
+    "other": (
+        "Pay special attention to:\n"
+        "- The document's main purpose and key points\n"
+        "- Any structured data, tables, or lists\n"
+        "- Important dates, names, and numerical values\n"
+        "- The logical flow and organization of information\n\n"
+    )
+})
+
+
+def _run_sync(coro: Coroutine) -> Any:
+    """Run a coroutine to completion from synchronous code
+    
+    Uses asyncio.run() when the calling thread has no event loop running, otherwise
+    runs it on a helper thread so the caller's loop is never re-entered.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+# Batch API polling for chunked documents submitted with use_batch_api
+BATCH_POLL_INTERVAL = 10  # seconds, doubled after every poll
+BATCH_POLL_MAX_INTERVAL = 300  # seconds
+BATCH_MAX_WAIT = int(os.environ.get("OPENAI_BATCH_MAX_WAIT", str(24 * 60 * 60)))  # seconds
+
+# Opt-in reuse of results for near-identical (document, templates, type) requests
+SEMANTIC_CACHE_ENABLED = os.environ.get("OPENAI_SEMANTIC_CACHE", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("OPENAI_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_DIR = os.environ.get(
+    "OPENAI_SEMANTIC_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rapidoc", "semantic_cache")
+)
+EMBEDDING_MODEL = os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+# "openai" embeds cache keys through the embeddings endpoint; "local" uses a sentence-transformers
+# model on this machine instead (requires the optional sentence-transformers package)
+EMBEDDING_BACKEND = os.environ.get("OPENAI_EMBEDDING_BACKEND", "openai").lower()
+LOCAL_EMBEDDING_MODEL = os.environ.get("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_CACHE_DIR = os.environ.get(
+    "OPENAI_EMBEDDING_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rapidoc", "openai_embeddings")
+)
+
+# Concurrent chunk requests are capped, all requests are paced by token buckets shared by every
+# process through Redis (requests and, if set, prompt tokens per minute) and retried with exponential backoff and full
+# jitter on rate limits and connection errors
+CHUNK_MAX_CONCURRENCY = int(os.environ.get("OPENAI_CHUNK_CONCURRENCY", "5"))
+OPENAI_RPM_LIMIT = int(os.environ.get("OPENAI_RPM_LIMIT", "60"))
+OPENAI_TPM_LIMIT = int(os.environ.get("OPENAI_TPM_LIMIT", "0"))  # 0 disables token pacing
+RETRY_MAX_TIME = 60  # seconds
+RETRY_MAX_TRIES = 6
+RETRY_BASE_DELAY = 1.0  # seconds
+RETRY_MAX_DELAY = 20.0  # seconds
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})  # Retried by both request paths
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+    """Seconds to wait before retry number `attempt`: full jitter, but never sooner than the server asked for"""
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+class _TokenBucket:
+    """Thread-safe token bucket; callers reserve a token and wait out any deficit"""
+    
+    def __init__(self, rate_per_minute: int, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, amount: float = 1) -> float:
+        """Take amount tokens, returning how many seconds the caller must wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+    
+    async def acquire(self, amount: float = 1) -> None:
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def wait(self, amount: float = 1) -> None:
+        """Blocking counterpart of acquire() for synchronous callers"""
+        delay = self.reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Refill a shared token bucket and take tokens from it, going into deficit like _TokenBucket.
+# Uses the server clock so all processes agree on elapsed time; the wait is returned as a
+# string because Lua numbers are truncated to integers on the way back
+# KEYS: bucket hash; ARGV: rate per second, capacity, amount, ttl seconds
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate) - tonumber(ARGV[3])
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+class _SharedTokenBucket(_TokenBucket):
+    """Token bucket kept in Redis, so the limit holds across all web and worker processes
+    
+    Falls back to this process' own bucket while Redis is unreachable.
+    """
+    
+    def __init__(self, key: str, rate_per_minute: int, burst: int):
+        super().__init__(rate_per_minute, burst)
+        self.key = key
+        # Long enough for a drained bucket to refill, after which the key is not needed
+        self.ttl = max(int(burst / self.rate) + 60, 60)
+    
+    def reserve(self, amount: float = 1) -> float:
+        try:
+            # Imported lazily: the job queue connects to Redis on import
+            from app.services.job_queue_service import job_queue_service, _evalsha
+            client = job_queue_service.redis_client
+            if client is not None:
+                return float(_evalsha(
+                    client, TOKEN_BUCKET_SCRIPT, 1, self.key, self.rate, self.capacity, amount, self.ttl
+                ))
+        except Exception as e:
+            logger.warning(f"Shared rate limit unavailable, pacing this process only: {e}")
+        return super().reserve(amount)
+    
+    async def acquire(self, amount: float = 1) -> None:
+        # The Redis round trip is blocking, so keep it off the event loop
+        delay = await asyncio.to_thread(self.reserve, amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_request_bucket = _SharedTokenBucket("openai:bucket:requests", OPENAI_RPM_LIMIT, CHUNK_MAX_CONCURRENCY)
+_token_bucket = (
+    _SharedTokenBucket("openai:bucket:tokens", OPENAI_TPM_LIMIT, OPENAI_TPM_LIMIT) if OPENAI_TPM_LIMIT > 0 else None
+)
+
+# After this many consecutive failed requests (retries exhausted, 5xx, unreachable API) calls fail
+# immediately until the reset timeout has passed and a trial request gets through
+CIRCUIT_FAIL_MAX = int(os.environ.get("OPENAI_CIRCUIT_FAIL_MAX", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get("OPENAI_CIRCUIT_RESET_TIMEOUT", "60"))  # seconds
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit breaker is open"""
+
+
+class _CircuitBreaker:
+    """Thread-safe circuit breaker shared by the synchronous and async request paths"""
+    
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            now = time.monotonic()
+            trial_running = self.trial_started is not None and now - self.trial_started < self.reset_timeout
+            if now - self.opened_at < self.reset_timeout or trial_running:
+                raise CircuitOpenError(
+                    f"OpenAI API unavailable after {self.failures} consecutive failures, not retrying yet"
+                )
+            # Half-open: let this one request through to probe the API
+            self.trial_started = now
+    
+    def record_success(self) -> None:
+        """Record that the API answered, closing the circuit"""
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("OpenAI API reachable again, closing circuit breaker")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_started = None
+    
+    def record_failure(self, error: BaseException) -> None:
+        """Record a failed request, opening the circuit once fail_max is reached"""
+        with self._lock:
+            self.failures += 1
+            self.trial_started = None
+            if self.opened_at is None and self.failures < self.fail_max:
+                return
+            if self.opened_at is None:
+                logger.error(f"Opening circuit breaker after {self.failures} consecutive OpenAI failures: {error}")
+                openai_perf_logger.log_operation_failed("circuit_open", error, details={"failures": self.failures})
+            self.opened_at = time.monotonic()
+
+
+_circuit_breaker = _CircuitBreaker(CIRCUIT_FAIL_MAX, CIRCUIT_RESET_TIMEOUT)
+
+# Synchronous requests time out at 3x the recent p99 latency (clamped to the range below), so a
+# hung connection is abandoned and retried instead of holding a worker for the full 5 minutes
+REQUEST_TIMEOUT_MIN = 30  # seconds
+REQUEST_TIMEOUT_MAX = 300  # seconds, also used until enough latencies are recorded
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+# Stream synchronous completions as server-sent events. Tokens arrive continuously, so the (adaptive)
+# read timeout bounds the gap between events rather than the whole generation
+STREAM_RESPONSES = os.environ.get("OPENAI_STREAM_RESPONSES", "true").lower() == "true"
+
+# Gzip synchronous request bodies above this size (document text compresses 3-10x); responses are
+# already gzip-encoded on request by requests' default Accept-Encoding. Opt-in, since the endpoint
+# must accept Content-Encoding: gzip
+REQUEST_COMPRESSION = os.environ.get("OPENAI_COMPRESS_REQUESTS", "false").lower() == "true"
+REQUEST_COMPRESSION_MIN_BYTES = 1024
+REQUEST_COMPRESSION_LEVEL = 5
+
+# Keep-alive HTTPS connections to api.openai.com shared by all synchronous calls
+HTTP_POOL_SIZE = int(os.environ.get("OPENAI_HTTP_POOL_SIZE", "32"))
+HTTP_PREWARM = os.environ.get("OPENAI_PREWARM_CONNECTION", "true").lower() == "true"
+
+# Prompt budget (GPT-4o): the context window minus room for the completion and a safety margin
+MAX_CONTEXT_TOKENS = int(os.environ.get("OPENAI_MAX_CONTEXT_TOKENS", "128000"))
+MAX_OUTPUT_TOKENS = 16384
+CONTEXT_SAFETY_MARGIN = 1000
+CHARS_PER_TOKEN = 4  # Estimate used when tiktoken is unavailable, and for rate pacing
+TRUNCATION_MARKER = "\n...[content truncated]"
+
+# Page breaks in deposition transcripts: a line holding only a page number or "Page N"
+PAGE_BREAK_PATTERN = re.compile(r"\n(?=[ \t]*(?:Page[ \t]+)?\d+[ \t]*\n)")
+
+# Exact-match replay of deterministic (temperature 0) completions. The backend is "memory"
+# (per process), "file" (kept across restarts) or "redis" (shared with the workers)
+RESPONSE_CACHE_BACKEND = os.environ.get("OPENAI_RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_DIR = os.environ.get("OPENAI_RESPONSE_CACHE_DIR") or "/tmp/rapidoc_llm_cache"
+RESPONSE_CACHE_TTL = int(os.environ.get("OPENAI_RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_FORMAT = {"type": "json_object"}
+
+# Reuse responses for prompts that differ from an answered one only in numbers, dates and IDs.
+# Opt-in: suited to corpora of a few recurring document shapes (invoices, forms)
+TEMPLATE_CACHE_ENABLED = os.environ.get("OPENAI_TEMPLATE_CACHE", "false").lower() == "true"
+TEMPLATE_CACHE_PATH = os.environ.get("OPENAI_TEMPLATE_CACHE_PATH") or None
+
+
+def _create_response_cache_backend(name: str):
+    """Build the response cache backend named by OPENAI_RESPONSE_CACHE_BACKEND"""
+    if name == "file":
+        return FileBackend(RESPONSE_CACHE_DIR)
+    if name == "redis":
+        def get_client():
+            # Imported lazily: the job queue connects to Redis on import
+            try:
+                from app.services.job_queue_service import job_queue_service
+            except ImportError:
+                return None
+            return job_queue_service.redis_client
+        return RedisBackend(get_client)
+    if name != "memory":
+        logger.warning(f"Unknown response cache backend '{name}', using memory")
+    return MemoryBackend(RESPONSE_CACHE_SIZE)
+
+
 class OpenAIService:
     """Service for OpenAI API interactions"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Keys every parsed response must carry
+    _REQUIRED_FIELDS = frozenset({"file_type", "content"})
+    
+    def __init__(self, api_key: Optional[str] = None, use_batch_api: Optional[bool] = None):
         """Initialize the OpenAI service
         
         Args:
             api_key: The OpenAI API key. If not provided, will try to get from environment variable
+            use_batch_api: Submit chunked documents through the Batch API (half the cost, but results
+                can take up to 24 hours). Defaults to the OPENAI_USE_BATCH_API environment variable
         """
         # Get API key from parameter, environment variable, or .env file (loaded by load_dotenv())
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
@@ -39,16 +486,115 @@ class OpenAIService:
             logger.warning("OpenAI API key not found. Service will not work without a valid key.")
         
         # API configuration
-        self.api_url = "https://api.openai.com/v1/chat/completions"
+        self.api_url = OPENAI_API_URL
         
-        # Get model and other parameters from environment variables or use defaults
-        self.model = os.environ.get("OPENAI_MODEL", "gpt-4o")  # Default to GPT-4o which has larger context
-        self.temperature = float(os.environ.get("OPENAI_TEMPERATURE", "0.3"))
+        # Model and other parameters come from environment variables or defaults
+        self.model = OPENAI_MODEL
+        self.temperature = OPENAI_TEMPERATURE
+        self._encoding = self._load_encoding(self.model)
+        if use_batch_api is None:
+            use_batch_api = OPENAI_USE_BATCH_API
+        self.use_batch_api = use_batch_api and OPENAI_SDK_AVAILABLE
+        self.embeddings_url = "https://api.openai.com/v1/embeddings"
+        
+        # Reuse TLS connections instead of paying a handshake per request
+        self._session = requests.Session()
+        self._session.mount(
+            "https://", HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+        )
+        self._latencies: "deque[float]" = deque(maxlen=LATENCY_WINDOW)
+        self._session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        })
+        # Everything in a chat request body except the messages is fixed per instance
+        self._body_base = {"model": self.model, "temperature": self.temperature, "response_format": RESPONSE_FORMAT}
+        self._request_body_head = (
+            _json_dumps({**self._body_base, "stream": True} if STREAM_RESPONSES else self._body_base)[:-1]
+            + b',"messages":['
+        )
+        if HTTP_PREWARM and self.api_key:
+            threading.Thread(target=self._prewarm_connection, name="openai-prewarm", daemon=True).start()
+        self.semantic_cache = (
+            SemanticCache(self._create_embedder(), threshold=SEMANTIC_CACHE_THRESHOLD, path=SEMANTIC_CACHE_DIR)
+            if SEMANTIC_CACHE_ENABLED else None
+        )
+        # Only temperature 0 is deterministic enough to replay responses
+        self.response_cache = LLMCache(
+            _create_response_cache_backend(RESPONSE_CACHE_BACKEND),
+            ttl_seconds=RESPONSE_CACHE_TTL,
+            enabled=self.temperature == 0
+        )
+        self.template_cache = TemplateCache(path=TEMPLATE_CACHE_PATH) if TEMPLATE_CACHE_ENABLED else None
         
         logger.info(f"OpenAI Service initialized with model: {self.model}, temperature: {self.temperature}")
         # Don't log API key for security reasons
     
     def transform_document(
+        self,
+        document_content: str,
+        template_input_content: str,
+        template_output_content: str,
+        document_format: str,
+        template_input_format: str,
+        template_output_format: str,
+        document_title: str = "",
+        template_input_title: str = "",
+        template_output_title: str = "",
+        document_type: str = "other",
+        user_id: Optional[int] = None
+    ) -> str:
+        """Transform a document using input/output template examples with OpenAI,
+        reusing the result of a near-identical earlier request when the semantic cache is enabled
+        
+        Args:
+            document_content: The content of the document to transform
+            template_input_content: The content of the input template
+            template_output_content: The content of the output template
+            document_format: File extension of the document
+            template_input_format: File extension of the input template
+            template_output_format: File extension of the output template
+            document_title: Title of the document to transform
+            template_input_title: Title of the input template
+            template_output_title: Title of the output template
+            document_type: Type of the document
+            user_id: ID of the user the transformation is for; cached results are only shared
+                between requests of the same user, and without it the semantic cache is skipped
+            
+        Returns:
+            str: The transformed document content
+        """
+        if not self.api_key:
+            raise ValueError("OpenAI API key not provided. Cannot perform transformation.")
+        
+        transform_args = (
+            document_content, template_input_content, template_output_content,
+            document_format, template_input_format, template_output_format,
+            document_title, template_input_title, template_output_title, document_type
+        )
+        if (self.semantic_cache is None or user_id is None
+                or not SemanticCache.key_covers(document_content, template_input_content, template_output_content)):
+            return self._transform_document(*transform_args)
+        
+        signature = "|".join((f"user={user_id}", self.model, str(self.temperature), document_format,
+                              template_input_format, template_output_format, document_type))
+        cached, vector = self.semantic_cache.lookup(
+            signature,
+            SemanticCache.key_text(document_content, template_input_content, template_output_content)
+        )
+        openai_perf_logger.record_cache_lookup("semantic", cached is not None, {"document_type": document_type})
+        if cached is not None:
+            return cached
+        
+        result = self._transform_document(*transform_args)
+        
+        # Only cache clean results
+        if (vector is not None and isinstance(result, dict) and "parse_error" not in result
+                and not result.get("chunking_info", {}).get("chunks_with_errors")):
+            self.semantic_cache.add(signature, vector, result)
+        return result
+    
+    def _transform_document(
         self,
         document_content: str,
         template_input_content: str,
@@ -81,38 +627,55 @@ class OpenAIService:
             raise ValueError("OpenAI API key not provided. Cannot perform transformation.")
         
         # Content chunking strategy to handle large documents
-        # GPT-4o has about 128K token capacity
+        # GPT-4o has about 128K token capacity, budgeted in tokens rather than characters
         
         # For repo document type (depositions), use a higher limit since we need the full text
         if document_type == "repo":
-            max_document_chars = 100000  # Increased limit for deposition documents
-            max_template_chars = 5000    # Reduced template chars to compensate
+            max_document_tokens = 25000  # Increased limit for deposition documents
+            max_template_tokens = 1250   # Reduced template budget to compensate
         else:
-            max_document_chars = 50000   # Default limit for other document types
-            max_template_chars = 10000   # Default template limit
+            max_document_tokens = 12500  # Default limit for other document types
+            max_template_tokens = 2500   # Default template limit
         
         # Check document and template lengths
         original_doc_length = len(document_content)
         original_input_template_length = len(template_input_content)
         original_output_template_length = len(template_output_content)
         
-        # Truncate templates if needed
-        if len(template_input_content) > max_template_chars:
-            template_input_content = template_input_content[:max_template_chars] + "\n...[content truncated]"
-            logger.warning(f"Input template truncated from {original_input_template_length} to {max_template_chars} characters")
+        # Truncate templates if needed. The halved variants for a context-length retry come from
+        # the same encoding pass, so the retry doesn't tokenize anything again
+        template_input_content, template_input_content_retry = self._truncated_variants(
+            template_input_content, (max_template_tokens, max_template_tokens // 2)
+        )
+        if len(template_input_content) != original_input_template_length:
+            logger.warning(f"Input template truncated from {original_input_template_length} characters to {max_template_tokens} tokens")
         
-        if len(template_output_content) > max_template_chars:
-            template_output_content = template_output_content[:max_template_chars] + "\n...[content truncated]"
-            logger.warning(f"Output template truncated from {original_output_template_length} to {max_template_chars} characters")
+        template_output_content, template_output_content_retry = self._truncated_variants(
+            template_output_content, (max_template_tokens, max_template_tokens // 2)
+        )
+        if len(template_output_content) != original_output_template_length:
+            logger.warning(f"Output template truncated from {original_output_template_length} characters to {max_template_tokens} tokens")
         
         # Create the system prompt with document type
         system_prompt = self._create_system_prompt(
             document_format, template_input_format, template_output_format, document_type
         )
         
-        # Check if document needs chunking (larger than max_document_chars)
-        if len(document_content) > max_document_chars:
-            logger.info(f"Document size ({original_doc_length} chars) exceeds limit ({max_document_chars} chars). Using document chunking.")
+        # Whatever the system prompt, templates and completion leave of the context window caps the document
+        prompt_budget = (
+            MAX_CONTEXT_TOKENS - MAX_OUTPUT_TOKENS - CONTEXT_SAFETY_MARGIN
+            - self._count_tokens(system_prompt)
+            - self._count_tokens(template_input_content)
+            - self._count_tokens(template_output_content)
+        )
+        max_document_tokens = min(max_document_tokens, prompt_budget)
+        # Encode the document once; chunking and the retry truncation reuse the result
+        document_ids = self._encode(document_content)
+        document_tokens = len(document_ids) if document_ids is not None else self._count_tokens(document_content)
+        
+        # Check if document needs chunking (larger than max_document_tokens)
+        if document_tokens > max_document_tokens:
+            logger.info(f"Document size ({document_tokens} tokens) exceeds limit ({max_document_tokens} tokens). Using document chunking.")
             return self._process_document_in_chunks(
                 document_content=document_content,
                 template_input_content=template_input_content,
@@ -125,7 +688,8 @@ class OpenAIService:
                 template_output_title=template_output_title,
                 document_type=document_type,
                 system_prompt=system_prompt,
-                max_document_chars=max_document_chars
+                max_document_tokens=max_document_tokens,
+                document_tokens=document_tokens
             )
         
         # If document is small enough, process it normally without chunking
@@ -159,13 +723,10 @@ class OpenAIService:
                 try:
                     logger.warning("Context length exceeded, retrying with more aggressive truncation")
                     
-                    # More aggressive truncation
-                    further_max_document_chars = max_document_chars // 2
-                    further_max_template_chars = max_template_chars // 2
-                    
-                    document_content_retry = document_content[:further_max_document_chars] + "\n...[content truncated]"
-                    template_input_content_retry = template_input_content[:further_max_template_chars] + "\n...[content truncated]"
-                    template_output_content_retry = template_output_content[:further_max_template_chars] + "\n...[content truncated]"
+                    # More aggressive truncation (templates were already cut to half budget up front)
+                    document_content_retry = self._truncated_variants(
+                        document_content, (max_document_tokens // 2,), document_ids
+                    )[0]
                     
                     # Create new prompt with truncated content
                     user_prompt_retry = self._create_user_prompt(
@@ -237,9 +798,10 @@ class OpenAIService:
         template_output_title: str,
         document_type: str,
         system_prompt: str,
-        max_document_chars: int
+        max_document_tokens: int,
+        document_tokens: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Process a document by splitting it into 5 equal chunks and concatenating results
+        """Process a document by splitting it into as many equal chunks as its size requires and concatenating results
         
         Args:
             document_content: The full document content
@@ -253,82 +815,315 @@ class OpenAIService:
             template_output_title: The output template title
             document_type: The document type
             system_prompt: The system prompt
-            max_document_chars: Maximum characters for each chunk
+            max_document_tokens: Maximum tokens for each chunk
+            document_tokens: Token count of document_content, if already known
             
         Returns:
             Dict[str, Any]: The combined transformation result
         """
-        logger.info(f"Processing document in 5 chunks")
-        
-        # Split document into 5 equal chunks
         doc_length = len(document_content)
-        chunk_size = doc_length // 5
-        
-        # Create 5 chunks
-        chunks = []
-        for i in range(5):
-            start = i * chunk_size
-            # For the last chunk, include any remaining characters
-            end = (i + 1) * chunk_size if i < 4 else doc_length
-            chunk = document_content[start:end]
-            chunks.append(chunk)
+        chunks = self._split_into_chunks(document_content, max_document_tokens, document_type, document_tokens)
+        num_chunks = len(chunks)
+        logger.info(f"Processing document in {num_chunks} chunks")
+        for i, chunk in enumerate(chunks):
             logger.info(f"Chunk {i+1}: {len(chunk)} characters")
         
-        # Create specific system prompt for chunked processing
-        chunk_system_prompt = system_prompt + "\n\nIMPORTANT: You are processing part of a document that has been split into chunks. Focus only on transforming this chunk according to the template formats."
+        # The system prompt stays byte-identical to the unchunked one and the chunking notice goes
+        # at the tail of the user prompt, so every chunk shares the same cacheable prompt prefix
+        chunk_system_prompt = system_prompt
+        chunk_notice = (
+            "IMPORTANT: You are processing part of a document that has been split into chunks. "
+            "Focus only on transforming this chunk according to the template formats."
+        )
         
-        # Process each chunk
-        chunk_results = []
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Processing chunk {i+1}/5")
-            
-            # Create user prompt for this chunk
-            chunk_user_prompt = self._create_user_prompt(
+        # Create user prompts for every chunk, building the shared template block once
+        template_block = self._create_template_block(
+            template_input_content, template_output_content, template_input_title, template_output_title
+        )
+        chunk_user_prompts = [
+            self._create_user_prompt(
                 chunk, template_input_content, template_output_content,
-                f"{document_title} (Part {i+1}/5)", template_input_title, template_output_title
+                f"{document_title} (Part {i+1}/{num_chunks})", template_input_title, template_output_title,
+                trailing_instructions=chunk_notice, template_block=template_block
             )
-            
-            # Process the chunk
-            try:
-                start_time = time.time()
-                result = self._call_openai_api(chunk_system_prompt, chunk_user_prompt)
-                duration = time.time() - start_time
-                logger.info(f"Chunk {i+1}/5 processed in {duration:.2f} seconds")
-                chunk_results.append(result)
-            except Exception as e:
-                logger.error(f"Error processing chunk {i+1}/5: {e}")
-                # Add error placeholder for this chunk
-                chunk_results.append({
-                    "file_type": template_output_format.lstrip("."),
-                    "content": f"[Error processing part {i+1}/5: {str(e)}]",
-                    "error": str(e)
-                })
+            for i, chunk in enumerate(chunks)
+        ]
+        
+        # Process the chunks - concurrently when the async SDK is available, since each call is I/O bound
+        if self.use_batch_api:
+            chunk_results, chunks_with_errors = self._process_chunks_batch(
+                chunk_system_prompt, chunk_user_prompts, template_output_format
+            )
+        elif OPENAI_SDK_AVAILABLE:
+            chunk_results, chunks_with_errors = _run_sync(
+                self._process_chunks_concurrently(chunk_system_prompt, chunk_user_prompts, template_output_format)
+            )
+        else:
+            chunk_results = [None] * num_chunks
+            chunks_with_errors = 0
+            for i, chunk_user_prompt in enumerate(chunk_user_prompts):
+                logger.info(f"Processing chunk {i+1}/{num_chunks}")
+                try:
+                    start_time = time.time()
+                    chunk_results[i] = self._call_openai_api(chunk_system_prompt, chunk_user_prompt)
+                    duration = time.time() - start_time
+                    logger.info(f"Chunk {i+1}/{num_chunks} processed in {duration:.2f} seconds")
+                except Exception as e:
+                    logger.error(f"Error processing chunk {i+1}/{num_chunks}: {e}")
+                    chunk_results[i] = self._chunk_error_result(i, num_chunks, template_output_format, e)
+                    chunks_with_errors += 1
         
         # Combine results
-        combined_result = self._combine_chunk_results(chunk_results, document_type, template_output_format)
+        combined_result = self._combine_chunk_results(chunk_results, template_output_format)
         
         # Add metadata about chunking
         combined_result["chunking_info"] = {
             "original_document_length": doc_length,
-            "chunks": 5,
+            "chunks": num_chunks,
             "chunk_sizes": [len(chunk) for chunk in chunks],
             "chunks_processed": len(chunk_results),
-            "chunks_with_errors": sum(1 for r in chunk_results if "error" in r)
+            "chunks_with_errors": chunks_with_errors
         }
         
         return combined_result
     
+    def _split_into_chunks(
+        self, document_content: str, max_tokens: int, document_type: str = "other", document_tokens: Optional[int] = None
+    ) -> List[str]:
+        """Split a document into chunks of at most about max_tokens tokens each, cutting at natural boundaries
+        
+        The number of chunks comes from the document's token count. Each cut is moved back to the
+        nearest paragraph break (page break first for depositions), or line break, so no chunk
+        ends mid-record.
+        
+        Args:
+            document_content: The full document content
+            max_tokens: Token budget of a single chunk
+            document_type: The document type
+            document_tokens: Token count of document_content, if already known
+            
+        Returns:
+            List[str]: The chunks, in document order
+        """
+        doc_length = len(document_content)
+        if document_tokens is None:
+            document_tokens = self._count_tokens(document_content)
+        num_chunks = max(1, math.ceil(document_tokens / max_tokens))
+        
+        chunks = []
+        start = 0
+        for remaining_chunks in range(num_chunks, 1, -1):
+            # Spread what is left evenly so earlier cuts moving back don't pile up in the last chunk
+            chunk_chars = math.ceil((doc_length - start) / remaining_chunks)
+            target = start + chunk_chars
+            # Don't shrink a chunk below half its target size looking for a boundary
+            floor = start + chunk_chars // 2
+            end = -1
+            if document_type == "repo":
+                for match in PAGE_BREAK_PATTERN.finditer(document_content, floor, target):
+                    end = match.start() + 1
+            if end == -1:
+                end = document_content.rfind("\n\n", floor, target)
+                end = end + 2 if end != -1 else -1
+            if end == -1:
+                end = document_content.rfind("\n", floor, target)
+                end = end + 1 if end != -1 else target
+            chunks.append(document_content[start:end])
+            start = end
+        chunks.append(document_content[start:])
+        return chunks
+    
+    async def _process_chunks_concurrently(
+        self,
+        system_prompt: str,
+        user_prompts: List[str],
+        template_output_format: str
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Send all chunk requests at once and collect the results in chunk order
+        
+        Args:
+            system_prompt: The system prompt shared by every chunk
+            user_prompts: The user prompt of each chunk
+            template_output_format: The output template format, used for error placeholders
+            
+        Returns:
+            Tuple of one result per chunk (error placeholders for failed chunks) and the number of failed chunks
+        """
+        total = len(user_prompts)
+        chunk_results: List[Optional[Dict[str, Any]]] = [None] * total
+        chunks_with_errors = 0
+        
+        semaphore = asyncio.Semaphore(CHUNK_MAX_CONCURRENCY)
+        
+        async def process_chunk(client: "AsyncOpenAI", index: int, user_prompt: str) -> None:
+            nonlocal chunks_with_errors
+            async with semaphore:
+                logger.info(f"Processing chunk {index+1}/{total}")
+                start_time = time.time()
+                try:
+                    chunk_results[index] = await self._acall_openai_api(client, system_prompt, user_prompt)
+                    logger.info(f"Chunk {index+1}/{total} processed in {time.time() - start_time:.2f} seconds")
+                except Exception as e:
+                    logger.error(f"Error processing chunk {index+1}/{total}: {e}")
+                    chunk_results[index] = self._chunk_error_result(index, total, template_output_format, e)
+                    chunks_with_errors += 1
+        
+        # One client per run: its connection pool is bound to the event loop it was first used on.
+        # SDK retries are off so _acall_openai_api's jittered backoff is the only retry policy
+        async with AsyncOpenAI(api_key=self.api_key, timeout=300, max_retries=0) as client:
+            # Each task writes its own slot, so results stay in chunk order whatever finishes first
+            await asyncio.gather(*[process_chunk(client, i, user_prompt) for i, user_prompt in enumerate(user_prompts)])
+        
+        return chunk_results, chunks_with_errors
+    
+    def _process_chunks_batch(
+        self,
+        system_prompt: str,
+        user_prompts: List[str],
+        template_output_format: str
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Submit all chunk requests as one Batch API job and wait for its results
+        
+        Args:
+            system_prompt: The system prompt shared by every chunk
+            user_prompts: The user prompt of each chunk
+            template_output_format: The output template format, used for error placeholders
+            
+        Returns:
+            Tuple of one result per chunk (error placeholders for failed chunks) and the number of failed chunks
+        """
+        total = len(user_prompts)
+        try:
+            batch_id = self.submit_batch(system_prompt, user_prompts)
+            responses = self.wait_for_batch(batch_id)
+        except Exception as e:
+            logger.error(f"Error processing chunks through the Batch API: {e}")
+            return [self._chunk_error_result(i, total, template_output_format, e) for i in range(total)], total
+        
+        chunk_results: List[Optional[Dict[str, Any]]] = [None] * total
+        chunks_with_errors = 0
+        for i in range(total):
+            result = responses.get(f"req-{i}")
+            if result is None or "error" in result:
+                error = ValueError(result["error"] if result else "No result returned for this chunk")
+                logger.error(f"Error processing chunk {i+1}/{total}: {error}")
+                chunk_results[i] = self._chunk_error_result(i, total, template_output_format, error)
+                chunks_with_errors += 1
+            else:
+                chunk_results[i] = result
+        return chunk_results, chunks_with_errors
+    
+    def submit_batch(self, system_prompt: str, user_prompts: List[str]) -> str:
+        """Submit prompts as a Batch API job, for bulk work that can wait for results
+        
+        Batch requests cost half as much and draw on a separate rate limit pool, but can take
+        up to 24 hours to complete.
+        
+        Args:
+            system_prompt: The system prompt shared by every request
+            user_prompts: The user prompt of each request; request i gets custom_id "req-i"
+            
+        Returns:
+            str: The ID of the batch, to pass to wait_for_batch()
+        """
+        if not OPENAI_SDK_AVAILABLE:
+            raise RuntimeError("The openai package is required for the Batch API")
+        client = OpenAI(api_key=self.api_key, timeout=300)
+        
+        requests_jsonl = "\n".join(
+            json.dumps({
+                "custom_id": f"req-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    **self._body_base,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ]
+                }
+            })
+            for i, user_prompt in enumerate(user_prompts)
+        )
+        
+        input_file = client.files.create(
+            file=("requests.jsonl", requests_jsonl.encode("utf-8")), purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted {len(user_prompts)} requests as batch {batch.id}")
+        return batch.id
+    
+    def wait_for_batch(self, batch_id: str, max_wait: float = BATCH_MAX_WAIT) -> Dict[str, Dict[str, Any]]:
+        """Wait for a Batch API job to finish and parse its results
+        
+        The batch is polled with jittered exponential backoff and cancelled if it outlives max_wait.
+        
+        Args:
+            batch_id: The ID returned by submit_batch()
+            max_wait: Longest time in seconds to wait for the batch
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: Parsed response with file_type and content per custom_id;
+            requests that failed map to a dict with an "error" message instead
+        """
+        if not OPENAI_SDK_AVAILABLE:
+            raise RuntimeError("The openai package is required for the Batch API")
+        client = OpenAI(api_key=self.api_key, timeout=300)
+        
+        batch = client.batches.retrieve(batch_id)
+        deadline = time.time() + max_wait
+        delay = BATCH_POLL_INTERVAL
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            if time.time() > deadline:
+                client.batches.cancel(batch_id)
+                raise TimeoutError(f"Batch {batch_id} did not complete within {max_wait} seconds")
+            time.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, BATCH_POLL_MAX_INTERVAL)
+            batch = client.batches.retrieve(batch_id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            raise ValueError(f"Batch {batch_id} ended with status {batch.status}")
+        output = client.files.content(batch.output_file_id).text
+        
+        # Output lines come back in any order; they are matched to requests by custom_id
+        results = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            item = _json_loads(line)
+            response = item.get("response") or {}
+            choices = (response.get("body") or {}).get("choices")
+            if item.get("error") or response.get("status_code") != 200:
+                results[item["custom_id"]] = {"error": f"OpenAI API error: {item.get('error') or response.get('body')}"}
+            elif not choices:
+                results[item["custom_id"]] = {"error": "Unexpected API response format"}
+            else:
+                results[item["custom_id"]] = self._parse_assistant_message(choices[0]["message"]["content"])
+        return results
+    
+    def _chunk_error_result(
+        self, index: int, total: int, template_output_format: str, error: BaseException
+    ) -> Dict[str, Any]:
+        """Build the placeholder result for a chunk that failed to process"""
+        return {
+            "file_type": template_output_format.lstrip("."),
+            "content": f"[Error processing part {index+1}/{total}: {str(error)}]",
+            "error": str(error)
+        }
+    
     def _combine_chunk_results(
         self, 
         chunk_results: List[Dict[str, Any]], 
-        document_type: str,
         template_output_format: str
     ) -> Dict[str, Any]:
         """Combine results from multiple chunks into a single result
         
         Args:
             chunk_results: List of results from individual chunks
-            document_type: The document type
             template_output_format: The output template format
             
         Returns:
@@ -345,67 +1140,58 @@ class OpenAIService:
         # Handle different output formats
         file_type = combined_result["file_type"].lower()
         
-        # Special handling for CSV format - keep header from first chunk, skip headers in remaining chunks
-        if file_type == "csv" and document_type == "repo":
-            # For repo type (deposition), we need special handling for the CSV
-            # First chunk contains metadata rows that need to be preserved
-            lines = []
-            header_line = None
-            
-            # Process first chunk to extract headers
-            first_chunk_lines = chunk_results[0].get("content", "").splitlines()
-            if len(first_chunk_lines) >= 1:
-                header_line = first_chunk_lines[0]  # CSV header row
-                lines.extend(first_chunk_lines)  # Include all lines from first chunk
-            
-            # Process remaining chunks, skipping header rows if present
-            for i, result in enumerate(chunk_results[1:], 1):
-                chunk_lines = result.get("content", "").splitlines()
-                if len(chunk_lines) >= 1 and header_line and chunk_lines[0] == header_line:
-                    # Skip header row in subsequent chunks
-                    chunk_lines = chunk_lines[1:]
-                lines.extend(chunk_lines)
-            
-            combined_result["content"] = "\n".join(lines)
-            
-        elif file_type == "csv":
-            # For regular CSV, similar approach but simpler
-            lines = []
-            header_line = None
-            
-            # Process first chunk to extract headers
-            first_chunk_lines = chunk_results[0].get("content", "").splitlines()
-            if len(first_chunk_lines) >= 1:
-                header_line = first_chunk_lines[0]  # CSV header row
-                lines.extend(first_chunk_lines)  # Include all lines from first chunk
-            
-            # Process remaining chunks, skipping header rows if present
-            for i, result in enumerate(chunk_results[1:], 1):
-                chunk_lines = result.get("content", "").splitlines()
-                if len(chunk_lines) >= 1 and header_line and chunk_lines[0] == header_line:
-                    # Skip header row in subsequent chunks
-                    chunk_lines = chunk_lines[1:]
-                lines.extend(chunk_lines)
-            
-            combined_result["content"] = "\n".join(lines)
+        # Special handling for CSV format - keep header from first chunk, skip headers in remaining chunks.
+        # For repo type (deposition) the first chunk also carries the metadata rows, which are kept as is
+        if file_type == "csv":
+            combined_result["content"] = self._stitch_csv(chunk_results)
             
         else:
-            # For other formats, simple concatenation with section markers
-            sections = []
-            for i, result in enumerate(chunk_results):
-                content = result.get("content", "")
-                sections.append(content)
-            
-            combined_result["content"] = "\n\n".join(sections)
+            # For other formats, simple concatenation separated by blank lines
+            combined_result["content"] = "\n\n".join(result.get("content", "") for result in chunk_results)
         
         logger.info(f"Combined result generated with {len(combined_result['content'])} characters")
         return combined_result
     
+    def _stitch_csv(self, chunk_results: List[Dict[str, Any]]) -> str:
+        """Concatenate CSV chunk outputs, dropping the header row repeated at the start of later chunks
+        
+        Args:
+            chunk_results: List of results from individual chunks
+            
+        Returns:
+            str: The combined CSV content
+        """
+        first_content = chunk_results[0].get("content", "")
+        newline = first_content.find("\n")
+        header_line = (first_content if newline == -1 else first_content[:newline]).rstrip("\r")
+        
+        sio = io.StringIO()
+        for i, result in enumerate(chunk_results):
+            content = result.get("content", "")
+            # Skip the header row in subsequent chunks by prefix check rather than splitting into lines
+            if i and header_line and content.startswith(header_line):
+                rest = content[len(header_line):]
+                if not rest or rest[0] in "\r\n":
+                    content = rest[2:] if rest.startswith("\r\n") else rest[1:]
+            # Drop the chunk's trailing line break; chunks are joined with one
+            if content.endswith("\n"):
+                content = content[:-2] if content.endswith("\r\n") else content[:-1]
+            if not content:
+                continue
+            if sio.tell():
+                sio.write("\n")
+            sio.write(content)
+        return sio.getvalue()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
     def _create_system_prompt(
-        self, document_format: str, template_input_format: str, template_output_format: str, document_type: str = "other"
+        document_format: str, template_input_format: str, template_output_format: str, document_type: str = "other"
     ) -> str:
         """Create the system prompt for the OpenAI API
         
+        The prompt depends only on its arguments, so it is built once per combination and cached.
+        
         Args:
             document_format: File extension of the document
             template_input_format: File extension of the input template
@@ -431,116 +1217,8 @@ class OpenAIService:
             f"The document type is: {document_type}\n\n"
         )
         
-        # Document type specific instructions
-        type_specific_instructions = {
-            "legal": (
-                "As you're working with a legal document, pay special attention to:\n"
-                "- Legal terminology and phrasing\n"
-                "- Citation formats and references to statutes, cases, or regulations\n"
-                "- Formal document structure including sections, clauses and numbered paragraphs\n"
-                "- Dates, parties, and defined terms which should be preserved exactly\n"
-                "- Any disclaimers or warnings that should be maintained\n\n"
-            ),
-            "real_estate": (
-                "As you're working with a real estate document, pay special attention to:\n"
-                "- Property descriptions and addresses\n"
-                "- Financial figures, prices, and payment terms\n"
-                "- Dates of transactions, inspections, and closings\n"
-                "- Party names and their roles (buyer, seller, agent, etc.)\n"
-                "- Any contingencies or conditions mentioned\n\n"
-            ),
-            "contract": (
-                "As you're working with a contract, pay special attention to:\n"
-                "- Parties to the agreement and their obligations\n"
-                "- Terms and conditions, especially regarding payment and deliverables\n"
-                "- Timeframes, deadlines, and effective dates\n"
-                "- Warranties, representations, and indemnities\n"
-                "- Termination clauses and dispute resolution procedures\n\n"
-            ),
-            "lease": (
-                "As you're working with a lease agreement, pay special attention to:\n"
-                "- Tenant and landlord information\n"
-                "- Property details and condition statements\n"
-                "- Lease terms, rent amounts, and payment schedules\n"
-                "- Security deposits and fees\n"
-                "- Maintenance responsibilities and terms for entry\n\n"
-            ),
-            "repo": (
-                '''
-                    You are turning a deposition transcript (PDF text or plaintext) into a UTF-8 CSV with exactly four columns in this order: (blank), From (Pg/Line), To (Pg/Line), Summary
-
-                    ────────────────────────────────────────────────────────
-                    │                │ From (Pg/Line) │ To (Pg/Line) │ Summary │  ← header row
-                    ────────────────────────────────────────────────────────
-
-                    STEP 1 – Fixed Metadata Rows
-
-                    • Row 2, Column 1 = <Witness Name>      (all other columns must be blank)
-                    • Row 3, Column 1 = <Depo Date>         (e.g., 28-Aug-23)
-                    • Row 4, Column 1 = <Depo Type>         (e.g., “Video Depo”)
-                      ↳ Extract these three values from the transcript header. Leave blank if missing.
-
-                    *Example*  
-                    Header shows: “REMOTE VIDEO CONFERENCE DEPOSITION OF KRISTINA WARD ENGEL – Monday, August 28, 2023”  
-                    → Row 2 = Kristina Ward Engel  
-                    → Row 3 = 28-Aug-23  
-                    → Row 4 = Video Depo  
-
-                    STEP 2 – Fact Blocks
-
-                    Starting from Row 5, each row captures a coherent fact block (a continuous section discussing a single idea).
-
-                    • Column 1: Leave blank  
-                    • Column 2: First Pg/Line (e.g., 6/9)  
-                    • Column 3: Last Pg/Line (e.g., 7/2)  
-                    • Column 4: Summary  
-                      - Must be in plain English  
-                      - Present tense only
-                      - **The entire summary must go in this one cell (Column 4 only)**  
-                      - **Do NOT split summary across multiple rows or columns**  
-                      - **Do NOT include line breaks**  
-                      - **Do NOT include ANY commas — not even in addresses, lists, or numbers**  
-                        → Replace commas with semicolons or rephrase the sentence
-
-                    ✅ Correct:
-                    ,11/22,12/5,The board has always required buyer approval; she saw roughly four applications while she was a director
-
-                    ✅ Also Correct (no commas in address):
-                    ,6/9,7/2,She lives in Unit 302 of the Inlet Building and also resides part of the year in Lake Forest Illinois
-
-                    ❌ Incorrect (uses commas or spans multiple lines):
-                    ,11/22,12/5,The board has always required buyer approval;  
-                    ,she saw roughly four applications while she was a director
-
-                    ❌ Incorrect (commas in address):
-                    ,6/9,7/2,She lives in Unit 302, Inlet Building, and also resides in Lake Forest, IL
-
-                    STEP 3 – Ordering & Formatting Rules
-
-                    • Preserve original appearance order  
-                    • Do NOT add or delete columns  
-                    • Do NOT use quotes or extra commas  
-                    • Do NOT include explanations or formatting notes in output  
-
-                    STEP 4 – Important for Large Documents
-
-                    • Process the ENTIRE transcript without skipping content  
-                    • Do NOT add any truncation markers or headers  
-                    • The output must be a clean, complete CSV file — no extra notes
-
-                '''
-            ),
-            "other": (
-                "Pay special attention to:\n"
-                "- The document's main purpose and key points\n"
-                "- Any structured data, tables, or lists\n"
-                "- Important dates, names, and numerical values\n"
-                "- The logical flow and organization of information\n\n"
-            )
-        }
-        
         # Get the appropriate instructions or default to "other"
-        type_instructions = type_specific_instructions.get(document_type, type_specific_instructions["other"])
+        type_instructions = _TYPE_INSTRUCTIONS.get(document_type, _TYPE_INSTRUCTIONS["other"])
         
         # Task instructions
         task_instructions = (
@@ -549,22 +1227,43 @@ class OpenAIService:
             "the format of the output template. Preserve all relevant information from the input document "
             "while organizing it according to the output template structure.\n\n"
             
-            f"You MUST return a valid JSON object with the following structure:\n"
-            "{\n"
-            f'  "file_type": "{template_output_format}",\n'
-            '  "content": "The transformed document content"\n'
-            "}\n\n"
-            
-            f"The 'file_type' should be '{template_output_format}' (without the dot).\n"
-            f"The 'content' should contain the transformed document in {template_output_format} format.\n\n"
-            
-            "Important: Your entire response must be a single, valid JSON object that can be parsed. "
-            "Do not include any explanations, comments, or text outside of the JSON object."
+            # JSON mode (response_format) guarantees a parseable object; only its keys need describing,
+            # and the word JSON must still appear in the prompt for the API to accept JSON mode
+            f'Respond with a JSON object with "file_type": "{template_output_format}" (without the dot) '
+            f'and "content": the transformed document in {template_output_format} format.'
         )
         
         # Combine all parts
         return base_prompt + type_instructions + task_instructions
     
+    def _create_template_block(
+        self,
+        template_input_content: str,
+        template_output_content: str,
+        template_input_title: str = "",
+        template_output_title: str = ""
+    ) -> str:
+        """Create the leading part of the user prompt: the instruction and both templates
+        
+        Args:
+            template_input_content: The content of the input template
+            template_output_content: The content of the output template
+            template_input_title: Title of the input template
+            template_output_title: Title of the output template
+            
+        Returns:
+            str: The template block, shared by every request with the same templates
+        """
+        return "".join([
+            "Please transform the input document below to match the format of the output template.\n\n",
+            "# INPUT TEMPLATE", f" ({template_input_title})" if template_input_title else "", ":\n```\n",
+            template_input_content,
+            "\n```\n\n",
+            "# OUTPUT TEMPLATE", f" ({template_output_title})" if template_output_title else "", ":\n```\n",
+            template_output_content,
+            "\n```\n\n"
+        ])
+    
     def _create_user_prompt(
         self,
         document_content: str,
@@ -572,10 +1271,15 @@ class OpenAIService:
         template_output_content: str,
         document_title: str = "",
         template_input_title: str = "",
-        template_output_title: str = ""
+        template_output_title: str = "",
+        trailing_instructions: str = "",
+        template_block: Optional[str] = None
     ) -> str:
         """Create the user prompt with document content and templates
         
+        The templates come first and the document last, so requests that share templates
+        (such as the chunks of one document) share a prompt prefix OpenAI can cache.
+        
         Args:
             document_content: The content of the document to transform
             template_input_content: The content of the input template
@@ -583,31 +1287,28 @@ class OpenAIService:
             document_title: Title of the document to transform
             template_input_title: Title of the input template
             template_output_title: Title of the output template
+            trailing_instructions: Extra instructions appended after the document
+            template_block: Precomputed _create_template_block() output for these templates, if any
             
         Returns:
             str: The user prompt
         """
-        return (
-            "Please transform the following document to match the format of the output template.\n\n"
-            
-            "# INPUT DOCUMENT" + (f" ({document_title})" if document_title else "") + ":\n"
-            "```\n"
-            f"{document_content}\n"
-            "```\n\n"
-            
-            "# INPUT TEMPLATE" + (f" ({template_input_title})" if template_input_title else "") + ":\n"
-            "```\n"
-            f"{template_input_content}\n"
-            "```\n\n"
-            
-            "# OUTPUT TEMPLATE" + (f" ({template_output_title})" if template_output_title else "") + ":\n"
-            "```\n"
-            f"{template_output_content}\n"
-            "```\n\n"
-            
+        if template_block is None:
+            template_block = self._create_template_block(
+                template_input_content, template_output_content, template_input_title, template_output_title
+            )
+        # Assembled with a single join so the (large) document is copied once
+        parts = [
+            template_block,
+            "# INPUT DOCUMENT", f" ({document_title})" if document_title else "", ":\n```\n",
+            document_content,
+            "\n```\n\n",
             "The input document and input template are similar in format. Transform the input document "
             "to match the format of the output template. Return only the transformed content."
-        )
+        ]
+        if trailing_instructions:
+            parts += ["\n\n", trailing_instructions]
+        return "".join(parts)
     
     def _call_openai_api(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
         """Call the OpenAI API
@@ -619,60 +1320,187 @@ class OpenAIService:
         Returns:
             Dict[str, Any]: The parsed JSON response with file_type and content
         """
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        cache_key = self._response_cache_key(messages)
+        if cache_key:
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
+        templated = self._templated_response(system_prompt, user_prompt)
+        if templated is not None:
+            return templated
         
-        data = {
-            "model": self.model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": self.temperature,  # Uses temperature from config or environment
-            "response_format": {"type": "json_object"}  # Request JSON response format
-        }
+        assistant_message = self._post_chat_completion(messages)
+        parsed_response = self._parse_assistant_message(assistant_message)
+        if "parse_error" not in parsed_response:
+            self._remember_response(cache_key, system_prompt, user_prompt, parsed_response)
+        return parsed_response
+    
+    def call_batch(self, system_prompt: str, user_prompts: List[str]) -> List[Dict[str, Any]]:
+        """Process several user prompts under one system prompt in a single request
+        
+        Saves a round trip (and a unit of the requests-per-minute quota) per extra prompt.
+        If the combined reply cannot be parsed, the batch is split in half and each half retried.
+        
+        Args:
+            system_prompt: The system prompt shared by every prompt
+            user_prompts: The user prompts to process
+            
+        Returns:
+            List[Dict[str, Any]]: One parsed response with file_type and content per prompt, in order
+        """
+        if len(user_prompts) <= 1:
+            return [self._call_openai_api(system_prompt, user_prompt) for user_prompt in user_prompts]
         
+        parts = [
+            f"Process each of the following {len(user_prompts)} requests independently. Respond with a JSON "
+            'object {"results": [{"index": <request number>, "file_type": ..., "content": ...}]} '
+            "holding one entry per request."
+        ]
+        for index, user_prompt in enumerate(user_prompts):
+            parts += [f"\n\n---REQUEST {index}---\n", user_prompt]
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": "".join(parts)}
+        ]
+        
+        assistant_message = self._post_chat_completion(messages)
         try:
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=data,
-                timeout=300  # Allow up to 5 minutes for the request
+            by_index = {int(result["index"]): result for result in _json_loads(assistant_message)["results"]}
+            results = [by_index[index] for index in range(len(user_prompts))]
+        except (ValueError, KeyError, TypeError) as e:
+            middle = len(user_prompts) // 2
+            logger.warning(f"Could not parse batched response for {len(user_prompts)} prompts ({e}), splitting batch")
+            return (
+                self.call_batch(system_prompt, user_prompts[:middle]) +
+                self.call_batch(system_prompt, user_prompts[middle:])
             )
+        return [
+            {"file_type": result.get("file_type", "txt"), "content": result.get("content", "")}
+            for result in results
+        ]
+    
+    def call_many(self, system_prompt: str, user_prompts: List[str]) -> List[Dict[str, Any]]:
+        """Process independent user prompts concurrently, one request each
+        
+        Requests share the chunk path's concurrency cap, token bucket and retry policy.
+        
+        Args:
+            system_prompt: The system prompt shared by every prompt
+            user_prompts: The user prompts to process
             
-            response.raise_for_status()  # Raise an exception for 4xx/5xx responses
+        Returns:
+            List[Dict[str, Any]]: One parsed response with file_type and content per prompt, in order;
+            prompts that failed map to a dict with an "error" message instead
+        """
+        if not OPENAI_SDK_AVAILABLE:
+            logger.warning("openai package not installed, processing prompts sequentially")
+            results = []
+            for user_prompt in user_prompts:
+                try:
+                    results.append(self._call_openai_api(system_prompt, user_prompt))
+                except Exception as e:
+                    results.append({"error": str(e)})
+            return results
+        return _run_sync(self._acall_many(system_prompt, user_prompts))
+    
+    async def _acall_many(self, system_prompt: str, user_prompts: List[str]) -> List[Dict[str, Any]]:
+        """Send all prompts at once, at most CHUNK_MAX_CONCURRENCY in flight (see call_many)"""
+        semaphore = asyncio.Semaphore(CHUNK_MAX_CONCURRENCY)
+        
+        async def call(client: "AsyncOpenAI", user_prompt: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._acall_openai_api(client, system_prompt, user_prompt)
+        
+        async with AsyncOpenAI(api_key=self.api_key, timeout=300, max_retries=0) as client:
+            results = await asyncio.gather(
+                *[call(client, user_prompt) for user_prompt in user_prompts], return_exceptions=True
+            )
+        return [{"error": str(result)} if isinstance(result, BaseException) else result for result in results]
+    
+    def _post_chat_completion(self, messages: List[Dict[str, str]]) -> str:
+        """Send a chat completion request and return the assistant's raw message content
+        
+        Args:
+            messages: The chat messages to send
             
-            response_data = response.json()
+        Returns:
+            str: The content of the first choice
+        """
+        # Serialized by hand so the (usually repeated) system prompt is not re-encoded on every call
+        body = b"".join([
+            self._request_body_head,
+            b",".join(
+                _system_message_json(message["content"]) if message["role"] == "system" else _json_dumps(message)
+                for message in messages
+            ),
+            b"]}"
+        ])
+        
+        # Cheap estimate for pacing; exact counts would mean encoding the prompt again
+        prompt_tokens = len(body) // CHARS_PER_TOKEN
+        headers = None
+        if REQUEST_COMPRESSION and len(body) > REQUEST_COMPRESSION_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=REQUEST_COMPRESSION_LEVEL)
+            headers = {"Content-Encoding": "gzip"}
+        
+        _circuit_breaker.before_call()
+        timeout = self._request_timeout()
+        deadline = time.monotonic() + RETRY_MAX_TIME
+        attempt = 0
+        try:
+            while True:
+                _request_bucket.wait()
+                if _token_bucket is not None:
+                    _token_bucket.wait(prompt_tokens)
+                try:
+                    started = time.monotonic()
+                    # Closing the response on every path, including errors and retries, keeps a broken
+                    # stream from pinning a pooled connection
+                    with self._session.post(
+                        self.api_url, data=body, headers=headers, timeout=timeout, stream=STREAM_RESPONSES
+                    ) as response:
+                        if not response.ok:
+                            # Read the (small) error body before the response closes; the handlers below use it
+                            _ = response.content
+                        response.raise_for_status()  # Raise an exception for 4xx/5xx responses
+                        self._latencies.append(time.monotonic() - started)
+                        if STREAM_RESPONSES:
+                            # Read inside the retry loop so a stalled or broken stream is retried like a failed request
+                            assistant_message = self._read_stream(response)
+                        else:
+                            # Parse the raw bytes directly rather than decoding them to a str first
+                            response_data = _json_loads(response.content)
+                    break
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.HTTPError
+                ) as e:
+                    status = e.response.status_code if e.response is not None else None
+                    if isinstance(e, requests.exceptions.HTTPError) and status not in RETRYABLE_STATUS_CODES:
+                        # The API is up and rejected the request itself
+                        _circuit_breaker.record_success()
+                        raise
+                    attempt += 1
+                    retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+                    delay = _retry_delay(attempt, retry_after)
+                    if attempt >= RETRY_MAX_TRIES or time.monotonic() + delay > deadline:
+                        _circuit_breaker.record_failure(e)
+                        raise
+                    logger.warning(f"OpenAI request failed ({e}), retrying in {delay:.1f}s (attempt {attempt})")
+                    time.sleep(delay)
+            _circuit_breaker.record_success()
+            if STREAM_RESPONSES:
+                return assistant_message
             
             # Extract the assistant's message content
             if "choices" in response_data and len(response_data["choices"]) > 0:
-                assistant_message = response_data["choices"][0]["message"]["content"]
-                
-                try:
-                    # Parse the JSON response
-                    parsed_response = json.loads(assistant_message)
-                    
-                    # Validate the response has the required structure
-                    if "file_type" not in parsed_response or "content" not in parsed_response:
-                        logger.warning(f"Incomplete API response, missing required fields: {parsed_response.keys()}")
-                        # Create a valid response format even if the model's response is incomplete
-                        parsed_response = {
-                            "file_type": parsed_response.get("file_type", "txt"),
-                            "content": parsed_response.get("content", assistant_message)
-                        }
-                    
-                    return parsed_response
-                    
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in API response: {assistant_message[:100]}...")
-                    # Return a fallback format if the response isn't valid JSON
-                    return {
-                        "file_type": "txt",
-                        "content": assistant_message,
-                        "parse_error": "The API response wasn't valid JSON"
-                    }
+                return response_data["choices"][0]["message"]["content"]
             else:
                 raise ValueError("Unexpected API response format")
             
@@ -680,7 +1508,7 @@ class OpenAIService:
             # Handle API errors
             error_info = {}
             try:
-                error_info = response.json()
+                error_info = e.response.json()
             except:
                 error_info = {"error": str(e)}
                 
@@ -690,6 +1518,295 @@ class OpenAIService:
         except Exception as e:
             logger.error(f"Error in API call: {e}")
             raise
+    
+    def _read_stream(self, response: requests.Response) -> str:
+        """Collect the assistant's message from a streamed chat completion
+        
+        Args:
+            response: The streaming response, with its status already checked
+            
+        Returns:
+            str: The concatenated content deltas
+        """
+        buffer = io.StringIO()
+        done = False
+        for line in response.iter_lines():
+            # Lines after [DONE] (just the chunked terminator) are still read, so the body is fully
+            # consumed and urllib3 returns the connection to the pool instead of dropping it
+            if done or not line.startswith(b"data: "):
+                continue
+            payload = line[6:]
+            if payload == b"[DONE]":
+                done = True
+                continue
+            choices = _json_loads(payload).get("choices")
+            if choices and choices[0].get("delta", {}).get("content"):
+                buffer.write(choices[0]["delta"]["content"])
+        assistant_message = buffer.getvalue()
+        if not assistant_message:
+            raise ValueError("Unexpected API response format")
+        return assistant_message
+    
+    def _request_timeout(self) -> float:
+        """Timeout for the next synchronous request, adapted to recently observed latencies"""
+        latencies = list(self._latencies)
+        if len(latencies) < LATENCY_MIN_SAMPLES:
+            return REQUEST_TIMEOUT_MAX
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        return min(REQUEST_TIMEOUT_MAX, max(REQUEST_TIMEOUT_MIN, 3 * p99))
+    
+    def close(self) -> None:
+        """Release the pooled HTTP connections"""
+        self._session.close()
+    
+    def _prewarm_connection(self) -> None:
+        """Open a pooled connection to the API host in the background so the first call skips the TLS handshake"""
+        try:
+            self._session.head("https://api.openai.com/v1/models", timeout=10)
+        except requests.exceptions.RequestException as e:
+            logger.info(f"Could not pre-warm OpenAI connection: {e}")
+    
+    @staticmethod
+    def _load_encoding(model: str) -> Optional["tiktoken.Encoding"]:
+        """Get the tiktoken encoding for model, or None when tiktoken is unavailable"""
+        if not TIKTOKEN_AVAILABLE:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            logger.warning(f"No tiktoken encoding registered for {model}, using o200k_base")
+            return tiktoken.get_encoding("o200k_base")
+    
+    def _encode(self, text: str) -> Optional[List[int]]:
+        """Token IDs of text for the configured model, or None when tiktoken is unavailable"""
+        if self._encoding is None:
+            return None
+        return self._encoding.encode(text, disallowed_special=())
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count the tokens in text for the configured model"""
+        if self._encoding is None:
+            return len(text) // CHARS_PER_TOKEN + 1
+        return len(self._encode(text))
+    
+    def _truncated_variants(
+        self, text: str, budgets: Sequence[int], token_ids: Optional[List[int]] = None
+    ) -> List[str]:
+        """Truncate text to each of several token budgets from a single encoding pass
+        
+        Args:
+            text: The text to truncate
+            budgets: Token budgets, one variant is returned per budget
+            token_ids: The already encoded text, if available
+            
+        Returns:
+            List[str]: For each budget, text unchanged if it fits, otherwise its first
+            tokens up to the budget followed by a truncation marker
+        """
+        if self._encoding is None:
+            return [
+                text if len(text) <= budget * CHARS_PER_TOKEN else text[:budget * CHARS_PER_TOKEN] + TRUNCATION_MARKER
+                for budget in budgets
+            ]
+        if token_ids is None:
+            token_ids = self._encode(text)
+        return [
+            text if len(token_ids) <= budget else self._encoding.decode(token_ids[:budget]) + TRUNCATION_MARKER
+            for budget in budgets
+        ]
+    
+    def _create_embedder(self) -> CachedEmbedder:
+        """Build the embedding function for the semantic cache from OPENAI_EMBEDDING_BACKEND"""
+        if EMBEDDING_BACKEND == "local":
+            if importlib.util.find_spec("sentence_transformers") is not None:
+                # The cache directory is shared, but keys include the model name so vectors never mix
+                return CachedEmbedder(LocalEmbedder(LOCAL_EMBEDDING_MODEL), LOCAL_EMBEDDING_MODEL, EMBEDDING_CACHE_DIR)
+            logger.warning("sentence-transformers not installed, embedding semantic cache keys with OpenAI")
+        return CachedEmbedder(BatchingEmbedder(self._embed_texts), EMBEDDING_MODEL, EMBEDDING_CACHE_DIR)
+    
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for texts from the OpenAI embeddings endpoint
+        
+        Args:
+            texts: The texts to embed
+            
+        Returns:
+            List[List[float]]: One embedding per text, in input order
+        """
+        response = self._session.post(
+            self.embeddings_url,
+            json={"model": EMBEDDING_MODEL, "input": texts},
+            timeout=60
+        )
+        response.raise_for_status()
+        data = sorted(_json_loads(response.content)["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+    
+    async def _acall_openai_api(self, client: "AsyncOpenAI", system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        """Call the OpenAI API without blocking the event loop
+        
+        Args:
+            client: The async OpenAI client to send the request with
+            system_prompt: The system prompt
+            user_prompt: The user prompt
+            
+        Returns:
+            Dict[str, Any]: The parsed JSON response with file_type and content
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        cache_key = self._response_cache_key(messages)
+        if cache_key:
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
+        templated = self._templated_response(system_prompt, user_prompt)
+        if templated is not None:
+            return templated
+        
+        prompt_tokens = (len(system_prompt) + len(user_prompt)) // CHARS_PER_TOKEN
+        _circuit_breaker.before_call()
+        deadline = time.monotonic() + RETRY_MAX_TIME
+        attempt = 0
+        try:
+            while True:
+                await _request_bucket.acquire()
+                if _token_bucket is not None:
+                    await _token_bucket.acquire(prompt_tokens)
+                try:
+                    # Stream the completion so tokens are collected as they arrive
+                    stream = await client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        response_format=RESPONSE_FORMAT,
+                        stream=True
+                    )
+                    buffer = io.StringIO()
+                    async for event in stream:
+                        if event.choices and event.choices[0].delta.content:
+                            buffer.write(event.choices[0].delta.content)
+                    break
+                except (APIStatusError, APIConnectionError) as e:
+                    if isinstance(e, APIStatusError) and e.status_code not in RETRYABLE_STATUS_CODES:
+                        # The API is up and rejected the request itself; handled below
+                        raise
+                    attempt += 1
+                    retry_after = e.response.headers.get("retry-after") if isinstance(e, APIStatusError) else None
+                    delay = _retry_delay(attempt, retry_after)
+                    if attempt >= RETRY_MAX_TRIES or time.monotonic() + delay > deadline:
+                        _circuit_breaker.record_failure(e)
+                        raise
+                    logger.warning(f"OpenAI request failed ({e}), retrying in {delay:.1f}s (attempt {attempt})")
+                    await asyncio.sleep(delay)
+            _circuit_breaker.record_success()
+        except APIStatusError as e:
+            # Retryable errors that ran out of retries were already recorded above
+            if e.status_code not in RETRYABLE_STATUS_CODES:
+                if e.status_code >= 500:
+                    _circuit_breaker.record_failure(e)
+                else:
+                    _circuit_breaker.record_success()
+            error_info = e.body or {"error": str(e)}
+            logger.error(f"API error: {error_info}")
+            raise ValueError(f"OpenAI API error: {error_info}")
+        
+        assistant_message = buffer.getvalue()
+        if not assistant_message:
+            raise ValueError("Unexpected API response format")
+        parsed_response = self._parse_assistant_message(assistant_message)
+        if "parse_error" not in parsed_response:
+            self._remember_response(cache_key, system_prompt, user_prompt, parsed_response)
+        return parsed_response
+    
+    def _response_cache_key(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        """Key of a request in the deterministic response cache, or None when caching is off"""
+        if not self.response_cache.enabled:
+            return None
+        return LLMCache.make_key(self.model, messages, self.temperature, RESPONSE_FORMAT)
+    
+    def _cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up a response in the deterministic response cache, recording the hit or miss"""
+        cached = self.response_cache.get(cache_key)
+        openai_perf_logger.record_cache_lookup("response", cached is not None)
+        if cached is not None:
+            stats = self.response_cache.stats
+            logger.info(
+                f"Response cache hit ({stats['hits']} hits, {stats['misses']} misses, "
+                f"hit rate {self.response_cache.hit_rate:.1%})"
+            )
+        return cached
+    
+    def _templated_response(self, system_prompt: str, user_prompt: str) -> Optional[Dict[str, Any]]:
+        """Look up a prompt in the template cache, recording the hit or miss"""
+        if self.template_cache is None:
+            return None
+        templated = self.template_cache.match(system_prompt, user_prompt)
+        openai_perf_logger.record_cache_lookup("template", templated is not None)
+        return templated
+    
+    def _remember_response(
+        self,
+        cache_key: Optional[str],
+        system_prompt: str,
+        user_prompt: str,
+        parsed_response: Dict[str, Any]
+    ) -> None:
+        """Store a successfully parsed response in the enabled caches"""
+        if cache_key:
+            self.response_cache.set(cache_key, parsed_response)
+        if self.template_cache is not None:
+            self.template_cache.add(system_prompt, user_prompt, parsed_response)
+    
+    def _parse_assistant_message(self, assistant_message: str) -> Dict[str, Any]:
+        """Parse the assistant's JSON reply into a dict with file_type and content
+        
+        Args:
+            assistant_message: The raw message content returned by the model
+            
+        Returns:
+            Dict[str, Any]: The parsed response, or a txt fallback if it isn't valid JSON
+        """
+        try:
+            # Parse the JSON response
+            parsed_response = _json_loads(assistant_message)
+            
+            # Validate the response has the required structure
+            missing = self._REQUIRED_FIELDS.difference(parsed_response)
+            if missing:
+                # %-style so the field set is only formatted when the warning is emitted
+                logger.warning("Incomplete API response, missing required fields: %s", sorted(missing))
+                # Create a valid response format even if the model's response is incomplete
+                parsed_response = {
+                    "file_type": parsed_response.get("file_type", "txt"),
+                    "content": parsed_response.get("content", assistant_message)
+                }
+            
+            return parsed_response
+            
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid JSON in API response: {assistant_message[:100]}...")
+            # Return a fallback format if the response isn't valid JSON
+            return {
+                "file_type": "txt",
+                "content": assistant_message,
+                "parse_error": "The API response wasn't valid JSON"
+            }
+
+@functools.lru_cache(maxsize=1)
+def get_openai_service() -> OpenAIService:
+    """Return the shared OpenAIService, created on first use rather than at import"""
+    return OpenAIService()
+
+
+class _LazyService:
+    """Stand-in for the shared instance that creates it on first attribute access"""
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_openai_service(), name)
+
 
-# Create a singleton instance
-openai_service = OpenAIService()
\ No newline at end of file
+# Kept for existing imports; prefer get_openai_service()
+openai_service = _LazyService()
\ No newline at end of file
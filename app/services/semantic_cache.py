@@ -0,0 +1,352 @@
+"""
+Semantic cache for document transformation results.
+
+Transformations are keyed by an embedding of the document and template text, so a
+request that is nearly identical to one already answered (same formats, same
+document type, cosine similarity above a threshold) can reuse the stored result
+instead of paying for another chat completion.
+"""
+
+import os
+import json
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+import numpy as np
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Characters of each input that go into the embedded key; together they stay
+# well under the embedding model's 8191-token input limit
+KEY_DOCUMENT_CHARS = 20000
+KEY_TEMPLATE_CHARS = 4000
+
+# Seconds between an add() and the write to disk; later adds in that window share the write
+SAVE_DELAY = 5.0
+
+
+class BatchingEmbedder:
+    """Coalesces embedding requests from concurrent callers into batched API calls
+
+    Callers block until their texts are embedded; a background thread sends whatever is
+    pending once max_batch texts have queued up or max_delay seconds have passed.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], List[List[float]]],
+        max_batch: int = 100,
+        max_delay: float = 0.05
+    ):
+        """Initialize the embedder
+
+        Args:
+            embed: Function returning one embedding per input text
+            max_batch: Maximum number of texts sent in one call
+            max_delay: Longest time in seconds a text waits for others to batch with
+        """
+        self.embed = embed
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[str, Future]] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        """Return one embedding per text once its batch has been sent"""
+        futures = [Future() for _ in texts]
+        with self._condition:
+            self._pending.extend(zip(texts, futures))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return [future.result() for future in futures]
+
+    def _run(self) -> None:
+        """Send pending texts in batches, forever (runs on the background thread)"""
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = time.monotonic() + self.max_delay
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+
+            try:
+                embeddings = self.embed([text for text, _ in batch])
+                for (_, future), embedding in zip(batch, embeddings):
+                    future.set_result(embedding)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+class LocalEmbedder:
+    """Embeds texts with a local sentence-transformers model, so cache lookups need no API call"""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        """Initialize the embedder
+
+        Args:
+            model_name: Name of the sentence-transformers model, loaded on first use
+        """
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def __call__(self, texts: List[str]) -> List[np.ndarray]:
+        """Return one normalized embedding per text"""
+        with self._lock:
+            if self._model is None:
+                # Imported here because it pulls in torch, which is slow to load
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name)
+                logger.info(f"Loaded local embedding model {self.model_name}")
+        return list(self._model.encode(texts, normalize_embeddings=True))
+
+
+class CachedEmbedder:
+    """Wraps an embedding function with an in-process LRU and one .npy file per text on disk,
+    so texts embedded before (in this process or an earlier one) are not sent to the API again"""
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], List[List[float]]],
+        model: str,
+        directory: Optional[str] = None,
+        maxsize: int = 4096
+    ):
+        """Initialize the embedder
+
+        Args:
+            embed: Function returning one embedding per input text
+            model: Name of the embedding model, part of every key
+            directory: Directory to persist embeddings in, or None to keep them in memory only
+            maxsize: Maximum number of embeddings kept in memory
+        """
+        self.embed = embed
+        self.model = model
+        self.directory = directory
+        self.maxsize = maxsize
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def __call__(self, texts: List[str]) -> List[np.ndarray]:
+        """Return one embedding per text, calling the wrapped function only for unseen texts"""
+        keys = [self._key(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        for i, key in enumerate(keys):
+            with self._lock:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+            if vector is None and self.directory:
+                try:
+                    vector = np.load(os.path.join(self.directory, f"{key}.npy"), allow_pickle=False)
+                    self._remember(key, vector)
+                except (OSError, ValueError):
+                    vector = None
+            vectors[i] = vector
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            for i, embedding in zip(missing, self.embed([texts[i] for i in missing])):
+                vector = np.asarray(embedding, dtype=np.float32)
+                vectors[i] = vector
+                self._remember(keys[i], vector)
+                if self.directory:
+                    try:
+                        np.save(os.path.join(self.directory, f"{keys[i]}.npy"), vector, allow_pickle=False)
+                    except OSError as e:
+                        logger.warning(f"Could not persist embedding {keys[i]}: {e}")
+        return vectors
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of transformation results over normalized embeddings"""
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], List[List[float]]],
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+        path: Optional[str] = None
+    ):
+        """Initialize the cache
+
+        Args:
+            embed: Function returning one embedding per input text
+            threshold: Minimum cosine similarity for a cached result to be reused
+            max_entries: Maximum entries kept per signature; the oldest are dropped first
+            path: Directory to persist the cache in, or None to keep it in memory only
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        # Entries are partitioned by signature (model, formats, document type), which must match exactly
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._responses: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        # Serializes file writes, which happen outside self._lock
+        self._write_lock = threading.Lock()
+        if path:
+            self._load()
+            atexit.register(self.flush)
+
+    @staticmethod
+    def key_covers(document_content: str, template_input_content: str, template_output_content: str) -> bool:
+        """Whether key_text() includes all of the inputs
+
+        Inputs longer than their key window would embed the same as any other input sharing
+        its beginning, so such requests must not use the cache.
+        """
+        return (
+            len(document_content) <= KEY_DOCUMENT_CHARS
+            and len(template_input_content) <= KEY_TEMPLATE_CHARS
+            and len(template_output_content) <= KEY_TEMPLATE_CHARS
+        )
+
+    @staticmethod
+    def key_text(document_content: str, template_input_content: str, template_output_content: str) -> str:
+        """Build the canonical text that is embedded as the cache key"""
+        return "\n\n".join((
+            template_input_content[:KEY_TEMPLATE_CHARS].strip(),
+            template_output_content[:KEY_TEMPLATE_CHARS].strip(),
+            document_content[:KEY_DOCUMENT_CHARS].strip()
+        ))
+
+    def lookup(self, signature: str, text: str) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """Find a cached result for text under signature
+
+        Args:
+            signature: Exact-match part of the key
+            text: Text to embed and compare against cached entries
+
+        Returns:
+            Tuple of the cached result (None on a miss) and the embedding of text, which
+            can be passed to add() to avoid embedding the same text twice
+        """
+        try:
+            vector = np.asarray(self.embed([text])[0], dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Could not embed semantic cache key, skipping cache: {e}")
+            return None, None
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None, None
+        vector = vector / norm
+
+        with self._lock:
+            vectors = self._vectors.get(signature)
+            if vectors is None or not len(vectors):
+                return None, vector
+            scores = vectors @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None, vector
+            logger.info(f"Semantic cache hit with similarity {scores[best]:.4f}")
+            return dict(self._responses[signature][best]), vector
+
+    def add(self, signature: str, vector: np.ndarray, response: Dict[str, Any]) -> None:
+        """Store a result under signature
+
+        Args:
+            signature: Exact-match part of the key
+            vector: Normalized embedding returned by lookup()
+            response: The transformation result to cache
+        """
+        with self._lock:
+            vectors = self._vectors.get(signature)
+            if vectors is None:
+                vectors = np.empty((0, len(vector)), dtype=np.float32)
+            responses = self._responses.setdefault(signature, [])
+            self._vectors[signature] = np.vstack((vectors, vector[None, :]))[-self.max_entries:]
+            responses.append(response)
+            del responses[:-self.max_entries]
+            if self.path and self._save_timer is None:
+                # Persist shortly on a timer thread, so adds neither wait on disk nor each rewrite the cache
+                self._save_timer = threading.Timer(SAVE_DELAY, self._save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self) -> None:
+        """Write pending changes to self.path now"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = None
+            snapshot = self._snapshot()
+        self._write(snapshot)
+
+    def _load(self) -> None:
+        """Load persisted entries from self.path, starting empty if they are missing or unreadable"""
+        vectors_file = os.path.join(self.path, "vectors.npz")
+        responses_file = os.path.join(self.path, "responses.json")
+        if not (os.path.exists(vectors_file) and os.path.exists(responses_file)):
+            return
+        try:
+            with open(responses_file, "r", encoding="utf-8") as f:
+                partitions = json.load(f)
+            with np.load(vectors_file, allow_pickle=False) as arrays:
+                for i, partition in enumerate(partitions):
+                    self._vectors[partition["signature"]] = arrays[f"p{i}"]
+                    self._responses[partition["signature"]] = partition["responses"]
+            logger.info(f"Loaded semantic cache with {sum(map(len, self._responses.values()))} entries")
+        except Exception as e:
+            logger.warning(f"Could not load semantic cache from {self.path}, starting empty: {e}")
+            self._vectors.clear()
+            self._responses.clear()
+
+    def _save(self) -> None:
+        """Persist all entries (runs on the timer thread)"""
+        with self._lock:
+            self._save_timer = None
+            snapshot = self._snapshot()
+        self._write(snapshot)
+
+    def _snapshot(self) -> List[Tuple[str, np.ndarray, List[Dict[str, Any]]]]:
+        """Copy the entries for writing (caller holds the lock); vector arrays are replaced, never modified"""
+        return [(sig, self._vectors[sig], list(self._responses[sig])) for sig in self._vectors]
+
+    def _write(self, partitions: List[Tuple[str, np.ndarray, List[Dict[str, Any]]]]) -> None:
+        """Write a snapshot of the entries to self.path"""
+        try:
+            with self._write_lock:
+                os.makedirs(self.path, exist_ok=True)
+                vectors_tmp = os.path.join(self.path, "vectors.tmp.npz")
+                responses_tmp = os.path.join(self.path, "responses.json.tmp")
+                np.savez(vectors_tmp, **{f"p{i}": vectors for i, (_, vectors, _) in enumerate(partitions)})
+                with open(responses_tmp, "w", encoding="utf-8") as f:
+                    json.dump([{"signature": sig, "responses": responses} for sig, _, responses in partitions], f)
+                os.replace(vectors_tmp, os.path.join(self.path, "vectors.npz"))
+                os.replace(responses_tmp, os.path.join(self.path, "responses.json"))
+        except Exception as e:
+            logger.warning(f"Could not persist semantic cache to {self.path}: {e}")
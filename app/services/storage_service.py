@@ -1,11 +1,30 @@
 import boto3
+import io
 import os
 import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Optional, BinaryIO, Dict, Any
+from typing import Optional, BinaryIO, Dict, Any, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Files above the threshold are uploaded as parallel multipart parts
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+S3_MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+S3_MAX_CONCURRENCY = int(os.getenv('S3_MAX_CONCURRENCY', '10'))
+
+# Worker threads used by upload_many and upload_file_async; the client's connection pool is sized to match
+S3_UPLOAD_WORKERS = int(os.getenv('S3_UPLOAD_WORKERS', '16'))
+
+# A presigned URL is handed out again while at least this fraction of its lifetime remains
+URL_CACHE_MIN_REMAINING = 0.5
+URL_CACHE_MAX_ENTRIES = 4096
+
 class S3StorageService:
     """Service for storing and retrieving files from AWS S3"""
     
@@ -15,9 +34,20 @@ class S3StorageService:
             's3',
             aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
             aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION', 'us-east-1')
+            region_name=os.getenv('AWS_REGION', 'us-east-1'),
+            config=Config(max_pool_connections=max(S3_UPLOAD_WORKERS, S3_MAX_CONCURRENCY))
         )
         self.bucket_name = os.getenv('S3_BUCKET_NAME') or os.getenv('S3_BUCKET')
+        self._transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=S3_MAX_CONCURRENCY,
+            use_threads=True
+        )
+        self._upload_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._url_cache: Dict[Tuple[str, int], Tuple[str, float]] = {}
+        self._url_cache_lock = threading.Lock()
         if not self.bucket_name:
             logger.warning("S3StorageService initialized without a bucket name. Check S3_BUCKET_NAME environment variable.")
         else:
@@ -42,26 +72,71 @@ class S3StorageService:
             }
             
         try:
-            response = self.s3_client.put_object(
-                Body=file_content,
-                Bucket=self.bucket_name,
-                Key=object_key,
-                ContentDisposition=f'attachment; filename="{os.path.basename(object_key)}"'
+            self.s3_client.upload_fileobj(
+                io.BytesIO(file_content),
+                self.bucket_name,
+                object_key,
+                ExtraArgs={"ContentDisposition": f'attachment; filename="{os.path.basename(object_key)}"'},
+                Config=self._transfer_config
             )
             logger.info(f"File uploaded to S3: {object_key}")
             return {
                 "success": True,
                 "object_key": object_key,
-                "location": f"https://{self.bucket_name}.s3.amazonaws.com/{object_key}",
-                "response": response
+                "location": f"https://{self.bucket_name}.s3.amazonaws.com/{object_key}"
             }
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             logger.error(f"Error uploading file to S3: {e}")
             return {
                 "success": False,
                 "error": str(e)
             }
     
+    def upload_many(self, items: List[Tuple[bytes, str]]) -> List[Dict[str, Any]]:
+        """
+        Upload several files to S3 in parallel
+        
+        Args:
+            items: (file_content, object_key) pairs
+            
+        Returns:
+            List of upload_file results, in the order of items
+        """
+        executor = self._get_upload_executor()
+        futures = {
+            executor.submit(self.upload_file, file_content, object_key): i
+            for i, (file_content, object_key) in enumerate(items)
+        }
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        # Collect in completion order so one slow upload does not hold up the others' logging
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+        failed = sum(1 for result in results if not result["success"])
+        logger.info(f"Uploaded {len(items) - failed}/{len(items)} files to S3")
+        return results
+    
+    def upload_file_async(self, file_content: bytes, object_key: str) -> Future:
+        """
+        Upload a file to S3 in the background
+        
+        Args:
+            file_content: Binary content of the file
+            object_key: S3 object key (path)
+            
+        Returns:
+            Future resolving to the upload_file result; call result() only when it is needed
+        """
+        return self._get_upload_executor().submit(self.upload_file, file_content, object_key)
+    
+    def _get_upload_executor(self) -> ThreadPoolExecutor:
+        """Return the upload thread pool, created on first use and kept for later calls"""
+        with self._executor_lock:
+            if self._upload_executor is None:
+                self._upload_executor = ThreadPoolExecutor(
+                    max_workers=S3_UPLOAD_WORKERS, thread_name_prefix="s3-upload"
+                )
+            return self._upload_executor
+    
     def upload_text_file(self, text_content: str, object_key: str, content_type: str = "text/plain") -> Dict[str, Any]:
         """
         Upload a text file to S3 bucket
@@ -82,21 +157,23 @@ class S3StorageService:
             }
             
         try:
-            response = self.s3_client.put_object(
-                Body=text_content,
-                Bucket=self.bucket_name,
-                Key=object_key,
-                ContentType=content_type,
-                ContentDisposition=f'attachment; filename="{os.path.basename(object_key)}"'
+            self.s3_client.upload_fileobj(
+                io.BytesIO(text_content.encode("utf-8")),
+                self.bucket_name,
+                object_key,
+                ExtraArgs={
+                    "ContentType": content_type,
+                    "ContentDisposition": f'attachment; filename="{os.path.basename(object_key)}"'
+                },
+                Config=self._transfer_config
             )
             logger.info(f"Text file uploaded to S3: {object_key}")
             return {
                 "success": True,
                 "object_key": object_key,
-                "location": f"https://{self.bucket_name}.s3.amazonaws.com/{object_key}",
-                "response": response
+                "location": f"https://{self.bucket_name}.s3.amazonaws.com/{object_key}"
             }
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             logger.error(f"Error uploading text file to S3: {e}")
             return {
                 "success": False,
@@ -107,6 +184,8 @@ class S3StorageService:
         """
         Generate a presigned URL for accessing a file
         
+        URLs are cached and handed out again while at least half of their lifetime remains.
+        
         Args:
             object_key: S3 object key
             expires_in: URL expiration time in seconds
@@ -119,6 +198,13 @@ class S3StorageService:
             logger.error(error_msg)
             raise Exception(error_msg)
             
+        key = (object_key, expires_in)
+        now = time.time()
+        with self._url_cache_lock:
+            cached = self._url_cache.get(key)
+        if cached and cached[1] - now >= expires_in * URL_CACHE_MIN_REMAINING:
+            return cached[0]
+            
         try:
             url = self.s3_client.generate_presigned_url(
                 'get_object',
@@ -126,6 +212,12 @@ class S3StorageService:
                 ExpiresIn=expires_in
             )
             logger.info(f"Generated presigned URL for {object_key}")
+            with self._url_cache_lock:
+                if len(self._url_cache) >= URL_CACHE_MAX_ENTRIES:
+                    self._url_cache = {k: v for k, v in self._url_cache.items() if v[1] > now}
+                    if len(self._url_cache) >= URL_CACHE_MAX_ENTRIES:
+                        self._url_cache.clear()
+                self._url_cache[key] = (url, now + expires_in)
             return url
         except ClientError as e:
             logger.error(f"Error generating presigned URL: {e}")
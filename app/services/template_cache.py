@@ -0,0 +1,179 @@
+"""
+Structural cache for document transformation prompts.
+
+Corpora dominated by a few document shapes (invoices, forms, recurring reports) produce
+prompts that differ only in numbers, dates and identifiers. Each answered prompt is turned
+into a template by masking those values. A later prompt with the same template reuses the
+response only when that is safe: its values are all unchanged, or none of the values that
+changed appear in the cached response. Values are never substituted into a response, since
+the model may have computed or reformatted them (totals, dates, separators).
+"""
+
+import os
+import re
+import json
+import atexit
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Values masked out of prompts: UUIDs, then digit runs joined by date/number punctuation
+VALUE_PATTERN = r"[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}|\d+(?:[.,:/-]\d+)*"
+_VALUE_RE = re.compile(VALUE_PATTERN)
+
+# Seconds between an add() and the write to disk; later adds in that window share the write
+SAVE_DELAY = 5.0
+
+
+class _Template:
+    """The values and response a masked prompt was learned from"""
+
+    __slots__ = ("values", "response", "freq")
+
+    def __init__(self, values: List[str], response: Dict[str, Any], freq: int = 1):
+        self.values = values
+        self.response = response
+        self.freq = freq
+
+
+def _mask(user_prompt: str) -> Tuple[str, List[str]]:
+    """Split a prompt into the hash of its masked text and the values that were masked"""
+    parts = _VALUE_RE.split(user_prompt)
+    values = _VALUE_RE.findall(user_prompt)
+    digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+    return digest, values
+
+
+class TemplateCache:
+    """Templates of answered prompts, grouped by system prompt and keyed by a hash of the masked prompt
+
+    Only the hashes, the masked values and the responses are kept, so the document text of
+    the prompts is never held in memory or written to disk.
+    """
+
+    def __init__(self, max_templates: int = 256, path: Optional[str] = None):
+        """Initialize the cache
+
+        Args:
+            max_templates: Maximum templates kept per system prompt; the least used are dropped
+            path: JSON file to persist templates in, or None to keep them in memory only
+        """
+        self.max_templates = max_templates
+        self.path = path
+        self._templates: Dict[str, "OrderedDict[str, _Template]"] = {}
+        self._lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        # Serializes file writes, which happen outside self._lock
+        self._write_lock = threading.Lock()
+        if path:
+            self._load()
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _group(system_prompt: str) -> str:
+        return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+    def match(self, system_prompt: str, user_prompt: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for a prompt with a known template, or None when it may not apply"""
+        digest, values = _mask(user_prompt)
+        with self._lock:
+            template = self._templates.get(self._group(system_prompt), {}).get(digest)
+            if template is None or len(template.values) != len(values):
+                return None
+            response = template.response
+            changed = [old for old, new in zip(template.values, values) if old != new]
+            if changed:
+                content = response.get("content")
+                text = content if isinstance(content, str) else json.dumps(content)
+                # A changed value that shows up in the response may have shaped it; only the model can redo that
+                if any(old in text for old in changed):
+                    return None
+            template.freq += 1
+            return dict(response)
+
+    def add(self, system_prompt: str, user_prompt: str, response: Dict[str, Any]) -> None:
+        """Learn a template from an answered prompt"""
+        digest, values = _mask(user_prompt)
+        if not values:
+            # Nothing varies, so the exact-match response cache already covers this prompt
+            return
+        with self._lock:
+            templates = self._templates.setdefault(self._group(system_prompt), OrderedDict())
+            if digest in templates:
+                return
+            templates[digest] = _Template(values, dict(response))
+            if len(templates) > self.max_templates:
+                least_used = min(templates, key=lambda key: templates[key].freq)
+                del templates[least_used]
+            if self.path:
+                self._schedule_save()
+
+    def flush(self) -> None:
+        """Write pending changes to self.path now"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            snapshot = self._snapshot()
+        self._write(snapshot)
+
+    def _schedule_save(self) -> None:
+        """Arrange for a write shortly, off the request path (caller holds the lock)"""
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(SAVE_DELAY, self._save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save(self) -> None:
+        """Persist all templates (runs on the timer thread)"""
+        with self._lock:
+            self._save_timer = None
+            snapshot = self._snapshot()
+        self._write(snapshot)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """Copy the templates into their persisted form (caller holds the lock)"""
+        return {
+            group: {
+                digest: {"values": t.values, "response": t.response, "freq": t.freq}
+                for digest, t in templates.items()
+            }
+            for group, templates in self._templates.items()
+        }
+
+    def _load(self) -> None:
+        """Load persisted templates from self.path, starting empty if missing or unreadable"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                groups = json.load(f)
+            for group, entries in groups.items():
+                if not isinstance(entries, dict):
+                    # Older files stored the prompt text itself; they are not read back
+                    continue
+                self._templates[group] = OrderedDict(
+                    (digest, _Template(e["values"], e["response"], e["freq"])) for digest, e in entries.items()
+                )
+            logger.info(f"Loaded template cache with {sum(map(len, self._templates.values()))} templates")
+        except Exception as e:
+            logger.warning(f"Could not load template cache from {self.path}, starting empty: {e}")
+            self._templates.clear()
+
+    def _write(self, groups: Dict[str, Any]) -> None:
+        """Write persisted templates to self.path atomically"""
+        try:
+            with self._write_lock:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+                    json.dump(groups, f)
+                os.replace(f"{self.path}.tmp", self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist template cache to {self.path}: {e}")
@@ -2,8 +2,7 @@
 """
 Client runner script for document management
 """
-import sys
-from app.scripts.client.document_client import main
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    from app.scripts.client.document_client import main
+    main()
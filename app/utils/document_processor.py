@@ -1,47 +1,67 @@
+import asyncio
+import importlib
+import importlib.util
+import io
 import os
 import re
 import shutil
+import tempfile
 import json
 import logging
+import mmap
+import multiprocessing
 import numpy as np
+import threading
 import time
-import uuid
+from collections import OrderedDict
+from itertools import chain, islice
+from concurrent.futures import FIRST_EXCEPTION, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 from dotenv import load_dotenv
 
-# Try to import various document processing libraries
-# If any fail, we'll handle it gracefully
-try:
-    import PyPDF2
-    PYPDF2_AVAILABLE = True
-except ImportError:
-    PYPDF2_AVAILABLE = False
-
-try:
-    import docx
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-
-try:
-    import openpyxl
-    OPENPYXL_AVAILABLE = True
-except ImportError:
-    OPENPYXL_AVAILABLE = False
-
-try:
-    import boto3
-    BOTO3_AVAILABLE = True
-except ImportError:
-    BOTO3_AVAILABLE = False
+# Document processing libraries are imported on first use rather than here: together they
+# add hundreds of milliseconds to startup, and most requests need only one of them.
+# The *_AVAILABLE flags only check that the package is installed.
+
+
+class _LazyModule:
+    """Stand-in for a module that imports it on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+
+def _installed(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+PYPDF2_AVAILABLE = _installed('PyPDF2')
+PyPDF2 = _LazyModule('PyPDF2')
+
+# PyMuPDF: MuPDF's C parser, much faster than PyPDF2 when installed
+FITZ_AVAILABLE = _installed('fitz')
+fitz = _LazyModule('fitz')
+
+DOCX_AVAILABLE = _installed('docx')
+docx = _LazyModule('docx')
+
+PANDAS_AVAILABLE = _installed('pandas')
+pd = _LazyModule('pandas')
+
+# Multithreaded CSV reader, for metadata and structure without a DataFrame
+PYARROW_AVAILABLE = _installed('pyarrow')
+pa = _LazyModule('pyarrow')
+pacsv = _LazyModule('pyarrow.csv')
+pc = _LazyModule('pyarrow.compute')
+
+OPENPYXL_AVAILABLE = _installed('openpyxl')
+openpyxl = _LazyModule('openpyxl')
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -54,6 +74,36 @@ use_s3 = os.getenv('USE_S3_STORAGE', 'false').lower() == 'true'
 s3_client = None
 s3_bucket = os.getenv('S3_BUCKET_NAME') or os.getenv('S3_BUCKET')
 
+# boto3 is slow to import, so it is only loaded when S3 storage is enabled
+BOTO3_AVAILABLE = False
+AIOBOTO3_AVAILABLE = False
+if use_s3:
+    try:
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+        from botocore.exceptions import ClientError
+        BOTO3_AVAILABLE = True
+    except ImportError:
+        pass
+
+    # Optional async S3 client, lets many small objects be fetched concurrently on one event loop
+    try:
+        import aioboto3
+        AIOBOTO3_AVAILABLE = True
+    except ImportError:
+        pass
+
+# Parallel range GETs, multipart uploads and concurrent fetches all share the client's pool,
+# which botocore caps at 10 connections by default
+S3_MAX_POOL_CONNECTIONS = int(os.getenv('S3_MAX_POOL_CONNECTIONS', '64'))
+_S3_CLIENT_CFG = Config(
+    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    tcp_keepalive=True,
+    s3={'addressing_style': 'virtual'}
+) if BOTO3_AVAILABLE else None
+
 if use_s3:
     if not BOTO3_AVAILABLE:
         logger.warning("S3 storage enabled but boto3 is not installed. Install with: pip install boto3")
@@ -62,7 +112,8 @@ if use_s3:
             s3_client = boto3.client('s3',
                 aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
                 aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                region_name=os.getenv('AWS_REGION', 'us-east-1')
+                region_name=os.getenv('AWS_REGION', 'us-east-1'),
+                config=_S3_CLIENT_CFG
             )
             if s3_bucket:
                 logger.info(f"S3 client initialized for bucket: {s3_bucket}")
@@ -72,28 +123,361 @@ if use_s3:
             logger.error(f"Failed to initialize S3 client: {e}")
             s3_client = None
 
+# One session for all async S3 work; clients are opened per batch of requests, never per file
+aioboto3_session = aioboto3.Session(
+    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+    region_name=os.getenv('AWS_REGION', 'us-east-1')
+) if use_s3 and s3_client and AIOBOTO3_AVAILABLE else None
+
+# Objects at or above the threshold go through the transfer manager as parallel multipart parts;
+# smaller ones keep the single put_object request, which has lower latency
+S3_MULTIPART_THRESHOLD = 8 << 20
+_S3_TRANSFER_CFG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=16 << 20,
+    max_concurrency=10,
+    use_threads=True
+) if BOTO3_AVAILABLE else None
+
+
+def _upload_to_s3(object_key: str, data: bytes) -> None:
+    """Upload bytes to the configured bucket, using multipart for large objects"""
+    if len(data) < S3_MULTIPART_THRESHOLD:
+        s3_client.put_object(Bucket=s3_bucket, Key=object_key, Body=data)
+    else:
+        s3_client.upload_fileobj(io.BytesIO(data), s3_bucket, object_key, Config=_S3_TRANSFER_CFG)
+
+
+# Batches of saves run on this many threads, so their PUT round trips overlap
+S3_SAVE_WORKERS = 16
+_save_executor: Optional[ThreadPoolExecutor] = None
+_save_executor_lock = threading.Lock()
+
+
+def _get_save_executor() -> ThreadPoolExecutor:
+    """Return the save thread pool, created on first use and kept for later calls"""
+    global _save_executor
+    with _save_executor_lock:
+        if _save_executor is None:
+            _save_executor = ThreadPoolExecutor(max_workers=S3_SAVE_WORKERS, thread_name_prefix="s3-save")
+        return _save_executor
+
+# Large text uploads are encoded this many characters at a time into a spooled buffer that
+# moves to disk past S3_MULTIPART_THRESHOLD bytes, so the full UTF-8 copy is never held in memory
+S3_TEXT_ENCODE_CHUNK = 1 << 20
+
+
+def _upload_text_to_s3(object_key: str, text: str) -> None:
+    """Upload a string as UTF-8, encoding large strings incrementally instead of all at once"""
+    if len(text) * 4 < S3_MULTIPART_THRESHOLD:
+        # Small enough that even the worst-case encoded size stays under the threshold
+        _upload_to_s3(object_key, text.encode('utf-8'))
+        return
+    with tempfile.SpooledTemporaryFile(max_size=S3_MULTIPART_THRESHOLD) as buffer:
+        for start in range(0, len(text), S3_TEXT_ENCODE_CHUNK):
+            buffer.write(text[start:start + S3_TEXT_ENCODE_CHUNK].encode('utf-8'))
+        size = buffer.tell()
+        buffer.seek(0)
+        if size < S3_MULTIPART_THRESHOLD:
+            s3_client.put_object(Bucket=s3_bucket, Key=object_key, Body=buffer.read())
+        else:
+            s3_client.upload_fileobj(buffer, s3_bucket, object_key, Config=_S3_TRANSFER_CFG)
+
+
+# Large objects are downloaded as concurrent byte-range GETs of this size
+S3_RANGE_PART_SIZE = 8 << 20
+S3_RANGE_WORKERS = 8
+_s3_range_executor: Optional[ThreadPoolExecutor] = None
+_s3_range_executor_lock = threading.Lock()
+
+
+def stores_files_in_s3() -> bool:
+    """Whether saved files live in S3, where every dyno can read them, rather than on local disk"""
+    return bool(use_s3 and s3_client)
+
+def _get_s3_range(object_key: str, start: int, end: int) -> Dict[str, Any]:
+    """GET bytes start..end (inclusive) of an object"""
+    return s3_client.get_object(Bucket=s3_bucket, Key=object_key, Range=f"bytes={start}-{end}")
+
+
+def _get_s3_object_parallel(object_key: str) -> bytes:
+    """Download an object, fetching parts beyond the first concurrently
+
+    The first part is requested on its own; its Content-Range reveals the object size, so
+    small objects take a single request and no HEAD round trip is needed.
+    """
+    global _s3_range_executor
+    try:
+        first = _get_s3_range(object_key, 0, S3_RANGE_PART_SIZE - 1)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "InvalidRange":
+            raise
+        # Empty objects cannot satisfy any range
+        return s3_client.get_object(Bucket=s3_bucket, Key=object_key)['Body'].read()
+    head = first['Body'].read()
+    size = int(first['ContentRange'].rsplit('/', 1)[1])
+    if size <= len(head):
+        return head
+
+    with _s3_range_executor_lock:
+        if _s3_range_executor is None:
+            _s3_range_executor = ThreadPoolExecutor(max_workers=S3_RANGE_WORKERS, thread_name_prefix="s3-range")
+    content = bytearray(size)
+    content[:len(head)] = head
+
+    def fetch(start: int) -> None:
+        end = min(start + S3_RANGE_PART_SIZE, size) - 1
+        part = _get_s3_range(object_key, start, end)['Body'].read()
+        if len(part) != end + 1 - start:
+            raise IOError(f"Short read of bytes {start}-{end} of {object_key}")
+        content[start:end + 1] = part
+
+    futures = [_s3_range_executor.submit(fetch, start) for start in range(len(head), size, S3_RANGE_PART_SIZE)]
+    for future in futures:
+        future.result()
+    return bytes(content)
+
+
+# PDFs with more pages than this have their text extracted by worker processes, in page ranges
+PDF_PARALLEL_MIN_PAGES = 32
+# os.cpu_count() reports the host's cores on shared dynos, not this process's share, so keep the default small
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", "2"))
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+_pdf_executor_lock = threading.Lock()
+
+
+def _map_file(path: str) -> Union[mmap.mmap, io.BytesIO]:
+    """Open a local file as a read-only memory map, so parsers read it from the page cache
+    without first copying it into a bytes object
+
+    Args:
+        path: Path of the local file
+
+    Returns:
+        Union[mmap.mmap, io.BytesIO]: The mapping (an empty stream for empty files, which cannot be mapped)
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return io.BytesIO()
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+        # Parsers mostly scan front to back, so let the kernel read ahead aggressively
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return mapped
+
+
+def _stat_or_none(path: str) -> Optional[os.stat_result]:
+    """Stat a local path, returning None instead of raising when it does not exist"""
+    try:
+        return os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _pdf_reader(source: Any) -> Any:
+    """Open a PyPDF2 reader, memory-mapping local paths (PyPDF2 reads a path fully into memory)"""
+    return PyPDF2.PdfReader(_map_file(source) if isinstance(source, str) else source)
+
+
+def _extract_pdf_page_range(source: Union[str, bytes], first: int, last: int) -> List[str]:
+    """Extract the text of pages first..last-1 of a PDF (runs in a worker process)
+
+    Args:
+        source: Path of the PDF, or its content
+        first: Index of the first page
+        last: Index one past the last page
+
+    Returns:
+        List[str]: Text of each page in the range
+    """
+    if FITZ_AVAILABLE:
+        doc = fitz.open(source, filetype='pdf') if isinstance(source, str) else fitz.open(stream=source, filetype='pdf')
+        with doc:
+            if doc.needs_pass:
+                doc.authenticate('')
+            return [doc[i].get_text('text') for i in range(first, last)]
+    pdf_reader = _pdf_reader(source if isinstance(source, str) else io.BytesIO(source))
+    if pdf_reader.is_encrypted:
+        pdf_reader.decrypt('')
+    return [pdf_reader.pages[i].extract_text() for i in range(first, last)]
+
+
+def _extract_pdf_pages_parallel(source: Union[str, io.BytesIO], page_count: int) -> List[str]:
+    """Extract the text of every page of a PDF, splitting the pages across worker processes
+
+    Page parsing is CPU-bound Python (PyPDF2), and PyMuPDF documents cannot be shared
+    between threads, so each worker reopens the PDF and extracts one contiguous range.
+    Workers are started by a forkserver rather than forked from this process, whose other
+    threads (S3, Redis, embedding) may hold locks at the moment of a fork.
+
+    Args:
+        source: Path of the PDF, or an in-memory stream of it
+        page_count: Number of pages in the PDF
+
+    Returns:
+        List[str]: Text of each page, in page order
+    """
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            _pdf_executor = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("forkserver")
+            )
+
+    spilled = None
+    if not isinstance(source, str):
+        # Workers get a path to open rather than a pickled copy of the whole PDF per task
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(source.getbuffer())
+            spilled = f.name
+        source = spilled
+    try:
+        step = -(-page_count // PDF_EXTRACTION_WORKERS)
+        futures = [
+            _pdf_executor.submit(_extract_pdf_page_range, source, first, min(first + step, page_count))
+            for first in range(0, page_count, step)
+        ]
+        return [text for future in futures for text in future.result()]
+    finally:
+        if spilled:
+            os.remove(spilled)
+
+
+# Excel column types are inferred from this many data rows instead of parsing whole sheets
+EXCEL_TYPE_SAMPLE_ROWS = 200
+
+
+def _infer_column_type(values: List[Any]) -> str:
+    """Classify sampled cell values like the pandas dtype checks: integer, float, datetime or string"""
+    values = [value for value in values if value is not None]
+    if not values:
+        # An empty column is all NaN to pandas, which is a float column
+        return "float"
+    if all(isinstance(value, (int, float)) for value in values):
+        if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+            return "integer"
+        return "float"
+    if all(isinstance(value, datetime) for value in values):
+        return "datetime"
+    return "string"
+
+# CSV structure analysis parses at most this many rows; larger files have their rows counted from newlines
+CSV_SAMPLE_ROWS = 10000
+
+
+def _count_csv_rows(source: Union[str, io.BytesIO]) -> int:
+    """Count the data rows of a CSV by counting newlines, without parsing it
+
+    Quoted fields spanning lines and blank lines are counted as rows, so for such
+    files this is an estimate.
+
+    Args:
+        source: Path of the CSV, or an in-memory stream of it positioned at the start
+
+    Returns:
+        int: Number of lines after the header
+    """
+    stream = _map_file(source) if isinstance(source, str) else source
+    lines = 0
+    last = b''
+    while True:
+        block = stream.read(1 << 20)
+        if not block:
+            break
+        lines += block.count(b'\n')
+        last = block[-1:]
+    if last and last != b'\n':
+        # Last line has no terminating newline
+        lines += 1
+    return max(lines - 1, 0)
+
+class _LRUCache:
+    """Small thread-safe LRU cache, optionally expiring entries after `ttl` seconds"""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if self.ttl is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl or 0))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# Extraction results keyed by (kind, path, file version), so unchanged files are parsed once
+EXTRACTION_CACHE_SIZE = 512
+# S3 HEAD responses are reused briefly so size and version checks share one round trip
+S3_HEAD_CACHE_SIZE = 1024
+S3_HEAD_CACHE_TTL = 30  # seconds
+
+# Leading bytes identifying file types, for files stored without an extension
+_MAGIC_SIGNATURES = {
+    b'%PDF': '.pdf',
+    b'PK\x03\x04': '.docx',
+    b'\xd0\xcf\x11\xe0': '.doc',
+    b'{': '.json',
+    b'<': '.xml',
+}
+# Files without an extension are sniffed from this many leading bytes
+SNIFF_BYTES = 4096
+
+# Characters replaced with '_' when building stored filenames
+_SAFE_RE = re.compile(r'[^\w\.-]')
+
+# Leaf types that never contain NumPy values, so the walk below does not visit them
+_PLAIN_TYPES = frozenset((str, int, float, bool, type(None)))
+
 
 def convert_numpy_to_python(obj):
     """Convert NumPy types to Python native types for JSON serialization.
     
+    Walks nested dicts and lists with an explicit stack, so deeply nested payloads
+    cannot hit the recursion limit. Containers are copied; the input is not modified.
+    
     Args:
         obj: Object potentially containing NumPy types
         
     Returns:
         Object with NumPy types converted to Python native types
     """
-    if isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {k: convert_numpy_to_python(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_to_python(i) for i in obj]
-    else:
-        return obj
+    root = [obj]
+    # Each frame is (container, key, value): value gets converted and stored at container[key]
+    stack = [(root, 0, obj)]
+    while stack:
+        parent, key, value = stack.pop()
+        if isinstance(value, dict):
+            converted = dict(value)
+            stack.extend((converted, k, v) for k, v in converted.items() if type(v) not in _PLAIN_TYPES)
+        elif isinstance(value, list):
+            converted = list(value)
+            stack.extend((converted, i, v) for i, v in enumerate(converted) if type(v) not in _PLAIN_TYPES)
+        elif isinstance(value, (np.integer, np.floating)):
+            converted = value.item()
+        elif isinstance(value, np.ndarray):
+            # tolist() already yields native scalars, so its output is not walked again
+            converted = value.tolist()
+        else:
+            continue
+        parent[key] = converted
+    return root[0]
 
 
 class DocumentProcessor:
@@ -106,6 +490,8 @@ class DocumentProcessor:
             upload_dir: Directory to store uploaded files
         """
         self.upload_dir = upload_dir
+        self._extraction_cache = _LRUCache(EXTRACTION_CACHE_SIZE)
+        self._s3_head_cache = _LRUCache(S3_HEAD_CACHE_SIZE, S3_HEAD_CACHE_TTL)
         
         # Create upload directory if it doesn't exist (for local storage)
         if not use_s3:
@@ -125,13 +511,7 @@ class DocumentProcessor:
         Returns:
             str: Path where the file is saved (local path or S3 key)
         """
-        # Create a safe filename
-        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = re.sub(r'[^\w\.-]', '_', filename)
-        safe_filename = f"{current_time}_{safe_filename}"
-        
-        # Create user-specific directory
-        user_dir = os.path.join(self.upload_dir, str(user_id))
+        user_dir, safe_filename = self._upload_location(filename, user_id)
         
         if use_s3 and s3_client:
             # Save to S3
@@ -141,11 +521,7 @@ class DocumentProcessor:
                     raise ValueError("S3 bucket name not configured. Check S3_BUCKET_NAME environment variable.")
                     
                 object_key = f"{user_dir}/{safe_filename}"
-                s3_client.put_object(
-                    Bucket=s3_bucket,
-                    Key=object_key,
-                    Body=file_content
-                )
+                _upload_to_s3(object_key, file_content)
                 logger.info(f"Saved file to S3: {object_key}")
                 return object_key
             except Exception as e:
@@ -170,6 +546,51 @@ class DocumentProcessor:
                 logger.error(f"Error saving file locally: {e}")
                 raise
 
+    def save_file_async(self, file_content: bytes, filename: str, user_id: int) -> Future:
+        """Save a file in the background.
+        
+        Args:
+            file_content: The file content as bytes
+            filename: The original filename
+            user_id: ID of the user uploading the file
+            
+        Returns:
+            Future: Resolves to the save_file result; call result() only when the path is needed
+        """
+        return _get_save_executor().submit(self.save_file, file_content, filename, user_id)
+
+    def save_many(self, files: List[Tuple[bytes, str]], user_id: int) -> List[str]:
+        """Save several files concurrently, overlapping their S3 requests.
+        
+        Args:
+            files: (file_content, filename) pairs
+            user_id: ID of the user uploading the files
+            
+        Returns:
+            List[str]: Path of each saved file, in the order of files
+        """
+        futures = [self.save_file_async(file_content, filename, user_id) for file_content, filename in files]
+        # Raise at the first failure without waiting for the rest; those still finish in the background
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            if future.exception() is not None:
+                raise future.exception()
+        return [future.result() for future in futures]
+
+    def _upload_location(self, filename: str, user_id: int) -> Tuple[str, str]:
+        """Build the user directory and timestamped safe filename for an uploaded file.
+        
+        Args:
+            filename: The original filename
+            user_id: ID of the user uploading the file
+            
+        Returns:
+            Tuple[str, str]: The user directory and the safe filename
+        """
+        current_time = time.strftime("%Y%m%d_%H%M%S")
+        safe_filename = _SAFE_RE.sub('_', filename)
+        return os.path.join(self.upload_dir, str(user_id)), f"{current_time}_{safe_filename}"
+
     def save_transformed_file(self, file_content: str, file_type: str, original_document_title: str, user_id: int) -> str:
         """Save a transformed file (text content) to the appropriate storage.
         
@@ -183,8 +604,8 @@ class DocumentProcessor:
             str: Path where the file is saved (local path or S3 key)
         """
         # Create a filename based on the original document title
-        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_title = re.sub(r'[^\w\.-]', '_', original_document_title)
+        current_time = time.strftime("%Y%m%d_%H%M%S")
+        safe_title = _SAFE_RE.sub('_', original_document_title)
         safe_filename = f"{current_time}_{safe_title}_transformed.{file_type}"
         
         # Create user-specific directory
@@ -198,11 +619,7 @@ class DocumentProcessor:
                     raise ValueError("S3 bucket name not configured. Check S3_BUCKET_NAME environment variable.")
                     
                 object_key = f"{user_dir}/{safe_filename}"
-                s3_client.put_object(
-                    Bucket=s3_bucket,
-                    Key=object_key,
-                    Body=file_content.encode('utf-8')  # Convert string to bytes
-                )
+                _upload_text_to_s3(object_key, file_content)
                 logger.info(f"Saved transformed file to S3: {object_key}")
                 return object_key
             except Exception as e:
@@ -227,45 +644,224 @@ class DocumentProcessor:
                 logger.error(f"Error saving transformed file locally: {e}")
                 raise
 
-    def get_file_content(self, file_path: str) -> bytes:
+    def get_file_content(self, file_path: str, as_stream: bool = False) -> Union[bytes, mmap.mmap, io.BytesIO]:
         """Get file content from the appropriate storage.
         
         Args:
             file_path: Path to the file (local path or S3 key)
+            as_stream: Return a readable, seekable stream instead of bytes: a read-only
+                memory map for local files, an in-memory stream for S3 objects
             
         Returns:
-            bytes: The file content
+            Union[bytes, mmap.mmap, io.BytesIO]: The file content
         """
-        if use_s3 and s3_client and not os.path.exists(file_path):
-            # File is in S3
-            try:
-                # Check if bucket name is configured
-                if not s3_bucket:
-                    raise ValueError("S3 bucket name not configured. Check S3_BUCKET_NAME environment variable.")
-                    
-                response = s3_client.get_object(
-                    Bucket=s3_bucket,
-                    Key=file_path
-                )
-                content = response['Body'].read()
-                logger.info(f"Retrieved file from S3: {file_path}")
-                return content
-            except Exception as e:
-                logger.error(f"Error retrieving file from S3: {e}")
-                raise
-        else:
-            # File is local
-            try:
+        # Open the path directly: a missing local file is what sends the read to S3, and
+        # finding that out from open() saves a separate stat call per read
+        try:
+            if as_stream:
+                content = _map_file(file_path)
+            else:
                 with open(file_path, 'rb') as f:
                     content = f.read()
-                logger.info(f"Retrieved file locally: {file_path}")
-                return content
-            except Exception as e:
+        except FileNotFoundError as e:
+            if not (use_s3 and s3_client):
                 logger.error(f"Error retrieving file locally: {e}")
                 raise
+            content = None
+        except Exception as e:
+            logger.error(f"Error retrieving file locally: {e}")
+            raise
+        if content is not None:
+            logger.info(f"Retrieved file locally: {file_path}")
+            return content
+        
+        # File is in S3
+        try:
+            # Check if bucket name is configured
+            if not s3_bucket:
+                raise ValueError("S3 bucket name not configured. Check S3_BUCKET_NAME environment variable.")
+                
+            content = _get_s3_object_parallel(file_path)
+            logger.info(f"Retrieved file from S3: {file_path}")
+            return io.BytesIO(content) if as_stream else content
+        except Exception as e:
+            logger.error(f"Error retrieving file from S3: {e}")
+            raise
+
+    async def asave_file(self, file_content: bytes, filename: str, user_id: int, s3: Any = None) -> str:
+        """Async twin of save_file.
+        
+        Args:
+            file_content: The file content as bytes
+            filename: The original filename
+            user_id: ID of the user uploading the file
+            s3: An open aioboto3 S3 client to share across calls; without one the
+                synchronous client runs in a worker thread
+            
+        Returns:
+            str: Path where the file is saved (local path or S3 key)
+        """
+        if s3 is None or not (use_s3 and s3_client and s3_bucket):
+            return await asyncio.to_thread(self.save_file, file_content, filename, user_id)
+        user_dir, safe_filename = self._upload_location(filename, user_id)
+        object_key = f"{user_dir}/{safe_filename}"
+        await s3.put_object(Bucket=s3_bucket, Key=object_key, Body=file_content)
+        logger.info(f"Saved file to S3: {object_key}")
+        return object_key
+
+    async def aget_file_content(self, file_path: str, s3: Any = None) -> bytes:
+        """Async twin of get_file_content.
+        
+        Args:
+            file_path: Path to the file (local path or S3 key)
+            s3: An open aioboto3 S3 client to share across calls; without one the
+                synchronous client runs in a worker thread
+            
+        Returns:
+            bytes: The file content
+        """
+        if s3 is None or not (use_s3 and s3_client and s3_bucket) or os.path.exists(file_path):
+            return await asyncio.to_thread(self.get_file_content, file_path)
+        response = await s3.get_object(Bucket=s3_bucket, Key=file_path)
+        async with response['Body'] as stream:
+            content = await stream.read()
+        logger.info(f"Retrieved file from S3: {file_path}")
+        return content
+
+    async def aget_file_size(self, file_path: str, s3: Any = None) -> int:
+        """Async twin of _get_file_size.
+        
+        Args:
+            file_path: Path to the file (local path or S3 key)
+            s3: An open aioboto3 S3 client to share across calls
+            
+        Returns:
+            int: File size in bytes
+        """
+        if s3 is None or not (use_s3 and s3_client and s3_bucket) or os.path.exists(file_path):
+            return await asyncio.to_thread(self._get_file_size, file_path)
+        try:
+            response = await s3.head_object(Bucket=s3_bucket, Key=file_path)
+            return response['ContentLength']
+        except Exception as e:
+            logger.error(f"Error getting file size from S3: {e}")
+            return 0
+
+    def get_many_file_contents(self, file_paths: List[str]) -> List[bytes]:
+        """Fetch several files concurrently, from synchronous code.
+        
+        Args:
+            file_paths: Paths to the files (local paths or S3 keys)
+            
+        Returns:
+            List[bytes]: The content of each file, in order
+        """
+        return asyncio.run(self._aget_many_file_contents(file_paths))
+
+    async def _aget_many_file_contents(self, file_paths: List[str]) -> List[bytes]:
+        """Fetch several files concurrently over a single async S3 client when available."""
+        if aioboto3_session is None:
+            return await asyncio.gather(*[self.aget_file_content(path) for path in file_paths])
+        async with aioboto3_session.client('s3', config=_S3_CLIENT_CFG) as s3:
+            return await asyncio.gather(*[self.aget_file_content(path, s3) for path in file_paths])
 
     def extract_text(self, file_path: str) -> str:
-        """Extract text content from a document file.
+        """Extract text content from a document file, reusing the result while the file is unchanged.
+        
+        Args:
+            file_path: Path to the document file
+            
+        Returns:
+            str: Extracted text content
+        """
+        return self._cached_extraction("text", file_path, self._extract_text)
+
+    def extract_metadata(self, file_path: str) -> Dict[str, Any]:
+        """Extract metadata from a document file, reusing the result while the file is unchanged.
+        
+        Args:
+            file_path: Path to the document file
+            
+        Returns:
+            Dict[str, Any]: Extracted metadata
+        """
+        return self._cached_extraction("metadata", file_path, self._extract_metadata)
+
+    def get_document_structure(self, file_path: str) -> Dict[str, Any]:
+        """Analyze the document's structure, reusing the result while the file is unchanged.
+        
+        Args:
+            file_path: Path to the document file
+            
+        Returns:
+            Dict[str, Any]: Document structure information
+        """
+        return self._cached_extraction("structure", file_path, self._get_document_structure)
+
+    def _cached_extraction(self, kind: str, file_path: str, extract: Any) -> Any:
+        """Return a cached extraction result for the current version of a file, computing it on a miss.
+        
+        Args:
+            kind: Which extraction this is, part of the cache key
+            file_path: Path to the document file
+            extract: Function computing the result from file_path
+            
+        Returns:
+            The extraction result (a copy, for dicts)
+        """
+        version = self._file_version(file_path)
+        if version is None:
+            return extract(file_path)
+        key = (kind, file_path, version)
+        result = self._extraction_cache.get(key)
+        if result is None:
+            result = extract(file_path)
+            # Failures are not cached, so a later call retries them
+            failed = "error" in result if isinstance(result, dict) else result.startswith("Error")
+            if failed:
+                return result
+            self._extraction_cache.set(key, result)
+        return dict(result) if isinstance(result, dict) else result
+
+    def _file_version(self, file_path: str) -> Optional[str]:
+        """Identify the current version of a file: modification time and size locally, ETag in S3.
+        
+        Args:
+            file_path: Path to the file (local path or S3 key)
+            
+        Returns:
+            Optional[str]: The version, or None if it cannot be determined
+        """
+        try:
+            stat = _stat_or_none(file_path)
+            if stat is not None:
+                return f"{stat.st_mtime_ns}:{stat.st_size}"
+            if use_s3 and s3_client:
+                return self._head_s3_object(file_path)['ETag']
+            return None
+        except Exception as e:
+            logger.warning(f"Could not determine version of {file_path}, not caching: {e}")
+            return None
+
+    def _head_s3_object(self, object_key: str) -> Dict[str, Any]:
+        """HEAD an S3 object, reusing a response fetched in the last few seconds.
+        
+        Args:
+            object_key: S3 object key
+            
+        Returns:
+            Dict[str, Any]: The head_object response
+        """
+        if not s3_bucket:
+            raise ValueError("S3 bucket name not configured. Check S3_BUCKET_NAME environment variable.")
+        response = self._s3_head_cache.get(object_key)
+        if response is None:
+            response = s3_client.head_object(Bucket=s3_bucket, Key=object_key)
+            self._s3_head_cache.set(object_key, response)
+        return response
+
+    def _extract_text(self, file_path: str) -> str:
+        """Extract text content from a document file (uncached).
         
         Args:
             file_path: Path to the document file
@@ -283,8 +879,7 @@ class DocumentProcessor:
             else:
                 # Handle files without extensions
                 # Try to infer type from first few bytes
-                file_content = self.get_file_content(file_path)
-                file_ext = self._infer_file_type(file_content)
+                file_ext = self._cached_extraction("file_type", file_path, self._sniff_file_type)
                 
             # Process based on file type
             if file_ext == '.pdf':
@@ -318,8 +913,8 @@ class DocumentProcessor:
             logger.error(f"Error extracting text from {file_path}: {e}")
             return f"Error extracting text: {str(e)}"
 
-    def extract_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Extract metadata from a document file.
+    def _extract_metadata(self, file_path: str) -> Dict[str, Any]:
+        """Extract metadata from a document file (uncached).
         
         Args:
             file_path: Path to the document file
@@ -334,8 +929,7 @@ class DocumentProcessor:
             else:
                 # Handle files without extensions
                 # Try to infer type from first few bytes
-                file_content = self.get_file_content(file_path)
-                file_ext = self._infer_file_type(file_content)
+                file_ext = self._cached_extraction("file_type", file_path, self._sniff_file_type)
             
             # Basic metadata
             metadata = {
@@ -346,7 +940,7 @@ class DocumentProcessor:
             }
             
             # Add specific metadata by file type
-            if file_ext == '.pdf' and PYPDF2_AVAILABLE:
+            if file_ext == '.pdf' and (FITZ_AVAILABLE or PYPDF2_AVAILABLE):
                 pdf_metadata = self._extract_pdf_metadata(file_path)
                 metadata.update(pdf_metadata)
             elif file_ext in ['.doc', '.docx'] and DOCX_AVAILABLE:
@@ -365,8 +959,8 @@ class DocumentProcessor:
             logger.error(f"Error extracting metadata from {file_path}: {e}")
             return {"error": str(e)}
 
-    def get_document_structure(self, file_path: str) -> Dict[str, Any]:
-        """Analyze the document's structure.
+    def _get_document_structure(self, file_path: str) -> Dict[str, Any]:
+        """Analyze the document's structure (uncached).
         
         Args:
             file_path: Path to the document file
@@ -380,8 +974,7 @@ class DocumentProcessor:
                 file_ext = os.path.splitext(file_path)[1].lower()
             else:
                 # Handle files without extensions
-                file_content = self.get_file_content(file_path)
-                file_ext = self._infer_file_type(file_content)
+                file_ext = self._cached_extraction("file_type", file_path, self._sniff_file_type)
             
             structure = {
                 "file_type": file_ext
@@ -415,50 +1008,106 @@ class DocumentProcessor:
         Returns:
             int: File size in bytes
         """
-        if use_s3 and s3_client and not os.path.exists(file_path):
+        # One stat both finds out whether the file is local and gives its size
+        stat = _stat_or_none(file_path)
+        if stat is not None:
+            return stat.st_size
+        if use_s3 and s3_client:
             # Get file size from S3
             try:
-                # Check if bucket name is configured
-                if not s3_bucket:
-                    raise ValueError("S3 bucket name not configured. Check S3_BUCKET_NAME environment variable.")
-                    
-                response = s3_client.head_object(
-                    Bucket=s3_bucket,
-                    Key=file_path
-                )
-                return response['ContentLength']
+                return self._head_s3_object(file_path)['ContentLength']
             except Exception as e:
                 logger.error(f"Error getting file size from S3: {e}")
                 return 0
-        else:
-            # Get file size locally
+        logger.error(f"Error getting file size locally: no such file {file_path}")
+        return 0
+
+    def _as_stream(self, file_path: str) -> Union[str, io.BytesIO]:
+        """Get a source the document parsers can read, without writing S3 objects to a temp file.
+        
+        Args:
+            file_path: Path to the file (local path or S3 key)
+            
+        Returns:
+            Union[str, io.BytesIO]: The path itself for local files, otherwise an in-memory stream of the content
+        """
+        if os.path.exists(file_path):
+            return file_path
+        return self.get_file_content(file_path, as_stream=True)
+
+    def _extract_pdf_pages(self, source: Union[str, io.BytesIO], page_count: int) -> List[str]:
+        """Extract the text of every page of a large PDF in worker processes, in-process if the pool fails.
+        
+        Args:
+            source: Path of the PDF, or an in-memory stream of it
+            page_count: Number of pages in the PDF
+            
+        Returns:
+            List[str]: Text of each page, in page order
+        """
+        try:
+            return _extract_pdf_pages_parallel(source, page_count)
+        except Exception as e:
+            logger.warning(f"Parallel PDF extraction failed, extracting pages in-process: {e}")
+            return _extract_pdf_page_range(source if isinstance(source, str) else source.getvalue(), 0, page_count)
+
+    @staticmethod
+    def _open_fitz(source: Union[str, io.BytesIO]) -> Any:
+        """Open a PDF from a path or an in-memory stream with PyMuPDF"""
+        if isinstance(source, str):
+            return fitz.open(source, filetype='pdf')
+        return fitz.open(stream=source, filetype='pdf')
+
+    def _read_file_head(self, file_path: str) -> bytes:
+        """Read the first SNIFF_BYTES bytes of a file, with a ranged GET for S3 objects.
+        
+        Args:
+            file_path: Path to the file (local path or S3 key)
+            
+        Returns:
+            bytes: The start of the file content
+        """
+        if use_s3 and s3_client and not os.path.exists(file_path):
             try:
-                return os.path.getsize(file_path)
-            except Exception as e:
-                logger.error(f"Error getting file size locally: {e}")
-                return 0
+                return _get_s3_range(file_path, 0, SNIFF_BYTES - 1)['Body'].read()
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "InvalidRange":
+                    raise
+                # Empty objects cannot satisfy any range
+                return b''
+        with open(file_path, 'rb') as f:
+            return f.read(SNIFF_BYTES)
+
+    def _sniff_file_type(self, file_path: str) -> str:
+        """Infer the type of a file without an extension from its first bytes.
+        
+        Args:
+            file_path: Path to the file (local path or S3 key)
+            
+        Returns:
+            str: Inferred file extension
+        """
+        return self._infer_file_type(self._read_file_head(file_path))
 
     def _infer_file_type(self, file_content: bytes) -> str:
         """Try to infer file type from content.
         
         Args:
-            file_content: File content as bytes
+            file_content: File content as bytes; only the first SNIFF_BYTES are inspected
             
         Returns:
             str: Inferred file extension
         """
-        # Check PDF signature
-        if file_content.startswith(b'%PDF'):
-            return '.pdf'
-        
-        # Check ZIP-based formats (DOCX, XLSX)
-        if file_content.startswith(b'PK\x03\x04'):
-            # This could be DOCX, XLSX, PPTX, etc.
-            # Without deeper inspection, we'll default to DOCX
-            return '.docx'
+        # Check signatures (ZIP-based formats could also be XLSX, PPTX, etc.; without
+        # deeper inspection, we'll default to DOCX)
+        header = file_content[:16]
+        for signature, ext in _MAGIC_SIGNATURES.items():
+            if header.startswith(signature):
+                return ext
         
         # Check for CSV (look for commas and newlines)
-        if b',' in file_content and b'\n' in file_content:
+        sample = file_content[:SNIFF_BYTES]
+        if b',' in sample and b'\n' in sample:
             return '.csv'
         
         # Default to txt for unknown types
@@ -473,45 +1122,45 @@ class DocumentProcessor:
         Returns:
             str: Extracted text
         """
-        if not PYPDF2_AVAILABLE:
-            return "Error: PyPDF2 library not available for PDF extraction"
+        if not (FITZ_AVAILABLE or PYPDF2_AVAILABLE):
+            return "Error: PyMuPDF or PyPDF2 library not available for PDF extraction"
         
         text_parts = []
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.pdf"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
+            
+            if FITZ_AVAILABLE:
+                with self._open_fitz(file_to_read) as doc:
+                    if doc.needs_pass and not doc.authenticate(''):  # Try empty password
+                        return "Error: PDF is encrypted and cannot be read"
+                    if doc.page_count > PDF_PARALLEL_MIN_PAGES and PDF_EXTRACTION_WORKERS > 1:
+                        return "\n".join(self._extract_pdf_pages(file_to_read, doc.page_count))
+                    for page in doc:
+                        text_parts.append(page.get_text('text'))
+                return "\n".join(text_parts)
             
             # Read the PDF
-            with open(file_to_read, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                
-                # Check if the PDF is encrypted
-                if pdf_reader.is_encrypted:
-                    try:
-                        pdf_reader.decrypt('')  # Try empty password
-                    except:
-                        text_parts.append("Error: PDF is encrypted and cannot be read")
-                        return "\n".join(text_parts)
-                
-                # Extract text from each page
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text_parts.append(page.extract_text())
-            
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
+            pdf_reader = _pdf_reader(file_to_read)
+            
+            # Check if the PDF is encrypted
+            if pdf_reader.is_encrypted:
+                try:
+                    pdf_reader.decrypt('')  # Try empty password
+                except:
+                    text_parts.append("Error: PDF is encrypted and cannot be read")
+                    return "\n".join(text_parts)
+            
+            page_count = len(pdf_reader.pages)
+            if page_count > PDF_PARALLEL_MIN_PAGES and PDF_EXTRACTION_WORKERS > 1:
+                return "\n".join(self._extract_pdf_pages(file_to_read, page_count))
+            
+            # Extract text from each page
+            for page_num in range(page_count):
+                page = pdf_reader.pages[page_num]
+                text_parts.append(page.extract_text())
+            
             return "\n".join(text_parts)
             
         except Exception as e:
@@ -531,26 +1180,13 @@ class DocumentProcessor:
             return "Error: python-docx library not available for Word document extraction"
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.docx"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
             
             # Read the Word document
             doc = docx.Document(file_to_read)
             text = "\n".join([para.text for para in doc.paragraphs])
             
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
             return text
             
         except Exception as e:
@@ -560,39 +1196,18 @@ class DocumentProcessor:
     def _extract_text_from_csv(self, file_path: str) -> str:
         """Extract text from a CSV file.
         
+        CSV is already text, so the content is decoded as-is rather than parsed into a
+        DataFrame and formatted back out.
+        
         Args:
             file_path: Path to the CSV file
             
         Returns:
             str: Extracted text
         """
-        if not PANDAS_AVAILABLE:
-            return "Error: pandas library not available for CSV extraction"
-        
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.csv"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
-            
-            # Read the CSV file
-            df = pd.read_csv(file_to_read, encoding='utf-8', on_bad_lines='skip')
-            
-            # Convert to string representation
-            text = df.to_string()
-            
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
-            return text
+            # utf-8-sig drops the byte order mark spreadsheet exports often start with
+            return self.get_file_content(file_path).decode('utf-8-sig', errors='replace')
             
         except Exception as e:
             logger.error(f"Error extracting text from CSV {file_path}: {e}")
@@ -611,17 +1226,8 @@ class DocumentProcessor:
             return "Error: pandas library not available for Excel extraction"
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.xlsx"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
             
             # Read the Excel file
             df = pd.read_excel(file_to_read, sheet_name=None)
@@ -630,13 +1236,10 @@ class DocumentProcessor:
             text_parts = []
             for sheet_name, sheet_df in df.items():
                 text_parts.append(f"Sheet: {sheet_name}")
-                text_parts.append(sheet_df.to_string())
+                # to_csv is implemented in C; to_string formats every cell in Python
+                text_parts.append(sheet_df.to_csv(sep='\t', index=False))
                 text_parts.append("")
             
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
             return "\n".join(text_parts)
             
         except Exception as e:
@@ -655,38 +1258,35 @@ class DocumentProcessor:
         metadata = {}
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.pdf"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
+            
+            if FITZ_AVAILABLE:
+                with self._open_fitz(file_to_read) as doc:
+                    metadata["page_count"] = doc.page_count
+                    info = doc.metadata or {}
+                    metadata["title"] = info.get('title', '')
+                    metadata["author"] = info.get('author', '')
+                    metadata["subject"] = info.get('subject', '')
+                    metadata["creator"] = info.get('creator', '')
+                    metadata["producer"] = info.get('producer', '')
+                return metadata
             
             # Read the PDF
-            with open(file_to_read, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                
-                metadata["page_count"] = len(pdf_reader.pages)
-                
-                # Extract document info
-                if pdf_reader.metadata:
-                    info = pdf_reader.metadata
-                    # Convert to dict and handle Python types
-                    metadata["title"] = info.get('/Title', '')
-                    metadata["author"] = info.get('/Author', '')
-                    metadata["subject"] = info.get('/Subject', '')
-                    metadata["creator"] = info.get('/Creator', '')
-                    metadata["producer"] = info.get('/Producer', '')
-                
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
+            pdf_reader = _pdf_reader(file_to_read)
+            
+            metadata["page_count"] = len(pdf_reader.pages)
+            
+            # Extract document info
+            if pdf_reader.metadata:
+                info = pdf_reader.metadata
+                # Convert to dict and handle Python types
+                metadata["title"] = info.get('/Title', '')
+                metadata["author"] = info.get('/Author', '')
+                metadata["subject"] = info.get('/Subject', '')
+                metadata["creator"] = info.get('/Creator', '')
+                metadata["producer"] = info.get('/Producer', '')
+            
             return metadata
             
         except Exception as e:
@@ -705,17 +1305,8 @@ class DocumentProcessor:
         metadata = {}
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.docx"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
             
             # Read the Word document
             doc = docx.Document(file_to_read)
@@ -738,10 +1329,6 @@ class DocumentProcessor:
             metadata["table_count"] = len(doc.tables)
             metadata["section_count"] = len(doc.sections)
             
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
             return metadata
             
         except Exception as e:
@@ -760,30 +1347,28 @@ class DocumentProcessor:
         metadata = {}
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.csv"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
+            
+            if PYARROW_AVAILABLE:
+                # Only names and counts are needed, so skip building a pandas frame
+                table = pacsv.read_csv(
+                    file_to_read,
+                    parse_options=pacsv.ParseOptions(invalid_row_handler=lambda row: 'skip')
+                )
+                metadata["row_count"] = table.num_rows
+                metadata["column_count"] = table.num_columns
+                metadata["columns"] = table.column_names
+                return metadata
             
             # Read the CSV file
-            df = pd.read_csv(file_to_read, encoding='utf-8', on_bad_lines='skip')
+            df = pd.read_csv(file_to_read, encoding='utf-8', on_bad_lines='skip', memory_map=isinstance(file_to_read, str))
             
             # Extract basic statistics
             metadata["row_count"] = len(df)
             metadata["column_count"] = len(df.columns)
             metadata["columns"] = df.columns.tolist()
             
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
             return metadata
             
         except Exception as e:
@@ -802,17 +1387,18 @@ class DocumentProcessor:
         metadata = {}
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
             
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.xlsx"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            if OPENPYXL_AVAILABLE:
+                try:
+                    metadata.update(self._read_excel_sheets(file_to_read))
+                    return metadata
+                except Exception as e:
+                    # Not an .xlsx workbook (e.g. legacy .xls); let pandas pick an engine
+                    logger.debug(f"openpyxl could not read {file_path}, falling back to pandas: {e}")
+                    if not isinstance(file_to_read, str):
+                        file_to_read.seek(0)
             
             # Read the Excel file - get all sheets
             excel_file = pd.ExcelFile(file_to_read)
@@ -833,16 +1419,66 @@ class DocumentProcessor:
             
             metadata["sheets"] = sheet_stats
             
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
             return metadata
             
         except Exception as e:
             logger.error(f"Error extracting Excel metadata from {file_path}: {e}")
             return {"error": str(e)}
 
+    @staticmethod
+    def _read_excel_sheets(source: Union[str, io.BytesIO], type_sample_rows: int = 0) -> Dict[str, Any]:
+        """Read sheet names, headers and row counts by streaming rows with openpyxl in read-only mode.
+        
+        Args:
+            source: Path or in-memory stream of an .xlsx workbook
+            type_sample_rows: When positive, also infer each column's type from this many data rows
+            
+        Returns:
+            Dict[str, Any]: Sheet names, count and per-sheet stats, shaped like the pandas-based results
+        """
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            sheet_stats = {}
+            for worksheet in workbook.worksheets:
+                rows = worksheet.iter_rows(values_only=True)
+                header = list(next(rows, ()))
+                while header and header[-1] is None:
+                    header.pop()
+                columns = [
+                    f"Unnamed: {i}" if value is None else value
+                    for i, value in enumerate(header)
+                ]
+                sample = list(islice(rows, type_sample_rows))
+                
+                if worksheet.max_row is not None:
+                    # The sheet declares its dimensions, so rows need not be read to be counted
+                    row_count = max(worksheet.max_row - 1, 0)
+                else:
+                    # Count up to the last non-empty row, as pandas drops trailing blank rows
+                    row_count = 0
+                    for index, row in enumerate(chain(sample, rows), 1):
+                        if any(value is not None for value in row):
+                            row_count = index
+                
+                stats = {
+                    "row_count": row_count,
+                    "column_count": len(columns),
+                    "columns": columns
+                }
+                if type_sample_rows > 0:
+                    stats["column_types"] = {
+                        str(column): _infer_column_type([row[i] for row in sample if i < len(row)])
+                        for i, column in enumerate(columns)
+                    }
+                sheet_stats[worksheet.title] = stats
+            return {
+                "sheet_names": workbook.sheetnames,
+                "sheet_count": len(workbook.sheetnames),
+                "sheets": sheet_stats
+            }
+        finally:
+            workbook.close()
+
     def _analyze_pdf_structure(self, file_path: str) -> Dict[str, Any]:
         """Analyze the structure of a PDF document.
         
@@ -855,45 +1491,31 @@ class DocumentProcessor:
         structure = {}
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.pdf"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
             
             # Read the PDF
-            with open(file_to_read, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                
-                structure["total_pages"] = len(pdf_reader.pages)
-                
-                # Analyze first page to estimate document type
-                if structure["total_pages"] > 0:
-                    first_page_text = pdf_reader.pages[0].extract_text()
-                    
-                    # Simple heuristic checks for document type
-                    if re.search(r'\b(contract|agreement)\b', first_page_text, re.IGNORECASE):
-                        structure["estimated_type"] = "contract"
-                    elif re.search(r'\b(invoice|bill|payment)\b', first_page_text, re.IGNORECASE):
-                        structure["estimated_type"] = "invoice"
-                    elif re.search(r'\b(report|analysis)\b', first_page_text, re.IGNORECASE):
-                        structure["estimated_type"] = "report"
-                    else:
-                        structure["estimated_type"] = "general"
-                
-                # Check for common document parts
-                structure["has_outline"] = hasattr(pdf_reader, 'outline') and pdf_reader.outline is not None
-                
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
+            pdf_reader = _pdf_reader(file_to_read)
+            
+            structure["total_pages"] = len(pdf_reader.pages)
+            
+            # Analyze first page to estimate document type
+            if structure["total_pages"] > 0:
+                first_page_text = pdf_reader.pages[0].extract_text()
                 
+                # Simple heuristic checks for document type
+                if re.search(r'\b(contract|agreement)\b', first_page_text, re.IGNORECASE):
+                    structure["estimated_type"] = "contract"
+                elif re.search(r'\b(invoice|bill|payment)\b', first_page_text, re.IGNORECASE):
+                    structure["estimated_type"] = "invoice"
+                elif re.search(r'\b(report|analysis)\b', first_page_text, re.IGNORECASE):
+                    structure["estimated_type"] = "report"
+                else:
+                    structure["estimated_type"] = "general"
+            
+            # Check for common document parts
+            structure["has_outline"] = hasattr(pdf_reader, 'outline') and pdf_reader.outline is not None
+            
             return structure
             
         except Exception as e:
@@ -912,29 +1534,23 @@ class DocumentProcessor:
         structure = {}
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.docx"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
             
             # Read the Word document
             doc = docx.Document(file_to_read)
             
+            # doc.paragraphs rebuilds its list from the XML tree on every access, so walk it once
+            paragraphs = doc.paragraphs
+            
             # Analyze document structure
-            structure["paragraph_count"] = len(doc.paragraphs)
+            structure["paragraph_count"] = len(paragraphs)
             structure["table_count"] = len(doc.tables)
             structure["section_count"] = len(doc.sections)
             
             # Count headings by level
             heading_counts = {}
-            for paragraph in doc.paragraphs:
+            for paragraph in paragraphs:
                 if paragraph.style.name.startswith('Heading'):
                     heading_level = paragraph.style.name.replace('Heading ', '')
                     if heading_level.isdigit():
@@ -943,7 +1559,7 @@ class DocumentProcessor:
             structure["headings"] = heading_counts
             
             # Estimate document type based on content
-            all_text = "\n".join([p.text for p in doc.paragraphs])
+            all_text = "\n".join([p.text for p in paragraphs])
             if re.search(r'\b(contract|agreement)\b', all_text, re.IGNORECASE):
                 structure["estimated_type"] = "contract"
             elif re.search(r'\b(invoice|bill|payment)\b', all_text, re.IGNORECASE):
@@ -953,10 +1569,6 @@ class DocumentProcessor:
             else:
                 structure["estimated_type"] = "general"
             
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
             return structure
             
         except Exception as e:
@@ -975,23 +1587,36 @@ class DocumentProcessor:
         structure = {}
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
-            
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.csv"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
             
-            # Read the CSV file
-            df = pd.read_csv(file_to_read, encoding='utf-8', on_bad_lines='skip')
+            if PYARROW_AVAILABLE:
+                try:
+                    structure.update(self._read_csv_structure(file_to_read))
+                    return structure
+                except Exception as e:
+                    # e.g. invalid UTF-8, which pandas tolerates in object columns
+                    logger.debug(f"pyarrow could not read {file_path}, falling back to pandas: {e}")
+                    if not isinstance(file_to_read, str):
+                        file_to_read.seek(0)
+            
+            # Column names and types come from a sample of the file rather than the whole of it
+            df = pd.read_csv(
+                file_to_read,
+                encoding='utf-8',
+                on_bad_lines='skip',
+                nrows=CSV_SAMPLE_ROWS,
+                memory_map=isinstance(file_to_read, str)
+            )
             
             # Analyze structure
-            structure["row_count"] = len(df)
+            if len(df) < CSV_SAMPLE_ROWS:
+                # The sample is the whole file
+                structure["row_count"] = len(df)
+            else:
+                if not isinstance(file_to_read, str):
+                    file_to_read.seek(0)
+                structure["row_count"] = _count_csv_rows(file_to_read)
             structure["column_count"] = len(df.columns)
             structure["columns"] = df.columns.tolist()
             
@@ -1023,16 +1648,55 @@ class DocumentProcessor:
             
             structure["likely_table"] = is_sequential
             
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
             return structure
             
         except Exception as e:
             logger.error(f"Error analyzing CSV structure for {file_path}: {e}")
             return {"error": str(e)}
 
+    @staticmethod
+    def _read_csv_structure(source: Union[str, io.BytesIO]) -> Dict[str, Any]:
+        """Analyze a CSV with pyarrow's multithreaded reader, without converting it to pandas.
+        
+        Args:
+            source: Path or in-memory stream of the CSV file
+            
+        Returns:
+            Dict[str, Any]: Row and column counts, column names and types, and the table heuristic
+        """
+        table = pacsv.read_csv(
+            source,
+            read_options=pacsv.ReadOptions(use_threads=True),
+            parse_options=pacsv.ParseOptions(invalid_row_handler=lambda row: 'skip')
+        )
+        column_types = {}
+        for field in table.schema:
+            if pa.types.is_integer(field.type):
+                column_types[field.name] = "integer"
+            elif pa.types.is_floating(field.type):
+                column_types[field.name] = "float"
+            elif pa.types.is_timestamp(field.type) or pa.types.is_date(field.type):
+                column_types[field.name] = "datetime"
+            else:
+                column_types[field.name] = "string"
+        
+        # Heuristic: If first column has sequential values or indices, it's likely a table
+        is_sequential = False
+        if table.num_rows > 1 and table.num_columns > 1:
+            first_col = table.column(0)
+            if pa.types.is_integer(first_col.type) or pa.types.is_floating(first_col.type):
+                diffs = pc.drop_null(pc.pairwise_diff(first_col.combine_chunks()))
+                # Allow for some small variation
+                is_sequential = pc.all(pc.greater(diffs, 0)).as_py() is not False and pc.count_distinct(diffs).as_py() <= 2
+        
+        return {
+            "row_count": table.num_rows,
+            "column_count": table.num_columns,
+            "columns": table.column_names,
+            "column_types": column_types,
+            "likely_table": is_sequential
+        }
+
     def _analyze_excel_structure(self, file_path: str) -> Dict[str, Any]:
         """Analyze the structure of an Excel file.
         
@@ -1045,17 +1709,22 @@ class DocumentProcessor:
         structure = {}
         
         try:
-            # Get file content
-            file_content = self.get_file_content(file_path)
+            # Parsers read S3 bytes from memory and local files by path
+            file_to_read = self._as_stream(file_path)
             
-            # Create a temporary file if using S3
-            if use_s3 and s3_client and not os.path.exists(file_path):
-                temp_file = f"/tmp/{uuid.uuid4()}.xlsx"
-                with open(temp_file, 'wb') as f:
-                    f.write(file_content)
-                file_to_read = temp_file
-            else:
-                file_to_read = file_path
+            if OPENPYXL_AVAILABLE:
+                try:
+                    structure.update(self._read_excel_sheets(file_to_read, EXCEL_TYPE_SAMPLE_ROWS))
+                    for sheet_info in structure["sheets"].values():
+                        # A header row and at least one data row and column
+                        sheet_info["likely_data_table"] = sheet_info["row_count"] > 0 and sheet_info["column_count"] > 0
+                    return structure
+                except Exception as e:
+                    # Not an .xlsx workbook (e.g. legacy .xls); let pandas pick an engine
+                    logger.debug(f"openpyxl could not read {file_path}, falling back to pandas: {e}")
+                    structure.clear()
+                    if not isinstance(file_to_read, str):
+                        file_to_read.seek(0)
             
             # Read the Excel file - get all sheets
             excel_file = pd.ExcelFile(file_to_read)
@@ -1100,10 +1769,6 @@ class DocumentProcessor:
             
             structure["sheets"] = sheet_structures
             
-            # Clean up temporary file if created
-            if 'temp_file' in locals() and os.path.exists(temp_file):
-                os.remove(temp_file)
-                
             return structure
             
         except Exception as e:
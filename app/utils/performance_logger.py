@@ -28,6 +28,7 @@ class PerformanceLogger:
         self.component = component
         self.start_times: Dict[str, float] = {}
         self.timings: Dict[str, List[Dict[str, Any]]] = {}
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
         self.session_id = str(uuid.uuid4())[:8]  # Create a short session ID for correlation
         
         # Set up component-specific log file
@@ -187,6 +188,34 @@ class PerformanceLogger:
             
         self.logger.error(f"FAILED {operation} - {json.dumps(log_data)}")
     
+    def record_cache_lookup(self, cache_name: str, hit: bool,
+                            details: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record a cache lookup and log the running hit rate.
+        
+        Args:
+            cache_name: Name of the cache that was consulted
+            hit: Whether the lookup was a hit
+            details: Additional details about the lookup
+        """
+        stats = self.cache_stats.setdefault(cache_name, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+        lookups = stats["hits"] + stats["misses"]
+        
+        log_data = {
+            "session_id": self.session_id,
+            "component": self.component,
+            "cache": cache_name,
+            "action": "cache_hit" if hit else "cache_miss",
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_rate": round(stats["hits"] / lookups, 4),
+            "timestamp": datetime.now().isoformat(),
+            "details": details or {}
+        }
+        
+        self.logger.info(f"CACHE {cache_name} - {json.dumps(log_data)}")
+    
     def get_statistics(self, operation: Optional[str] = None) -> Dict[str, Any]:
         """
         Get statistics for operations performed.
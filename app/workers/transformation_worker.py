@@ -10,18 +10,32 @@ import time
 import logging
 import signal
 import traceback
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, Optional
 import redis
 from sqlalchemy.orm import Session
+from fastapi import HTTPException
 
 # Add the parent directory to the path so we can import the app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from app.core.database import SessionLocal, engine
 from app.models.document import Document
-from app.services.openai_service import openai_service
-from app.services.document_service import document_service
+from app.services.openai_service import get_openai_service
+from app.services.document_service import (
+    document_service,
+    _transformation_cache_key,
+    _get_cached_transformation,
+    _cache_transformation,
+    _openai_slot,
+    _transform_slot,
+    _signed_download_path,
+)
+from app.utils.performance_logger import document_perf_logger
 from app.services.activity_service import log_activity
+from app.services.job_queue_service import (
+    EXTRACTION_QUEUE, _job_key, _user_key, create_redis_client, pack_job, unpack_job
+)
 from app.utils.document_processor import convert_numpy_to_python
 
 # Set up logging
@@ -35,6 +49,8 @@ logger = logging.getLogger(__name__)
 # Get Redis URL from environment - check both REDIS_URL and REDIS (Heroku often uses the latter)
 REDIS_URL = os.getenv('REDIS_URL') or os.getenv('REDIS') or 'redis://localhost:6379/0'
 POLL_INTERVAL = int(os.getenv('TRANSFORMATION_POLL_INTERVAL', '5'))  # seconds
+# Soft time budget for document content extraction; past it the document is left partially processed
+EXTRACTION_TIME_BUDGET = int(os.getenv('EXTRACTION_TIME_BUDGET', '60'))  # seconds
 
 # Log Redis connection info (masking credentials)
 if '@' in REDIS_URL:
@@ -44,15 +60,7 @@ else:
 
 # Initialize Redis client with retry mechanism
 try:
-    # For Heroku Redis URLs (rediss://), skip SSL certificate verification
-    if REDIS_URL.startswith('rediss://'):
-        logger.info(f"Using secure Redis connection with SSL verification disabled")
-        redis_client = redis.from_url(
-            REDIS_URL, 
-            ssl_cert_reqs=None  # Skip certificate verification for Heroku Redis
-        )
-    else:
-        redis_client = redis.from_url(REDIS_URL)
+    redis_client = create_redis_client(REDIS_URL)
 except Exception as e:
     logger.error(f"Error initializing Redis client: {e}")
     redis_client = None  # Will be retried in the main loop
@@ -81,6 +89,7 @@ def process_transformation_job(job_data: Dict[str, Any]) -> None:
     Args:
         job_data: The job data from the queue
     """
+    job_id = None
     try:
         db = get_db()
         
@@ -102,17 +111,21 @@ def process_transformation_job(job_data: Dict[str, Any]) -> None:
             # Mark job as in-progress
             update_job_status(job_id, "processing", None)
             
-            # Get documents from database
-            document = db.query(Document).filter(Document.id == document_id).first()
-            template_input = db.query(Document).filter(Document.id == template_input_id).first()
-            template_output = db.query(Document).filter(Document.id == template_output_id).first()
-            
-            if not document or not template_input or not template_output:
-                error_msg = "One or more documents not found"
+            # Get documents from database in a single query
+            try:
+                documents = document_service.get_documents_by_ids(
+                    db, [document_id, template_input_id, template_output_id], user_id
+                )
+            except HTTPException as e:
+                error_msg = "One or more documents not found" if e.status_code == 404 else e.detail
                 logger.error(f"Job {job_id}: {error_msg}")
                 update_job_status(job_id, "error", {"error": error_msg})
                 return
             
+            document = documents[document_id]
+            template_input = documents[template_input_id]
+            template_output = documents[template_output_id]
+            
             # Verify templates are actually tagged as templates
             if template_input.tag != "template" or template_output.tag != "template":
                 error_msg = "Template documents must be tagged as templates"
@@ -136,18 +149,37 @@ def process_transformation_job(job_data: Dict[str, Any]) -> None:
             start_time = time.time()
             
             try:
-                transformation_result = openai_service.transform_document(
-                    document_content=document_content,
-                    template_input_content=template_input_content,
-                    template_output_content=template_output_content,
-                    document_format=document_ext,
-                    template_input_format=template_input_ext,
-                    template_output_format=template_output_ext,
-                    document_title=document.title,
-                    template_input_title=template_input.title,
-                    template_output_title=template_output.title,
-                    document_type=document.doc_type
+                # Reuse a previous result for identical document/template content
+                cache_key = _transformation_cache_key(
+                    document_content,
+                    template_input_content,
+                    template_output_content,
+                    document.doc_type
                 )
+                transformation_result = _get_cached_transformation(cache_key)
+                document_perf_logger.record_cache_lookup(
+                    "transformation_cache",
+                    transformation_result is not None,
+                    {"document_id": document.id, "job_id": job_id}
+                )
+                
+                if transformation_result is None:
+                    slot_details = {"document_id": document.id, "job_id": job_id}
+                    with _transform_slot(slot_details), _openai_slot(slot_details):
+                        transformation_result = get_openai_service().transform_document(
+                            document_content=document_content,
+                            template_input_content=template_input_content,
+                            template_output_content=template_output_content,
+                            document_format=document_ext,
+                            template_input_format=template_input_ext,
+                            template_output_format=template_output_ext,
+                            document_title=document.title,
+                            template_input_title=template_input.title,
+                            template_output_title=template_output.title,
+                            document_type=document.doc_type,
+                            user_id=user_id
+                        )
+                    _cache_transformation(cache_key, transformation_result)
                 
                 logger.info(f"Job {job_id}: OpenAI transformation completed in {time.time() - start_time:.2f} seconds")
                 
@@ -209,24 +241,11 @@ def process_transformation_job(job_data: Dict[str, Any]) -> None:
                 
                 # Add file path if the file was saved successfully
                 if transformed_file_path:
-                    # Generate a secure download URL
-                    from datetime import datetime, timedelta
-                    import hashlib
-                    import hmac
-                    from app.services.auth_service import SECRET_KEY
-                    
+                    # Create a secure download URL (valid for 24 hours) with auth params in the query string
                     filename = os.path.basename(transformed_file_path)
-                    expires = int((datetime.now() + timedelta(hours=24)).timestamp())  # Valid for 24 hours
-                    signature = hmac.new(
-                        SECRET_KEY.encode(), 
-                        f"{filename}:{user_id}:{expires}".encode(),
-                        hashlib.sha256
-                    ).hexdigest()
-                    
-                    # Create a signed URL with auth params in the query string
                     result["transformed_file_path"] = transformed_file_path
                     result["transformed_file_name"] = filename
-                    result["download_path"] = f"/documents/downloads/{filename}?token={signature}&expires={expires}&user_id={user_id}"
+                    result["download_path"] = _signed_download_path(filename, user_id, timedelta(hours=24))
                 
                 # Add any parse errors if they occurred
                 if parse_error:
@@ -240,7 +259,7 @@ def process_transformation_job(job_data: Dict[str, Any]) -> None:
                     "document_format": document_ext,
                     "template_input_format": template_input_ext,
                     "template_output_format": template_output_ext,
-                    "transformation_time_seconds": time.time() - start_time if 'start_time' in locals() else None,
+                    "transformation_time_seconds": time.time() - start_time,
                     "job_id": job_id
                 }
                 
@@ -297,9 +316,33 @@ def process_transformation_job(job_data: Dict[str, Any]) -> None:
         logger.error(traceback.format_exc())
         
         # Try to update job status if job_id exists
-        if 'job_id' in locals() and job_id:
+        if job_id:
             update_job_status(job_id, "error", {"error": str(e)})
 
+def process_extraction_job(job_data: Dict[str, Any]) -> None:
+    """
+    Extract text and metadata for an uploaded document
+    
+    Args:
+        job_data: The job data from the extraction queue
+    """
+    document_id = job_data.get('document_id')
+    file_path = job_data.get('file_path')
+    
+    if not document_id or not file_path:
+        logger.error(f"Invalid extraction job data: {job_data}")
+        return
+    
+    logger.info(f"Processing extraction job for document {document_id}")
+    try:
+        document_service._process_document_content(
+            document_id, file_path, job_data.get('client_ip'),
+            time_budget=EXTRACTION_TIME_BUDGET
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error in extraction job for document {document_id}: {e}")
+        logger.error(traceback.format_exc())
+
 def update_job_status(job_id: str, status: str, result: Optional[Dict[str, Any]]) -> None:
     """
     Update the status of a job in Redis
@@ -314,7 +357,7 @@ def update_job_status(job_id: str, status: str, result: Optional[Dict[str, Any]]
             logger.warning(f"Cannot update job {job_id} status to {status}: Redis not available")
             return
             
-        job_key = f"transform_job:{job_id}"
+        job_key = _job_key(job_id)
         
         # Get current job data
         job_data_str = redis_client.get(job_key)
@@ -322,7 +365,7 @@ def update_job_status(job_id: str, status: str, result: Optional[Dict[str, Any]]
             logger.warning(f"Job {job_id} not found in Redis")
             return
         
-        job_data = json.loads(job_data_str)
+        job_data = unpack_job(job_data_str)
         
         # Update status and result
         job_data["status"] = status
@@ -330,14 +373,22 @@ def update_job_status(job_id: str, status: str, result: Optional[Dict[str, Any]]
             job_data["result"] = convert_numpy_to_python(result)
         
         # Update timestamp
-        job_data["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        now = datetime.now(timezone.utc)
+        now_ms = int(now.timestamp() * 1000)
+        job_data["updated_at"] = now.isoformat(timespec="seconds")
+        job_data["updated_at_ms"] = now_ms
         
-        # Save updated job data
-        redis_client.set(job_key, json.dumps(job_data))
-        
-        # For completed or error jobs, set an expiration (7 days)
+        # Save updated job data and move the job to the front of its user's
+        # index (scored by last update) in one round-trip. Completed or error
+        # jobs expire after 7 days; others keep the TTL set at enqueue time.
+        pipe = redis_client.pipeline(transaction=False)
         if status in ["completed", "error"]:
-            redis_client.expire(job_key, 60 * 60 * 24 * 7)  # 7 days in seconds
+            pipe.set(job_key, pack_job(job_data), ex=60 * 60 * 24 * 7)  # 7 days in seconds
+        else:
+            pipe.set(job_key, pack_job(job_data), keepttl=True)
+        if job_data.get("user_id") is not None:
+            pipe.zadd(_user_key(job_data["user_id"]), {job_id: now_ms})
+        pipe.execute()
             
         logger.info(f"Updated job {job_id} status to {status}")
         
@@ -359,6 +410,13 @@ def poll_for_jobs():
     signal.signal(signal.SIGTERM, handle_shutdown)
     signal.signal(signal.SIGINT, handle_shutdown)
     
+    # Index jobs enqueued before per-user job indexes existed (no-op once done)
+    try:
+        from app.services.job_queue_service import job_queue_service
+        job_queue_service.backfill_user_job_index()
+    except Exception as e:
+        logger.warning(f"Could not backfill user job index: {e}")
+    
     # Wait for Redis to become available (important during Heroku addon provisioning)
     retry_count = 0
     max_retries = 30  # Wait up to 5 minutes (30 x 10 seconds)
@@ -370,15 +428,7 @@ def poll_for_jobs():
                 # Try to get updated Redis URL (in case it changed during provisioning)
                 updated_redis_url = os.getenv('REDIS_URL') or os.getenv('REDIS') or REDIS_URL
                 logger.info(f"Attempting to connect to Redis at {updated_redis_url.split('@')[0]}[...]")
-                # For Heroku Redis URLs (rediss://), skip SSL certificate verification
-                if updated_redis_url.startswith('rediss://'):
-                    logger.info(f"Using secure Redis connection with SSL verification disabled")
-                    redis_client = redis.from_url(
-                        updated_redis_url, 
-                        ssl_cert_reqs=None  # Skip certificate verification for Heroku Redis
-                    )
-                else:
-                    redis_client = redis.from_url(updated_redis_url)
+                redis_client = create_redis_client(updated_redis_url)
                 logger.info("Successfully connected to Redis")
                 retry_count = 0  # Reset retry count on successful connection
             except Exception as e:
@@ -395,13 +445,17 @@ def poll_for_jobs():
                 continue  # Skip to next iteration
         
         try:
-            # Try to get a job from the queue
+            # Try to get a job from the queues - extraction jobs are short and
+            # block uploads from becoming usable, so they are served first
             if redis_client:
-                job_data_raw = redis_client.rpop("transform_jobs")
+                extraction_job_raw = redis_client.rpop(EXTRACTION_QUEUE)
+                job_data_raw = None if extraction_job_raw else redis_client.rpop("transform_jobs")
                 
-                if job_data_raw:
+                if extraction_job_raw:
+                    process_extraction_job(unpack_job(extraction_job_raw))
+                elif job_data_raw:
                     # Process the job
-                    job_data = json.loads(job_data_raw)
+                    job_data = unpack_job(job_data_raw)
                     process_transformation_job(job_data)
                 else:
                     # No jobs in the queue, sleep for a while
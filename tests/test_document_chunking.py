@@ -142,11 +142,12 @@ def test_document_chunking():
             if chunking_info:
                 logger.info(f"Document was processed in chunks: {chunking_info}")
                 
-                # Verify number of chunks
-                if chunking_info.get("chunks") == 5:
-                    logger.info("Successfully processed document in 5 chunks")
+                # Verify number of chunks (sized by token count, so a 150K char document needs more than one)
+                num_chunks = chunking_info.get("chunks", 0)
+                if num_chunks > 1 and len(chunking_info.get("chunk_sizes", [])) == num_chunks:
+                    logger.info(f"Successfully processed document in {num_chunks} chunks")
                 else:
-                    logger.warning(f"Expected 5 chunks, but got {chunking_info.get('chunks', 'unknown')}")
+                    logger.warning(f"Expected several chunks, but got {chunking_info.get('chunks', 'unknown')}")
                 
                 # Log chunk sizes
                 chunk_sizes = chunking_info.get("chunk_sizes", [])
@@ -0,0 +1,52 @@
+"""
+Tests for Excel structure analysis
+"""
+
+import os
+import sys
+import logging
+import pytest
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+class _NoPandas:
+    """Fails the test if the pandas fallback is reached"""
+
+    def __getattr__(self, attr):
+        raise AssertionError(f"pandas fallback used (pd.{attr})")
+
+
+def test_excel_structure_uses_openpyxl(tmp_path, monkeypatch):
+    """Column types and the data table flag come from the read-only openpyxl pass"""
+    from app.utils import document_processor
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Orders"
+    sheet.append(["order", "qty", "price", "customer"])
+    sheet.append([1, 5, 9.5, "Acme"])
+    sheet.append([2, 3, 12.25, "Globex"])
+    workbook.create_sheet("Empty")
+    path = tmp_path / "orders.xlsx"
+    workbook.save(path)
+
+    monkeypatch.setattr(document_processor, "pd", _NoPandas())
+    processor = document_processor.DocumentProcessor(upload_dir=str(tmp_path))
+    structure = processor._analyze_excel_structure(str(path))
+
+    orders = structure["sheets"]["Orders"]
+    assert orders["column_types"] == {"order": "integer", "qty": "integer", "price": "float", "customer": "string"}
+    assert orders["likely_data_table"] is True
+    assert structure["sheets"]["Empty"]["likely_data_table"] is False
+    logger.info(f"Analyzed {structure['sheet_count']} sheets with openpyxl")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
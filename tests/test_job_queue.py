@@ -0,0 +1,31 @@
+"""
+Tests for the job queue service selection
+"""
+
+import os
+import sys
+import logging
+from dotenv import load_dotenv
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+def test_routes_share_job_queue_service():
+    """Both route modules must use the same job queue instance"""
+    from app.routes import documents, jobs
+    from app.services import job_queue
+    
+    assert id(documents.job_queue_service) == id(jobs.job_queue_service)
+    assert documents.job_queue_service is job_queue.job_queue_service
+    logger.info(f"Routes share {type(job_queue.job_queue_service).__name__}")
+
+if __name__ == "__main__":
+    test_routes_share_job_queue_service()
+    print("Job queue selection test passed")